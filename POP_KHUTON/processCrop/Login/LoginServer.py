@@ -1,14 +1,37 @@
 import os
+import sys
 import json
-import bcrypt
-import aiofiles # 비동기 파일 처리를 위해 추가
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, List # List 추가
 
-from fastapi import FastAPI, Form, HTTPException, status, Depends
+from fastapi import APIRouter, FastAPI, Form, HTTPException, status, Depends, Query, Header, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+# processCrop 폴더의 공용 모듈(storage 등)을 탐지 서버와 함께 사용
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app_logging import setup_logging
+from invalidation import InvalidationBus
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, counter, gauge
+from storage import UserAlreadyExists, create_storage
+from leaderboard import Leaderboard
+from password_hasher import HasherBusy, PasswordHasher
+from sessions import SessionManager
+from user_store import UserStore
+
+setup_logging()
+
 # --- Configuration ---
-DB_DIR = "db"  # 데이터를 저장할 최상위 디렉토리 이름
+DB_DIR = os.environ.get("AUTH_DB_DIR", "db")  # 데이터를 저장할 최상위 디렉토리 이름 (통합 모드에서는 ./Login/db)
+USER_STORE_FLUSH_INTERVAL = float(os.environ.get("USER_STORE_FLUSH_INTERVAL", "2.0"))  # 변경된 사용자 정보를 디스크에 모아 쓰는 주기 (초)
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))                # bcrypt cost factor (새로 만드는 해시에만 적용)
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", str(os.cpu_count() or 2)))  # 해시 계산 전용 스레드 수
+BCRYPT_MAX_PENDING = int(os.environ.get("BCRYPT_MAX_PENDING", "64"))      # 실행+대기 작업이 이 수를 넘으면 429
+SESSION_SECRET = os.environ.get("SESSION_SECRET")                          # 세션 토큰 서명 키 (없으면 실행마다 무작위 생성)
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", "86400"))
+SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", "10000"))
+REQUIRE_SESSION_TOKEN = os.environ.get("REQUIRE_SESSION_TOKEN", "0") == "1"  # 1이면 폼의 ID만으로는 인증하지 않음
+INVALIDATION_PEERS = os.environ.get("INVALIDATION_PEERS", "")  # 사용자 정보를 기록할 때마다 ID를 보낼 탐지 서버의 INVALIDATION_LISTEN 주소들 (쉼표 구분)
 if not os.path.exists(DB_DIR):
     os.makedirs(DB_DIR)
 
@@ -33,21 +56,95 @@ class UserInDB(UserBase):
 class UserResponse(UserBase): # 응답 시에는 UserBase의 필드만 사용
     pass
 
+class LoginResponse(UserResponse):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+class LeaderboardEntry(UserResponse):
+    rank: int
+
 # --- Password Utilities ---
-def get_password_hash(password: str) -> str:
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(pwd_bytes, salt)
-    return hashed_password.decode('utf-8')
+password_hasher = PasswordHasher(max_workers=BCRYPT_WORKERS, max_pending=BCRYPT_MAX_PENDING, rounds=BCRYPT_ROUNDS)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    password_byte_enc = plain_password.encode('utf-8')
-    hashed_password_byte_enc = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_byte_enc, hashed_password_byte_enc)
+def too_many_requests() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="요청이 많아 잠시 후 다시 시도해 주세요.",
+        headers={"Retry-After": "1"},
+    )
+
+# --- Session Tokens ---
+sessions = SessionManager(secret=SESSION_SECRET, ttl_seconds=SESSION_TTL_SECONDS, max_entries=SESSION_CACHE_SIZE)
+
+def get_bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization[:7].lower() == "bearer ":
+        return authorization[7:].strip()
+    return None
+
+def resolve_request_user_id(authorization: Optional[str], form_user_id: Optional[str]) -> str:
+    """
+    `Authorization: Bearer <토큰>`이 있으면 토큰의 사용자를, 없으면 기존 클라이언트처럼 폼의 ID를 사용합니다.
+    둘 다 있으면 같은 사용자여야 합니다.
+    """
+    token = get_bearer_token(authorization)
+    if token is None:
+        if REQUIRE_SESSION_TOKEN or not form_user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="로그인이 필요합니다.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return form_user_id
+
+    token_user_id = sessions.validate(token)
+    if token_user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="세션이 만료되었거나 유효하지 않습니다. 다시 로그인해 주세요.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if form_user_id:
+        try:
+            form_key = sanitize_user_id_for_path(form_user_id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if form_key != token_user_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="다른 사용자의 정보에는 접근할 수 없습니다.")
+    return token_user_id
+
+# --- User Store (메모리 캐시 + write-behind 저장소 기록) ---
+storage = create_storage(DB_DIR)  # STORAGE_BACKEND 환경 변수로 json/sqlite 선택
+user_store: UserStore[UserInDB] = UserStore(
+    storage, UserInDB,
+    flush_interval=USER_STORE_FLUSH_INTERVAL,
+    public_fields=UserResponse.model_fields.keys(),
+)
+leaderboard = Leaderboard()  # (level, exp) 순위 인덱스, 회원가입/정보 변경 시 증분 갱신
+# 따로 실행 중인 탐지 서버에 저장소에 기록한 사용자 ID를 알려 /user_data/ 캐시를 바로 버리게 함
+invalidation_bus = InvalidationBus.from_config(peers=INVALIDATION_PEERS)
+if invalidation_bus is not None:
+    user_store.on_persisted(invalidation_bus.publish)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    user_store.load()
+    leaderboard.rebuild((key, user.level, user.exp) for key, user in user_store.items())
+    await user_store.start()
+    yield
+    await user_store.stop()  # 종료 전에 남은 변경 사항을 모두 저장소에 기록
+    storage.close()
+    password_hasher.shutdown()
+    if invalidation_bus is not None:
+        invalidation_bus.stop()
 
 # --- FastAPI Application ---
+# 엔드포인트는 router에 등록하고, 단독 실행용 app과 통합 모드(gateway.py)가 각각 포함함
+router = APIRouter()
 app = FastAPI(title="사용자 인증 및 정보 관리 API",
-              description="회원가입, 로그인, 사용자 정보 조회, 업데이트 및 전체 사용자 목록 기능을 제공하는 API")
+              description="회원가입, 로그인, 사용자 정보 조회, 업데이트 및 전체 사용자 목록 기능을 제공하는 API",
+              lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 # --- Helper functions for file paths ---
 def sanitize_user_id_for_path(user_id: str) -> str:
@@ -56,17 +153,17 @@ def sanitize_user_id_for_path(user_id: str) -> str:
         raise ValueError("ID가 파일 경로로 사용하기에 적합하지 않습니다. (필터링 후 빈 문자열)")
     return safe_user_id
 
-def get_user_directory_path(user_id: str) -> str:
-    safe_user_id = sanitize_user_id_for_path(user_id)
-    return os.path.join(DB_DIR, safe_user_id)
-
-def get_user_data_file_path(user_id: str) -> str:
-    user_dir = get_user_directory_path(user_id)
-    return os.path.join(user_dir, "user_data.json")
+def get_cached_user(user_id: str) -> Optional[UserInDB]:
+    """ID를 정제한 뒤 메모리 저장소에서 사용자를 찾습니다. 형식이 잘못된 ID는 400으로 응답합니다."""
+    try:
+        safe_user_id = sanitize_user_id_for_path(user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return user_store.get(safe_user_id)
 
 # --- API Endpoints ---
 
-@app.post("/register/", response_model=UserResponse, status_code=status.HTTP_201_CREATED,
+@router.post("/register/", response_model=UserResponse, status_code=status.HTTP_201_CREATED,
           summary="회원가입 (레벨 및 경험치 포함)")
 async def register_user(
     id: str = Form(...),
@@ -76,18 +173,20 @@ async def register_user(
     exp: int = Form(0, description="사용자 초기 경험치 (기본값: 0)")
 ):
     try:
-        user_dir_path = get_user_directory_path(id)
-        user_data_file_path = get_user_data_file_path(id)
+        safe_user_id = sanitize_user_id_for_path(id)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    if os.path.exists(user_dir_path):
+    if await user_store.exists(safe_user_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="이미 사용 중인 ID입니다."
         )
 
-    hashed_password = get_password_hash(password)
+    try:
+        hashed_password = await password_hasher.hash(password)
+    except HasherBusy:
+        raise too_many_requests()
     user_data_to_store = UserInDB(
         id=id,
         nickname=nickname,
@@ -97,34 +196,28 @@ async def register_user(
     )
 
     try:
-        os.makedirs(user_dir_path, exist_ok=True)
-        async with aiofiles.open(user_data_file_path, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(user_data_to_store.model_dump(), ensure_ascii=False, indent=4))
+        await user_store.create(safe_user_id, user_data_to_store)
+    except UserAlreadyExists:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="이미 사용 중인 ID입니다."
+        )
     except Exception as e:
-        if os.path.exists(user_data_file_path):
-            try: await aiofiles.os.remove(user_data_file_path)
-            except: pass
-        if os.path.exists(user_dir_path) and not os.listdir(user_dir_path):
-            try: os.rmdir(user_dir_path)
-            except: pass
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"사용자 정보 저장 중 오류 발생: {str(e)}"
         )
+    leaderboard.update(safe_user_id, level, exp)
     return UserResponse(**user_data_to_store.model_dump())
 
 
-@app.post("/login/", response_model=UserResponse, summary="로그인 (레벨 및 경험치 포함)")
+@router.post("/login/", response_model=LoginResponse, summary="로그인 (레벨 및 경험치, 세션 토큰 포함)")
 async def login_for_access_token(
     id: str = Form(...),
     password: str = Form(...)
 ):
-    try:
-        user_data_file_path = get_user_data_file_path(id)
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-
-    if not os.path.exists(user_data_file_path):
+    user_in_db = get_cached_user(id)
+    if user_in_db is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ID 또는 비밀번호가 잘못되었습니다.",
@@ -132,141 +225,173 @@ async def login_for_access_token(
         )
 
     try:
-        async with aiofiles.open(user_data_file_path, "r", encoding="utf-8") as f:
-            content = await f.read()
-            stored_user_data_dict = json.loads(content)
-        user_in_db = UserInDB(**stored_user_data_dict)
-    except Exception as e:
-        print(f"Error during login data processing for {id}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="사용자 정보 처리 중 오류 발생."
-        )
-
-    if not verify_password(password, user_in_db.hashed_password):
+        password_ok = await password_hasher.verify(password, user_in_db.hashed_password)
+    except HasherBusy:
+        raise too_many_requests()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ID 또는 비밀번호가 잘못되었습니다.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return UserResponse(**user_in_db.model_dump())
-
-@app.get("/users/me/", response_model=UserResponse, summary="현재 사용자 정보 조회 (예시, 레벨 및 경험치 포함)")
-async def read_users_me(current_user_id: str = Form(..., description="정보를 조회할 사용자의 ID")): # Form으로 변경하여 /docs에서 테스트 용이
-    try:
-        user_data_file_path = get_user_data_file_path(current_user_id)
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-
-    if not os.path.exists(user_data_file_path):
+    # 이후 요청은 비밀번호 대신 이 토큰을 Authorization: Bearer 헤더로 보내면 bcrypt 검증을 다시 하지 않음
+    access_token, expires_in = sessions.issue(sanitize_user_id_for_path(id))
+    return LoginResponse(**user_in_db.model_dump(), access_token=access_token, expires_in=expires_in)
+
+@router.post("/logout/", status_code=status.HTTP_204_NO_CONTENT, summary="세션 토큰 폐기")
+async def logout(authorization: Optional[str] = Header(None)):
+    # 서명이 맞고 만료되지 않은 토큰만 폐기 목록에 남음 (위조 토큰으로 목록을 키울 수 없음)
+    token = get_bearer_token(authorization)
+    if token is not None:
+        sessions.revoke(token)
+
+@router.get("/users/me/", response_model=UserResponse, summary="현재 사용자 정보 조회 (예시, 레벨 및 경험치 포함)")
+async def read_users_me(
+    current_user_id: Optional[str] = Form(None, description="정보를 조회할 사용자의 ID (세션 토큰이 없을 때)"), # Form으로 변경하여 /docs에서 테스트 용이
+    authorization: Optional[str] = Header(None, description="Bearer <로그인 시 받은 access_token>"),
+):
+    current_user_id = resolve_request_user_id(authorization, current_user_id)
+    user_in_db = get_cached_user(current_user_id)
+    if user_in_db is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="사용자를 찾을 수 없습니다.")
-
-    try:
-        async with aiofiles.open(user_data_file_path, "r", encoding="utf-8") as f:
-            content = await f.read()
-            stored_user_data_dict = json.loads(content)
-        user_in_db = UserInDB(**stored_user_data_dict)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"사용자 정보 조회 중 오류 발생: {str(e)}"
-        )
     return UserResponse(**user_in_db.model_dump())
 
 
-@app.post("/users/update/", response_model=UserResponse, summary="사용자 정보 업데이트 (닉네임, 레벨, 경험치)")
+@router.post("/users/update/", response_model=UserResponse, summary="사용자 정보 업데이트 (닉네임, 레벨, 경험치)")
 async def update_user_info(
-    id: str = Form(...),
+    id: Optional[str] = Form(None, description="사용자 ID (세션 토큰이 없을 때)"),
     nickname: Optional[str] = Form(None, description="새로운 닉네임 (변경 원치 않으면 비워둠)"),
     level: Optional[int] = Form(None, description="새로운 레벨 (변경 원치 않으면 비워둠)"),
-    exp: Optional[int] = Form(None, description="새로운 경험치 (변경 원치 않으면 비워둠)")
+    exp: Optional[int] = Form(None, description="새로운 경험치 (변경 원치 않으면 비워둠)"),
+    authorization: Optional[str] = Header(None, description="Bearer <로그인 시 받은 access_token>"),
 ):
-    try:
-        user_data_file_path = get_user_data_file_path(id)
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-
-    if not os.path.exists(user_data_file_path):
+    id = resolve_request_user_id(authorization, id)
+    user_in_db = get_cached_user(id)
+    if user_in_db is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"사용자 ID '{id}'를 찾을 수 없습니다.")
 
-    try:
-        async with aiofiles.open(user_data_file_path, "r", encoding="utf-8") as f:
-            content = await f.read()
-            stored_user_data_dict = json.loads(content)
-        user_in_db = UserInDB(**stored_user_data_dict)
-
-        updated_fields = False
-        if nickname is not None:
-            user_in_db.nickname = nickname
-            updated_fields = True
-        if level is not None:
-            user_in_db.level = level
-            updated_fields = True
-        if exp is not None:
-            user_in_db.exp = exp
-            updated_fields = True
-        
-        if not updated_fields:
-            return UserResponse(**user_in_db.model_dump())
-
-        async with aiofiles.open(user_data_file_path, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(user_in_db.model_dump(), ensure_ascii=False, indent=4))
-
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="사용자 데이터 파일 형식이 잘못되었습니다.")
-    except Exception as e:
-        print(f"Error during user update for {id}: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"사용자 정보 업데이트 중 오류 발생: {str(e)}")
+    updated_fields = False
+    if nickname is not None:
+        user_in_db.nickname = nickname
+        updated_fields = True
+    if level is not None:
+        user_in_db.level = level
+        updated_fields = True
+    if exp is not None:
+        user_in_db.exp = exp
+        updated_fields = True
+
+    if updated_fields:
+        # 파일은 write-behind 태스크가 모아서 기록하므로 여기서는 메모리만 갱신
+        safe_user_id = sanitize_user_id_for_path(id)
+        user_store.mark_dirty(safe_user_id)
+        if level is not None or exp is not None:
+            leaderboard.update(safe_user_id, user_in_db.level, user_in_db.exp)
 
     return UserResponse(**user_in_db.model_dump())
 
 # --- 모든 사용자 정보 조회 엔드포인트 추가 ---
-@app.get("/users/all/", response_model=List[UserResponse], summary="모든 사용자 정보 목록 조회")
-async def read_all_users():
+USERS_ALL_MAX_PAGE_SIZE = 1000
+USERS_ALL_CHUNK_SIZE = 256  # 스트리밍 시 한 번에 내보내는 사용자 수
+
+def _encode_user_rows(keys: List[str], fields: Optional[List[str]]) -> List[bytes]:
+    if fields is None:
+        return [user_store.public_json(key) for key in keys]
+    rows = []
+    for key in keys:
+        user = user_store.get(key)
+        rows.append(json.dumps({field: getattr(user, field) for field in fields}, ensure_ascii=False).encode("utf-8"))
+    return rows
+
+@router.get("/users/all/", response_model=List[UserResponse], summary="모든 사용자 정보 목록 조회")
+async def read_all_users(
+    limit: Optional[int] = Query(None, ge=1, le=USERS_ALL_MAX_PAGE_SIZE, description="페이지 크기 (비우면 전체)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    fields: Optional[str] = Query(None, description="응답에 포함할 필드 (쉼표 구분, 예: id,level,exp)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json: JSON 배열, ndjson: 한 줄에 한 명"),
+):
     """
     DB에 저장된 모든 사용자의 정보(ID, 닉네임, 레벨, 경험치) 목록을 반환합니다.
+    메모리 저장소의 ID 정렬 인덱스를 커서로 잘라서 요청한 페이지만 직렬화하며, 응답은 청크 단위로 스트리밍합니다.
+    다음 페이지가 있으면 `X-Next-Cursor` 헤더에 커서를 담아 보냅니다.
     """
-    all_users_data = []
-    if not os.path.exists(DB_DIR) or not os.path.isdir(DB_DIR):
-        print(f"Warning: Database directory '{DB_DIR}' not found.")
-        return all_users_data
+    selected_fields: Optional[List[str]] = None
+    if fields:
+        selected_fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected_fields if field not in UserResponse.model_fields]
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"알 수 없는 필드입니다: {', '.join(unknown)}")
+
+    keys, next_cursor = user_store.page(after=cursor, limit=limit)
+
+    async def stream_rows():
+        separator = b"\n" if format == "ndjson" else b","
+        if format == "json":
+            yield b"["
+        for start in range(0, len(keys), USERS_ALL_CHUNK_SIZE):
+            chunk = separator.join(_encode_user_rows(keys[start:start + USERS_ALL_CHUNK_SIZE], selected_fields))
+            if format == "ndjson":
+                yield chunk + b"\n"
+            else:
+                yield chunk if start == 0 else b"," + chunk
+        if format == "json":
+            yield b"]"
+
+    headers = {"X-Total-Count": str(len(user_store))}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(stream_rows(), media_type=media_type, headers=headers)
+
+# --- 리더보드 ---
+LEADERBOARD_MAX_K = 100
+
+def _leaderboard_entry(rank: int, key: str) -> LeaderboardEntry:
+    return LeaderboardEntry(rank=rank, **user_store.get(key).model_dump())
+
+@router.get("/leaderboard/top", response_model=List[LeaderboardEntry], summary="레벨/경험치 상위 사용자 조회")
+async def read_leaderboard_top(
+    k: int = Query(10, ge=1, le=LEADERBOARD_MAX_K, description="조회할 사용자 수"),
+    offset: int = Query(0, ge=0, description="건너뛸 순위 수 (다음 페이지 조회용)"),
+):
+    """레벨 내림차순, 같은 레벨이면 경험치 내림차순으로 정렬된 상위 k명을 반환합니다."""
+    return [_leaderboard_entry(rank, key) for rank, key, _, _ in leaderboard.top(k, offset=offset)]
 
-    try:
-        # os.listdir은 동기 함수이지만, 사용자 수가 매우 많지 않다면 일반적으로 허용 가능합니다.
-        # 매우 많은 사용자를 예상한다면 anyio.to_thread.run_sync 등을 고려할 수 있습니다.
-        user_id_folders = [folder_name for folder_name in os.listdir(DB_DIR) if os.path.isdir(os.path.join(DB_DIR, folder_name))]
-    except Exception as e:
-        print(f"Error listing user directories in '{DB_DIR}': {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="사용자 목록을 불러오는 중 오류가 발생했습니다.")
+@router.get("/leaderboard/rank/{id}", response_model=LeaderboardEntry, summary="사용자 순위 조회")
+async def read_leaderboard_rank(id: str):
+    user_in_db = get_cached_user(id)
+    if user_in_db is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="사용자를 찾을 수 없습니다.")
+    safe_user_id = sanitize_user_id_for_path(id)
+    return _leaderboard_entry(leaderboard.rank(safe_user_id), safe_user_id)
 
-    for user_id_from_folder in user_id_folders:
-        try:
-            # 폴더명이 실제 사용자 ID라고 가정하고 파일 경로 생성
-            # sanitize_user_id_for_path는 ID에 특수문자가 있을 경우를 대비하지만,
-            # 여기서는 폴더명을 기준으로 하므로 직접 경로를 조합합니다.
-            # 만약 폴더명이 sanitize된 ID라면 get_user_data_file_path(user_id_from_folder) 사용도 가능합니다.
-            user_data_file = os.path.join(DB_DIR, user_id_from_folder, "user_data.json")
-
-            if os.path.exists(user_data_file):
-                async with aiofiles.open(user_data_file, "r", encoding="utf-8") as f:
-                    content = await f.read()
-                    user_data_dict = json.loads(content)
-                
-                # UserResponse 모델에 맞게 데이터 추출 (비밀번호 제외)
-                # UserInDB(**user_data_dict)를 사용하여 Pydantic 검증 후 UserResponse로 변환 가능
-                user_obj = UserInDB(**user_data_dict)
-                all_users_data.append(UserResponse(**user_obj.model_dump()))
-            else:
-                print(f"Warning: user_data.json not found in directory '{user_id_from_folder}'. Skipping.")
-        except json.JSONDecodeError:
-            print(f"Warning: Corrupted user_data.json for user_id directory '{user_id_from_folder}'. Skipping.")
-        except Exception as e: # Pydantic ValidationError 등 포함
-            print(f"Error processing data for user_id directory '{user_id_from_folder}': {e}. Skipping.")
-            
-    return all_users_data
+# --- 비밀번호 해시 통계 ---
+@router.get("/stats/password_hashing", summary="bcrypt 해시/검증 지연 시간 및 대기열 통계")
+async def read_password_hashing_stats():
+    return password_hasher.stats()
+
+# --- /metrics (Prometheus 텍스트 형식) ---
+gauge("auth_users", "메모리에 올라온 사용자 수", fn=lambda: len(user_store))
+gauge("auth_user_store_pending_writes", "아직 저장소에 기록되지 않은 사용자 수", fn=lambda: user_store.pending_writes)
+gauge("auth_sessions_active", "캐시에 있는 세션 토큰 수", fn=lambda: len(sessions))
+_session_lookups = counter("auth_session_cache_lookups", "세션 토큰 캐시 조회 수", ["result"])
+_session_lookups.labels(result="hit").set_function(lambda: sessions.hits)
+_session_lookups.labels(result="miss").set_function(lambda: sessions.misses)
+gauge("password_hash_in_flight", "실행 중이거나 대기 중인 bcrypt 작업 수", fn=lambda: password_hasher.in_flight)
+counter("password_hash_rejected", "대기열이 가득 차 429로 거절한 bcrypt 작업 수", fn=lambda: password_hasher.rejected)
+if invalidation_bus is not None:
+    counter("auth_invalidations_sent", "탐지 서버에 보낸 사용자 무효화 이벤트 수", fn=lambda: invalidation_bus.sent)
+
+
+app.include_router(router)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 # --- Uvicorn main entry point ---
 if __name__ == "__main__":
     import uvicorn
-    print(f"FastAPI Auth 서버를 시작합니다 (데이터 저장 폴더: '{DB_DIR}/<ID>/user_data.json' 구조). http://127.0.0.1:8001/docs 에서 API 문서를 확인하세요.")
+    print(f"FastAPI Auth 서버를 시작합니다 (저장소: {storage.name}, 데이터 폴더: '{DB_DIR}'). http://127.0.0.1:8001/docs 에서 API 문서를 확인하세요.")
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
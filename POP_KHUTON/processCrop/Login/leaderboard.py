@@ -0,0 +1,170 @@
+import math
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SortKey = Tuple[Any, ...]
+
+
+class _End:
+    """어떤 키보다도 큰 값으로 비교되는 리스트 끝 표식."""
+    __slots__ = ()
+
+    def __lt__(self, other): return False
+    def __le__(self, other): return False
+    def __gt__(self, other): return True
+    def __ge__(self, other): return True
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Any, next_nodes: List["_Node"], widths: List[int]):
+        self.key = key
+        self.next = next_nodes
+        self.width = widths  # 각 레벨에서 다음 노드까지 건너뛰는 원소 수
+
+
+_NIL = _Node(_End(), [], [])
+
+
+class IndexableSkipList:
+    """
+    순위(인덱스) 조회가 가능한 스킵 리스트.
+    삽입/삭제/순위 조회는 평균 O(log n), 특정 순위부터 k개 순회는 O(log n + k)입니다.
+    """
+    MAX_LEVELS = 24  # 약 1600만 원소까지 O(log n) 유지
+
+    def __init__(self, seed: Optional[int] = None):
+        self._random = random.Random(seed)
+        self._head = _Node("HEAD", [_NIL] * self.MAX_LEVELS, [1] * self.MAX_LEVELS)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_height(self) -> int:
+        return min(self.MAX_LEVELS, 1 - int(math.log(1.0 - self._random.random(), 2.0)))
+
+    def insert(self, key: SortKey):
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = self._random_height()
+        new_node = _Node(key, [_NIL] * height, [0] * height)
+        steps = 0
+        for level in range(height):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key: SortKey) -> bool:
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is _NIL or target.key != key:
+            return False
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+        return True
+
+    def index(self, key: SortKey) -> Optional[int]:
+        """key의 0-based 순위. 없으면 None."""
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is _NIL or target.key != key:
+            return None
+        return position
+
+    def iter_from(self, start: int) -> Iterator[SortKey]:
+        """0-based 순위 start부터 키를 순서대로 돌려줍니다."""
+        if start < 0 or start >= self._size:
+            return
+        node, remaining = self._head, start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not _NIL:
+            yield node.key
+            node = node.next[0]
+
+
+# --- 레벨/경험치 리더보드 ---
+class Leaderboard:
+    """
+    (level, exp) 내림차순 정렬 인덱스. 동점이면 ID 오름차순으로 순위를 정합니다.
+    사용자 정보가 바뀔 때마다 `update`로 해당 사용자 항목만 옮깁니다.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, SortKey] = {}
+        self._index = IndexableSkipList()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _sort_key(user_id: str, level: int, exp: int) -> SortKey:
+        return (-level, -exp, user_id)
+
+    def rebuild(self, entries: Iterable[Tuple[str, int, int]]):
+        self._keys.clear()
+        self._index = IndexableSkipList()
+        for user_id, level, exp in entries:
+            self.update(user_id, level, exp)
+
+    def update(self, user_id: str, level: int, exp: int):
+        new_key = self._sort_key(user_id, level, exp)
+        old_key = self._keys.get(user_id)
+        if old_key == new_key:
+            return
+        if old_key is not None:
+            self._index.remove(old_key)
+        self._index.insert(new_key)
+        self._keys[user_id] = new_key
+
+    def remove(self, user_id: str):
+        old_key = self._keys.pop(user_id, None)
+        if old_key is not None:
+            self._index.remove(old_key)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1위부터 시작하는 순위. 리더보드에 없으면 None."""
+        key = self._keys.get(user_id)
+        if key is None:
+            return None
+        return self._index.index(key) + 1
+
+    def top(self, k: int, offset: int = 0) -> List[Tuple[int, str, int, int]]:
+        """(순위, ID, 레벨, 경험치) 목록을 offset 다음 순위부터 최대 k개 돌려줍니다."""
+        result = []
+        for i, (neg_level, neg_exp, user_id) in enumerate(self._index.iter_from(offset)):
+            if i >= k:
+                break
+            result.append((offset + i + 1, user_id, -neg_level, -neg_exp))
+        return result
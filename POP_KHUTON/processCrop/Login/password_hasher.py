@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict
+
+import bcrypt
+
+from metrics import histogram
+
+PASSWORD_OP_SECONDS = histogram(
+    "password_hash_seconds", "bcrypt 해시/검증 한 번에 걸린 시간 (대기 포함)", ["kind"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class HasherBusy(Exception):
+    """처리 중/대기 중인 해시 작업이 한도에 도달했을 때 발생합니다. (429로 응답)"""
+
+
+class _LatencyWindow:
+    """최근 작업들의 소요 시간(초)을 보관하고 백분위수를 계산합니다."""
+
+    def __init__(self, size: int = 1024):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(percentile(0.50) * 1000, 2),
+            "p95_ms": round(percentile(0.95) * 1000, 2),
+            "p99_ms": round(percentile(0.99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+def hash_password_sync(password: str, rounds: int) -> str:
+    pwd_bytes = password.encode('utf-8')
+    salt = bcrypt.gensalt(rounds=rounds)
+    hashed_password = bcrypt.hashpw(pwd_bytes, salt)
+    return hashed_password.decode('utf-8')
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    password_byte_enc = plain_password.encode('utf-8')
+    hashed_password_byte_enc = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(password_byte_enc, hashed_password_byte_enc)
+
+
+class PasswordHasher:
+    """
+    bcrypt 해시/검증을 전용 스레드 풀에서 실행합니다. bcrypt는 계산 중 GIL을 놓기 때문에
+    스레드 수만큼 코어를 활용할 수 있고, 이벤트 루프는 그동안 다른 요청을 처리합니다.
+    실행 중 + 대기 중인 작업이 `max_pending`에 도달하면 `HasherBusy`로 즉시 거절합니다.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64, rounds: int = 12):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.rejected = 0
+        self._in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._latency = {"hash": _LatencyWindow(), "verify": _LatencyWindow()}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def _run(self, kind: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusy(f"Too many password operations in progress ({self._in_flight}).")
+        self._in_flight += 1
+        try:
+            start = time.perf_counter()
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            elapsed = time.perf_counter() - start
+            self._latency[kind].record(elapsed)
+            PASSWORD_OP_SECONDS.labels(kind=kind).observe(elapsed)
+            return result
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password_sync, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password_sync, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "rejected": self.rejected,
+            "hash": self._latency["hash"].summary(),
+            "verify": self._latency["verify"].summary(),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
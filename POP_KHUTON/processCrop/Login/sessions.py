@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import heapq
+import hmac
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SessionManager:
+    """
+    로그인 시 발급하는 서명된 세션 토큰과, 토큰 검증 결과를 들고 있는 메모리 캐시.
+
+    토큰은 `base64url(user_id:만료시각:nonce).base64url(HMAC-SHA256)` 형태입니다. 검증은 먼저
+    LRU 캐시(OrderedDict)에서 O(1)로 찾고, 캐시에 없으면 서명과 만료 시각만 확인해 다시 캐시에
+    넣습니다. 어느 경우에도 bcrypt는 다시 계산하지 않습니다.
+
+    로그아웃한 토큰은 서명이 맞고 아직 만료되지 않은 것만 만료 시각까지 기억합니다. 만료된 항목은
+    만료 시각 힙의 앞쪽에서만 꺼내 지우므로 로그아웃 한 번에 전체를 훑지 않습니다.
+    """
+
+    def __init__(self, secret: Optional[str] = None, ttl_seconds: int = 86400, max_entries: int = 10000):
+        if not secret:
+            secret = secrets.token_urlsafe(32)
+            logger.warning("SESSION_SECRET is not set. Using a random secret; sessions will not survive a restart.")
+        self._secret = secret.encode("utf-8")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # token -> (user_id, 만료 시각)
+        self._revoked: Dict[str, float] = {}                                # 로그아웃한 토큰 -> 만료 시각
+        self._revoked_expiry: List[Tuple[float, str]] = []                  # (만료 시각, 토큰) 힙
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def _remember(self, token: str, user_id: str, expires_at: float):
+        self._cache[token] = (user_id, expires_at)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)  # 가장 오래 사용되지 않은 세션부터 제거
+
+    def issue(self, user_id: str) -> Tuple[str, int]:
+        """새 토큰과 유효 시간(초)을 돌려줍니다."""
+        expires_at = int(time.time()) + self.ttl_seconds
+        payload = _b64encode(f"{user_id}:{expires_at}:{secrets.token_hex(8)}".encode("utf-8"))
+        token = f"{payload}.{self._sign(payload)}"
+        self._remember(token, user_id, expires_at)
+        return token, self.ttl_seconds
+
+    def validate(self, token: str) -> Optional[str]:
+        """유효한 토큰이면 사용자 ID를, 아니면 None을 돌려줍니다."""
+        now = time.time()
+        cached = self._cache.get(token)
+        if cached is not None:
+            user_id, expires_at = cached
+            if expires_at <= now:
+                del self._cache[token]
+                return None
+            self._cache.move_to_end(token)
+            self.hits += 1
+            return user_id
+
+        self.misses += 1
+        if token in self._revoked:
+            return None
+        verified = self._verify(token, now)
+        if verified is None:
+            return None
+        self._remember(token, *verified)
+        return verified[0]
+
+    def _verify(self, token: str, now: float) -> Optional[Tuple[str, float]]:
+        """서명과 만료 시각을 확인해 (사용자 ID, 만료 시각)을 돌려줍니다. 형식이 잘못됐거나 만료됐으면 None."""
+        try:
+            payload, signature = token.split(".", 1)
+            # bytes로 비교해야 비 ASCII 문자가 섞인 토큰에서도 TypeError 없이 불일치로 처리됨
+            if not hmac.compare_digest(signature.encode("utf-8"), self._sign(payload).encode("ascii")):
+                return None
+            user_id, expires_at_text, _ = _b64decode(payload).decode("utf-8").rsplit(":", 2)
+            expires_at = float(expires_at_text)
+        except (ValueError, UnicodeError):
+            return None
+        if expires_at <= now:
+            return None
+        return user_id, expires_at
+
+    def revoke(self, token: str) -> bool:
+        """유효하게 발급된 토큰이면 만료 시각까지 폐기 목록에 넣고 True를 돌려줍니다."""
+        now = time.time()
+        self._sweep_revoked(now)
+        cached = self._cache.pop(token, None)
+        if cached is not None and cached[1] > now:
+            expires_at = cached[1]
+        elif token in self._revoked:
+            return True
+        else:
+            verified = self._verify(token, now)
+            if verified is None:
+                return False
+            expires_at = verified[1]
+        self._revoked[token] = expires_at
+        heapq.heappush(self._revoked_expiry, (expires_at, token))
+        return True
+
+    def _sweep_revoked(self, now: float):
+        while self._revoked_expiry and self._revoked_expiry[0][0] <= now:
+            _, token = heapq.heappop(self._revoked_expiry)
+            self._revoked.pop(token, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": len(self._cache), "revoked": len(self._revoked), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,186 @@
+import asyncio
+import bisect
+import json
+import logging
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Sequence, Set, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from storage import STORAGE_OP_SECONDS, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+UserModel = TypeVar("UserModel", bound=BaseModel)
+
+
+class UserStore(Generic[UserModel]):
+    """
+    사용자 정보를 메모리에 들고 있는 저장소 (write-behind).
+
+    서버 시작 시 저장소(StorageBackend)의 사용자를 모두 읽어 메모리에 올리고, 이후 조회는 메모리에서만
+    처리합니다. 정보 변경은 메모리에 즉시 반영되고 ID만 dirty로 표시되며, 백그라운드 태스크가
+    `flush_interval`초마다 모아서 한 번에 저장소에 기록합니다. 종료 시 남은 변경을 모두 기록합니다.
+
+    목록 조회용으로 ID 정렬 인덱스와 공개 필드(`public_fields`)만 직렬화한 JSON 캐시를 함께 유지하며,
+    회원가입/정보 변경 시 해당 사용자 항목만 갱신합니다.
+
+    다른 캐시를 맞춰 주기 위한 콜백은 두 가지입니다. `on_change`는 메모리가 바뀐 즉시(같은 프로세스의
+    캐시용), `on_persisted`는 저장소에 기록된 뒤(저장소를 다시 읽는 다른 프로세스용) 사용자 ID로 호출됩니다.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        model_cls: Type[UserModel],
+        flush_interval: float = 2.0,
+        public_fields: Optional[Sequence[str]] = None,
+    ):
+        self.storage = storage
+        self.model_cls = model_cls
+        self.flush_interval = flush_interval
+        self.public_fields = set(public_fields) if public_fields else None
+        self._users: Dict[str, UserModel] = {}
+        self._sorted_keys: List[str] = []
+        self._public_json: Dict[str, bytes] = {}
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._change_listeners: List[Callable[[str], None]] = []
+        self._persist_listeners: List[Callable[[List[str]], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    @property
+    def pending_writes(self) -> int:
+        """다음 flush 때 저장소에 기록될 사용자 수."""
+        return len(self._dirty)
+
+    def load(self):
+        """저장소의 모든 사용자를 읽어 메모리에 올립니다. 검증에 실패한 데이터는 건너뜁니다."""
+        self._users.clear()
+        for key, data in self.storage.load_all_users().items():
+            try:
+                self._users[key] = self.model_cls(**data)
+            except Exception as e:  # Pydantic ValidationError 등
+                logger.warning("Invalid user data for '%s': %s. Skipping.", key, e)
+        self._sorted_keys = sorted(self._users)
+        self._public_json.clear()
+        logger.info("UserStore loaded %d users from %s storage.", len(self._users), self.storage.name)
+
+    def on_change(self, callback: Callable[[str], None]):
+        self._change_listeners.append(callback)
+
+    def on_persisted(self, callback: Callable[[List[str]], None]):
+        self._persist_listeners.append(callback)
+
+    def _notify_change(self, key: str):
+        for callback in self._change_listeners:
+            try:
+                callback(key)
+            except Exception as e:
+                logger.exception("UserStore change listener failed for '%s': %s", key, e)
+
+    def _notify_persisted(self, keys: List[str]):
+        if not keys:
+            return
+        for callback in self._persist_listeners:
+            try:
+                callback(keys)
+            except Exception as e:
+                logger.exception("UserStore persist listener failed for %d users: %s", len(keys), e)
+
+    def get(self, key: str) -> Optional[UserModel]:
+        return self._users.get(key)
+
+    def all(self) -> Iterable[UserModel]:
+        return self._users.values()
+
+    def items(self) -> Iterable[Tuple[str, UserModel]]:
+        return self._users.items()
+
+    async def exists(self, key: str) -> bool:
+        return key in self._users or await asyncio.to_thread(self.storage.user_exists, key)
+
+    async def create(self, key: str, user: UserModel):
+        """새 사용자는 write-behind를 거치지 않고 바로 저장소에 기록한 뒤 메모리에 올립니다."""
+        await asyncio.to_thread(self._create, key, user.model_dump())
+        self._users[key] = user
+        bisect.insort(self._sorted_keys, key)
+        self._notify_change(key)
+        self._notify_persisted([key])
+
+    def page(self, after: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[str], Optional[str]]:
+        """
+        ID 순으로 `after` 다음부터 최대 `limit`명의 키를 돌려줍니다 (커서 페이지네이션).
+        두 번째 값은 다음 페이지의 커서이며, 마지막 페이지면 None입니다.
+        """
+        start = bisect.bisect_right(self._sorted_keys, after) if after else 0
+        end = len(self._sorted_keys) if limit is None else min(start + limit, len(self._sorted_keys))
+        keys = self._sorted_keys[start:end]
+        next_cursor = keys[-1] if keys and end < len(self._sorted_keys) else None
+        return keys, next_cursor
+
+    def public_json(self, key: str) -> bytes:
+        """공개 필드만 담은 사용자 JSON. 변경이 없으면 캐시된 바이트를 그대로 돌려줍니다."""
+        cached = self._public_json.get(key)
+        if cached is None:
+            data = self._users[key].model_dump(include=self.public_fields)
+            cached = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self._public_json[key] = cached
+        return cached
+
+    def mark_dirty(self, key: str):
+        """메모리의 사용자 객체를 수정한 뒤 호출하면 다음 flush 때 저장소에 기록됩니다."""
+        if key in self._users:
+            self._dirty.add(key)
+            self._public_json.pop(key, None)
+            self._notify_change(key)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            # 직렬화할 스냅샷은 이벤트 루프에서 만들고, 저장소 쓰기만 스레드로 넘김
+            batch: List[Tuple[str, dict]] = [
+                (key, self._users[key].model_dump()) for key in self._dirty if key in self._users
+            ]
+            self._dirty.clear()
+            failed = await asyncio.to_thread(self._write_batch, batch)
+            self._dirty.update(failed)
+            self._notify_persisted([key for key, _ in batch if key not in failed])
+
+    def _create(self, key: str, data: dict):
+        with STORAGE_OP_SECONDS.labels(op="create_user").time():
+            self.storage.create_user(key, data)
+
+    def _write_batch(self, batch: List[Tuple[str, dict]]) -> List[str]:
+        try:
+            with STORAGE_OP_SECONDS.labels(op="save_users").time():
+                self.storage.save_users(batch)
+            return []
+        except Exception as e:
+            logger.error("Error flushing %d users to %s storage: %s", len(batch), self.storage.name, e)
+            return [key for key, _ in batch]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception("Error in user store flush loop: %s", e)
+
+    async def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,52 @@
+"""
+두 서버가 함께 쓰는 로깅 설정. 요청 처리 스레드는 로그 레코드를 큐에 넣기만 하고, 메시지 포맷과
+stdout 쓰기는 QueueListener 스레드가 합니다. 각 모듈은 `logging.getLogger(__name__)`를 씁니다.
+
+LOG_LEVEL 환경 변수로 수준을 정합니다 (기본 INFO).
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Optional
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """기본 QueueHandler는 호출한 스레드에서 메시지를 포맷하므로, 포맷도 리스너 스레드로 미룹니다."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    """루트 로거를 큐 기반 비동기 출력으로 설정합니다. 여러 번 호출해도 한 번만 설정됩니다."""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, output)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """남은 로그를 모두 쓰고 리스너 스레드를 멈춥니다."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,167 @@
+import ast
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from inference import Detections
+from preprocess import LETTERBOX_PAD_VALUE
+from tiling import nms
+
+
+@dataclass
+class ModelSpec:
+    """
+    서빙할 모델 하나. 레지스트리 항목과 같은 필드를 가지며, 워커 프로세스에도 그대로 넘길 수 있습니다.
+    backend는 "pytorch"(ultralytics .pt) 또는 "onnx"(ONNX Runtime CPU)입니다.
+    """
+    version: str
+    backend: str
+    path: str
+    imgsz: int = 640
+    names: Dict[int, str] = field(default_factory=dict)
+    quantization: Optional[str] = None  # 예: "int8"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["names"] = {str(k): v for k, v in self.names.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModelSpec":
+        data = dict(data)
+        data["names"] = {int(k): v for k, v in data.get("names", {}).items()}
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+class InferenceBackend:
+    """추론 백엔드 인터페이스. letterbox된 BGR 배열 목록을 받아 입력 배열 좌표계의 박스를 돌려줍니다."""
+    spec: ModelSpec
+    names: Dict[int, str]
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[Detections]:
+        raise NotImplementedError
+
+    def warm_up(self, batch_sizes: Sequence[int] = (1,)):
+        """
+        letterbox 여백과 같은 회색 imgsz x imgsz 입력으로 배치 크기별 predict를 한 번씩 실행합니다.
+        그래프 초기화, 커널 선택, 버퍼 할당을 첫 실제 요청 대신 여기서 치릅니다.
+        """
+        size = self.spec.imgsz
+        for batch_size in batch_sizes:
+            self.predict_batch([np.full((size, size, 3), LETTERBOX_PAD_VALUE, dtype=np.uint8) for _ in range(batch_size)])
+
+
+class UltralyticsBackend(InferenceBackend):
+    """학습 결과(best.pt)를 ultralytics로 그대로 실행합니다."""
+
+    def __init__(self, spec: ModelSpec, device: Optional[str] = None):
+        from ultralytics import YOLO
+        self.spec = spec
+        self.device = device  # None이면 ultralytics 기본값 (GPU가 있으면 GPU)
+        self.model = YOLO(spec.path)
+        self.names = dict(self.model.names)
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[Detections]:
+        results = self.model.predict(images, imgsz=self.spec.imgsz, device=self.device, verbose=False)
+        return [Detections.from_result(r) for r in results]
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    `export_model.py`로 내보낸 ONNX 모델을 ONNX Runtime CPU로 실행합니다.
+
+    입력은 LetterboxPool이 만든 imgsz x imgsz BGR 배열이라 추가 리사이즈 없이 NCHW float로만 바꾸고,
+    출력 (B, 4 + 클래스 수, 앵커 수)는 ultralytics predict와 같은 기본값(conf 0.25, IoU 0.7, 최대 300개)으로
+    후처리합니다.
+    """
+
+    def __init__(
+        self,
+        spec: ModelSpec,
+        conf_threshold: float = 0.25,
+        iou_threshold: float = 0.7,
+        max_det: int = 300,
+        intra_op_threads: int = 0,
+    ):
+        import onnxruntime as ort
+        self.spec = spec
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(spec.path, sess_options=options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+
+        names = spec.names
+        if not names:
+            # ultralytics export는 클래스 이름을 ONNX 메타데이터에 dict 문자열로 넣어 둠
+            metadata = self.session.get_modelmeta().custom_metadata_map
+            names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        self.names = {int(k): v for k, v in names.items()}
+
+    def _to_input(self, images: List[np.ndarray]) -> np.ndarray:
+        size = self.spec.imgsz
+        for image in images:
+            if image.shape != (size, size, 3):
+                raise ValueError(f"ONNX backend expects {size}x{size}x3 letterboxed input, got {image.shape}.")
+        batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)  # BGR NHWC -> RGB NCHW
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        batch *= 1.0 / 255.0
+        return batch
+
+    def _postprocess(self, output: np.ndarray) -> Detections:
+        preds = output.T  # (앵커 수, 4 + 클래스 수)
+        scores = preds[:, 4:]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(cls)), cls]
+        keep = conf >= self.conf_threshold
+        if not keep.any():
+            return Detections.empty()
+        boxes, conf, cls = preds[keep, :4], conf[keep], cls[keep]
+        if len(conf) > self.max_det * 10:  # NMS 전에 점수 상위 후보만 남겨 greedy NMS 비용을 제한
+            top = np.argsort(-conf)[: self.max_det * 10]
+            boxes, conf, cls = boxes[top], conf[top], cls[top]
+        xyxy = np.empty_like(boxes)
+        xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2
+        xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2
+        xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2
+        xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2
+        detections = nms(
+            Detections(xyxy=xyxy.astype(np.float32), conf=conf.astype(np.float32), cls=cls.astype(np.int32)),
+            threshold=self.iou_threshold,
+            metric="iou",
+        )
+        if len(detections) > self.max_det:
+            detections = Detections(
+                xyxy=detections.xyxy[: self.max_det],
+                conf=detections.conf[: self.max_det],
+                cls=detections.cls[: self.max_det],
+            )
+        return detections
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[Detections]:
+        batch = self._to_input(images)
+        if self.dynamic_batch:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))])
+        return [self._postprocess(output) for output in outputs]
+
+
+def load_backend(spec: ModelSpec, device: Optional[str] = None) -> InferenceBackend:
+    """device는 pytorch 백엔드에만 적용됩니다 (ONNX 백엔드는 항상 CPU)."""
+    if not os.path.exists(spec.path):
+        raise FileNotFoundError(f"Model file for version '{spec.version}' not found at '{spec.path}'.")
+    if spec.backend == "pytorch":
+        return UltralyticsBackend(spec, device=device)
+    if spec.backend == "onnx":
+        return OnnxRuntimeBackend(spec, intra_op_threads=int(os.environ.get("ONNX_INTRA_OP_THREADS", "0")))
+    raise ValueError(f"Unknown model backend '{spec.backend}'.")
@@ -0,0 +1,317 @@
+"""
+탐지 서버(detect.py)와 인증 서버(LoginServer.py)에 동시 부하를 거는 벤치마크. test.py의 순차 전송을 대체합니다.
+
+두 서버를 먼저 띄운 뒤 processCrop 폴더에서 실행:
+    python -m bench.load_bench --scenario detect --concurrency 16 --duration 30
+    python -m bench.load_bench --scenario detect --rate 20 --sse-per-user 2 --output results/detect.json
+    python -m bench.load_bench --scenario auth --concurrency 32 --auth-mix login=1,me=10,update=3,leaderboard=5
+    python -m bench.load_bench --scenario all
+
+- detect: 작업자 `--concurrency`개가 이미지 코퍼스를 돌아가며 /detect/에 올립니다. `--rate`를 주면 초당 그 수만큼
+  예정된 시각에 요청을 시작하며(open loop), 지연 시간은 예정 시각부터 재므로 서버가 밀려도 대기 시간이 빠지지 않습니다.
+- SSE: `--sse-per-user`개의 구독자가 각 사용자의 /detection_stream/을 듣고, /detect/ 요청을 보낸 시각부터 그
+  결과가 이벤트로 도착할 때까지를 publish 지연으로 잽니다. 사용자마다 요청은 한 번에 하나씩만 보내므로
+  n번째 성공 요청과 n번째 이벤트를 짝짓습니다. (SSE_OVERFLOW_POLICY가 이벤트를 합치면 missed로 셉니다.)
+- auth: 벤치마크용 사용자를 등록한 뒤 login / users/me / users/update / leaderboard를 `--auth-mix` 비율로 호출합니다.
+
+결과는 작업별 p50/p95/p99 지연(ms), 처리량, 오류율을 담은 JSON으로 출력합니다.
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import itertools
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".bmp": "image/bmp"}
+
+
+class Recorder:
+    """작업 하나(예: detect, auth.login)의 지연 시간과 상태 코드를 모읍니다."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+
+    def record(self, started: float, status: Optional[int], ok: bool):
+        finished = time.perf_counter()
+        self.first = started if self.first is None else min(self.first, started)
+        self.last = finished if self.last is None else max(self.last, finished)
+        self.statuses[str(status) if status is not None else "exception"] += 1
+        if ok:
+            self.latencies.append(finished - started)
+        else:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        total = len(self.latencies) + self.errors
+        elapsed = (self.last - self.first) if total else 0.0
+        return {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": self.errors / total if total else 0.0,
+            "throughput_rps": len(self.latencies) / elapsed if elapsed > 0 else 0.0,
+            "status_counts": dict(self.statuses),
+            "latency_ms": latency_summary(self.latencies),
+        }
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, Optional[float]]:
+    if not seconds:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ms = np.asarray(seconds) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2), "p99": round(float(p99), 2),
+            "mean": round(float(ms.mean()), 2), "max": round(float(ms.max()), 2)}
+
+
+def load_corpus(dirs: List[str], limit: int) -> List[Tuple[str, bytes, str]]:
+    paths = []
+    for directory in dirs:
+        paths.extend(sorted(p for p in glob.glob(os.path.join(directory, "*")) if p.lower().endswith(IMAGE_EXTENSIONS)))
+    if not paths:
+        raise SystemExit(f"No images found in {dirs}")
+    corpus = []
+    for path in paths[:limit]:
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read(), MIME_TYPES[os.path.splitext(path)[1].lower()]))
+    return corpus
+
+
+class Schedule:
+    """작업자들이 나눠 쓰는 요청 시작 시각. rate가 없으면 바로 시작(closed loop)합니다."""
+
+    def __init__(self, duration: float, max_requests: Optional[int], rate: Optional[float]):
+        self.start = time.perf_counter()
+        self.deadline = self.start + duration
+        self.max_requests = max_requests
+        self.rate = rate
+        self._counter = itertools.count()
+
+    async def next_slot(self) -> Optional[float]:
+        """다음 요청의 예정 시각(perf_counter). 끝났으면 None."""
+        index = next(self._counter)
+        if self.max_requests is not None and index >= self.max_requests:
+            return None
+        if self.rate:
+            scheduled = self.start + index / self.rate
+            if scheduled >= self.deadline:
+                return None
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return scheduled
+        now = time.perf_counter()
+        return now if now < self.deadline else None
+
+
+# --- detect + SSE ---
+async def sse_listener(client: httpx.AsyncClient, url: str, arrivals: List[float], ready: asyncio.Event):
+    """data: 줄(전체 격자 이벤트)이 도착한 시각을 기록합니다."""
+    try:
+        async with client.stream("GET", url, timeout=httpx.Timeout(None, connect=10)) as response:
+            ready.set()
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    arrivals.append(time.perf_counter())
+    except (httpx.HTTPError, asyncio.CancelledError):
+        pass
+    finally:
+        ready.set()
+
+
+async def run_detect(args, corpus: List[Tuple[str, bytes, str]]) -> Dict[str, Any]:
+    users = [f"{args.user_prefix}-{i}" for i in range(max(args.users, args.concurrency if args.sse_per_user else args.users))]
+    recorder = Recorder()
+    sends: Dict[str, List[float]] = {user: [] for user in users}  # 사용자별 성공한 /detect/ 요청의 시작 시각
+    limits = httpx.Limits(max_connections=args.concurrency + len(users) * args.sse_per_user + 8)
+    async with httpx.AsyncClient(base_url=args.detect_url, limits=limits, timeout=args.timeout) as client:
+        listeners = []
+        arrivals: List[Tuple[str, List[float]]] = []
+        for user in users:
+            for _ in range(args.sse_per_user):
+                received: List[float] = []
+                ready = asyncio.Event()
+                arrivals.append((user, received))
+                listeners.append(asyncio.create_task(sse_listener(client, f"/detection_stream/{user}", received, ready)))
+                await ready.wait()
+
+        schedule = Schedule(args.duration, args.requests, args.rate)
+        user_locks = {user: asyncio.Lock() for user in users}
+        rng = random.Random(args.seed)
+
+        async def worker(worker_index: int):
+            for request_index in itertools.count(worker_index, args.concurrency):
+                scheduled = await schedule.next_slot()
+                if scheduled is None:
+                    return
+                user = users[request_index % len(users)]
+                name, contents, mime = corpus[request_index % len(corpus)]
+                if args.unique_images:
+                    contents = contents + rng.randbytes(16)  # 파일 끝 뒤의 바이트는 디코더가 무시하지만 캐시 키는 달라짐
+                data = {"user_id": user, "x_divisions": str(args.grid_x), "y_divisions": str(args.grid_y)}
+                # SSE를 잴 때는 사용자당 요청 하나씩: 이벤트와 요청을 순서대로 짝짓기 위함
+                async with user_locks[user] if args.sse_per_user else contextlib.nullcontext():
+                    started = scheduled if args.rate else time.perf_counter()
+                    try:
+                        response = await client.post("/detect/", data=data, files={"image": (name, contents, mime)})
+                        ok = response.status_code == 200
+                        recorder.record(started, response.status_code, ok)
+                        if ok:
+                            sends[user].append(started)
+                    except httpx.HTTPError:
+                        recorder.record(started, None, False)
+
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        await asyncio.sleep(args.sse_grace)  # 마지막 이벤트가 도착할 시간
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+    result = {"detect": recorder.summary()}
+    if args.sse_per_user:
+        publish_latencies, missed = [], 0
+        for user, received in arrivals:
+            sent = sends[user]
+            publish_latencies.extend(arrival - start for start, arrival in zip(sent, received))
+            missed += max(0, len(sent) - len(received))
+        result["sse_publish"] = {
+            "subscribers": len(arrivals),
+            "events": sum(len(received) for _, received in arrivals),
+            "missed": missed,
+            "latency_ms": latency_summary(publish_latencies),
+        }
+    return result
+
+
+# --- auth ---
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"login", "me", "update", "leaderboard"}
+    if unknown:
+        raise SystemExit(f"Unknown auth operations in --auth-mix: {sorted(unknown)}")
+    return mix
+
+
+async def run_auth(args) -> Dict[str, Any]:
+    mix = parse_mix(args.auth_mix)
+    operations, weights = list(mix), list(mix.values())
+    recorders = {name: Recorder() for name in ["register", "login"] + operations}
+    users = [f"{args.user_prefix}-auth-{i}" for i in range(args.auth_users)]
+    password = "bench-password"
+    limits = httpx.Limits(max_connections=args.concurrency + 8)
+    async with httpx.AsyncClient(base_url=args.auth_url, limits=limits, timeout=args.timeout) as client:
+
+        async def call(name: str, method: str, url: str, ok_statuses=(200,), **kwargs) -> Optional[httpx.Response]:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                recorders[name].record(started, None, False)
+                return None
+            recorders[name].record(started, response.status_code, response.status_code in ok_statuses)
+            return response
+
+        # 이미 등록된 ID(400)도 정상으로 보고, 로그인해서 토큰을 받아 둠
+        tokens: Dict[str, str] = {}
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def prepare(user: str):
+            async with semaphore:
+                await call("register", "POST", "/register/", ok_statuses=(201, 400),
+                           data={"id": user, "password": password, "nickname": user})
+                response = await call("login", "POST", "/login/", data={"id": user, "password": password})
+                if response is not None and response.status_code == 200:
+                    tokens[user] = response.json()["access_token"]
+
+        await asyncio.gather(*(prepare(user) for user in users))
+        if not tokens:
+            raise SystemExit("Could not log in any benchmark user; is the auth server running?")
+        recorders["login"] = Recorder()  # 준비 단계의 로그인은 결과에서 뺌
+
+        schedule = Schedule(args.duration, args.requests, args.rate)
+        rng = random.Random(args.seed)
+
+        async def worker():
+            while True:
+                scheduled = await schedule.next_slot()
+                if scheduled is None:
+                    return
+                user = rng.choice(users)
+                headers = {"Authorization": f"Bearer {tokens[user]}"} if user in tokens else {}
+                operation = rng.choices(operations, weights)[0]
+                if operation == "login":
+                    await call("login", "POST", "/login/", data={"id": user, "password": password})
+                elif operation == "me":
+                    await call("me", "GET", "/users/me/", headers=headers, data={"current_user_id": user})
+                elif operation == "update":
+                    await call("update", "POST", "/users/update/", headers=headers,
+                               data={"id": user, "exp": str(rng.randint(0, 10000))})
+                else:
+                    await call("leaderboard", "GET", "/leaderboard/top", params={"k": 10})
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return {f"auth.{name}": recorder.summary() for name, recorder in recorders.items() if recorder.statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["detect", "auth", "all"], default="detect")
+    parser.add_argument("--detect-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--auth-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시에 요청을 보내는 작업자 수")
+    parser.add_argument("--rate", type=float, default=None, help="초당 요청 수 (생략하면 작업자가 쉬지 않고 보냄)")
+    parser.add_argument("--duration", type=float, default=30.0, help="시나리오당 실행 시간 (초)")
+    parser.add_argument("--requests", type=int, default=None, help="시나리오당 최대 요청 수")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--images", nargs="+", default=["farm_plants_dataset", "box_detection/images/val"])
+    parser.add_argument("--max-images", type=int, default=200)
+    parser.add_argument("--unique-images", action="store_true", help="요청마다 바이트를 달리해 추론 캐시 적중을 막음")
+    parser.add_argument("--grid-x", type=int, default=5)
+    parser.add_argument("--grid-y", type=int, default=4)
+    parser.add_argument("--users", type=int, default=4, help="/detect/에 쓸 사용자 ID 수 (SSE 측정 시 최소 concurrency)")
+    parser.add_argument("--sse-per-user", type=int, default=1, help="사용자당 SSE 구독자 수 (0이면 SSE 측정 안 함)")
+    parser.add_argument("--sse-grace", type=float, default=2.0, help="부하가 끝난 뒤 남은 이벤트를 기다리는 시간 (초)")
+    parser.add_argument("--auth-users", type=int, default=50)
+    parser.add_argument("--auth-mix", default="login=1,me=10,update=3,leaderboard=5")
+    parser.add_argument("--user-prefix", default="bench")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="결과 JSON을 저장할 파일 (생략하면 출력만)")
+    args = parser.parse_args()
+
+    async def run() -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        if args.scenario in ("detect", "all"):
+            corpus = load_corpus(args.images, args.max_images)
+            results.update(await run_detect(args, corpus))
+        if args.scenario in ("auth", "all"):
+            results.update(await run_auth(args))
+        return results
+
+    config = {k: v for k, v in vars(args).items() if k != "output"}
+    report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config, "results": asyncio.run(run())}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+업로드 전처리 마이크로 벤치마크: 기존 PIL 전체 해상도 디코딩 vs. preprocess.LetterboxPool
+
+processCrop 폴더에서 실행:
+    python -m bench.preprocess_bench --repeat 20
+    python -m bench.preprocess_bench --images "Login/db/KHU/스크린샷 2025-05-09 173806.png"
+
+--images를 주지 않으면 4000x3000 JPEG과 2560x1440 PNG를 만들어 사용합니다. 기존 경로의 시간에는
+ultralytics가 predict 안에서 다시 하는 letterbox 리사이즈가 포함되지 않습니다.
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from preprocess import LetterboxPool
+
+
+def make_sample(width: int, height: int, fmt: str) -> bytes:
+    rng = np.random.default_rng(0)
+    # 완전한 잡음은 JPEG/PNG 크기가 비현실적으로 커지므로 부드러운 그라디언트에 약한 잡음을 섞음
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = np.stack([xx * 255 // width, yy * 255 // height, (xx + yy) * 255 // (width + height)], axis=-1)
+    noise = rng.integers(0, 16, (height, width, 3))
+    buf = io.BytesIO()
+    Image.fromarray((base + noise).clip(0, 255).astype(np.uint8)).save(buf, fmt)
+    return buf.getvalue()
+
+
+def decode_full_resolution(contents: bytes) -> np.ndarray:
+    """기존 경로: 전체 해상도로 디코딩한 뒤 BGR 배열로 변환 (letterbox는 ultralytics가 다시 수행)."""
+    pil_image = Image.open(io.BytesIO(contents))
+    return np.ascontiguousarray(np.asarray(pil_image.convert("RGB"))[:, :, ::-1])
+
+
+def time_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3  # 호출당 밀리초
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", nargs="*", default=None)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+
+    if args.images:
+        samples = []
+        for path in args.images:
+            with open(path, "rb") as f:
+                samples.append((os.path.basename(path), f.read()))
+    else:
+        samples = [("4000x3000.jpg", make_sample(4000, 3000, "JPEG")), ("2560x1440.png", make_sample(2560, 1440, "PNG"))]
+
+    pool = LetterboxPool(imgsz=args.imgsz)
+
+    def letterbox(contents: bytes):
+        pool.release(pool.decode(contents))
+
+    print(f"{'image':>24} {'full decode (ms)':>17} {'letterbox (ms)':>15} {'speedup':>8} {'full MB':>8} {'lb MB':>6}")
+    for name, contents in samples:
+        full_mb = decode_full_resolution(contents).nbytes / 1e6
+        lb_mb = pool.decode(contents).image.nbytes / 1e6
+        full_ms = time_call(lambda: decode_full_resolution(contents), args.repeat)
+        lb_ms = time_call(lambda: letterbox(contents), args.repeat)
+        print(f"{name[-24:]:>24} {full_ms:>17.1f} {lb_ms:>15.1f} {full_ms / lb_ms:>7.1f}x {full_mb:>8.1f} {lb_mb:>6.1f}")
+    print(f"letterbox buffers allocated: {pool.allocated}")
+
+
+if __name__ == "__main__":
+    main()
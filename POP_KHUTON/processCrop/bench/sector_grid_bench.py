@@ -0,0 +1,112 @@
+"""
+섹터 배정 마이크로 벤치마크: 기존 박스별 루프 vs. sector_grid.assign_sectors
+
+processCrop 폴더에서 실행:
+    python -m bench.sector_grid_bench --boxes 50 300 1000 --repeat 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from sector_grid import assign_sectors
+
+CLASS_NAMES = dict(enumerate([
+    'v1_cabbage', 'v2_cabbage', 'v3_cabbage', 'v4_cabbage',
+    'v1_eggplant', 'v2_eggplant', 'v3_eggplant', 'v4_eggplant',
+    'v1_tomato', 'v2_tomato', 'v3_tomato', 'v4_tomato',
+]))
+
+try:
+    import torch
+except ImportError:  # torch가 없으면 numpy 배열로 박스별 .item() 비용만 흉내냄
+    torch = None
+
+
+class _Box:
+    """ultralytics Boxes를 한 개씩 순회할 때 얻는 객체와 같은 인터페이스."""
+
+    def __init__(self, xyxy, cls):
+        self.xyxy = xyxy
+        self.cls = cls
+
+
+def make_boxes(n: int, width: int, height: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, width - 20, n)
+    y1 = rng.uniform(0, height - 20, n)
+    w = rng.uniform(5, 80, n)
+    h = rng.uniform(5, 80, n)
+    xyxy = np.stack([x1, y1, np.minimum(x1 + w, width), np.minimum(y1 + h, height)], axis=1).astype(np.float32)
+    cls = rng.integers(0, len(CLASS_NAMES), n).astype(np.float32)
+    return xyxy, cls
+
+
+def as_per_box_objects(xyxy: np.ndarray, cls: np.ndarray):
+    to_tensor = torch.from_numpy if torch is not None else (lambda a: a)
+    t_xyxy, t_cls = to_tensor(xyxy), to_tensor(cls)
+    return [_Box(t_xyxy[i:i + 1], t_cls[i:i + 1]) for i in range(len(cls))]
+
+
+def assign_sectors_loop(boxes, img_width, img_height, x_divisions, y_divisions):
+    """기존 detect.py의 박스별 루프 구현 (비교 기준)."""
+    sector_width = img_width / x_divisions
+    sector_height = img_height / y_divisions
+    grid_results = {f"{row}-{col}": [] for row in range(y_divisions) for col in range(x_divisions)}
+    for box in boxes:
+        cls_id = int(box.cls[0])
+        class_name = CLASS_NAMES[cls_id]
+        _coords_tensor = box.xyxy[0]
+        _x1, _y1, _x2, _y2 = _coords_tensor[0].item(), _coords_tensor[1].item(), _coords_tensor[2].item(), _coords_tensor[3].item()
+        center_x = (_x1 + _x2) / 2
+        center_y = (_y1 + _y2) / 2
+        sector_col = min(int(center_x // sector_width), x_divisions - 1)
+        sector_row = min(int(center_y // sector_height), y_divisions - 1)
+        sector_key = f"{sector_row}-{sector_col}"
+        obj_data = {
+            "sector_row": sector_row,
+            "sector_col": sector_col,
+            "Lv": class_name[:2],
+            "type": class_name[3:]
+        }
+        if sector_key in grid_results:
+            grid_results[sector_key].append(obj_data)
+    return grid_results
+
+
+def time_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6  # 호출당 마이크로초
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--x-divisions", type=int, default=5)
+    parser.add_argument("--y-divisions", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"per-box objects backed by: {'torch' if torch is not None else 'numpy'}")
+    print(f"{'boxes':>7} {'loop (us)':>12} {'vectorized (us)':>16} {'speedup':>8}")
+    for n in args.boxes:
+        xyxy, cls = make_boxes(n, args.width, args.height)
+        per_box = as_per_box_objects(xyxy, cls)
+        grid_args = (args.width, args.height, args.x_divisions, args.y_divisions)
+
+        expected = assign_sectors_loop(per_box, *grid_args)
+        actual = assign_sectors(xyxy, cls.astype(np.int32), CLASS_NAMES, *grid_args)
+        if expected != actual:
+            raise SystemExit(f"Result mismatch for {n} boxes.")
+
+        loop_us = time_call(lambda: assign_sectors_loop(per_box, *grid_args), args.repeat)
+        vec_us = time_call(lambda: assign_sectors(xyxy, cls.astype(np.int32), CLASS_NAMES, *grid_args), args.repeat)
+        print(f"{n:>7} {loop_us:>12.1f} {vec_us:>16.1f} {loop_us / vec_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
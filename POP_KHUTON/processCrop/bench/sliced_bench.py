@@ -0,0 +1,129 @@
+"""
+타일(sliced) 추론 벤치마크: 전체 이미지 한 장 추론 vs. 타일 크기/겹침 조합별 처리량과 recall
+
+processCrop 폴더에서 실행 (학습된 모델과 YOLO 라벨이 있는 이미지 폴더 필요):
+    python -m bench.sliced_bench --images box_detection/images/val --tiles 640 480 320 --overlaps 0.1 0.2
+
+recall은 IoU 0.5 이상이면서 클래스가 같은 예측이 있는 정답 박스의 비율입니다.
+"""
+import argparse
+import glob
+import os
+import time
+from typing import List, Tuple
+
+import numpy as np
+from ultralytics import YOLO
+
+from inference import Detections
+from preprocess import LetterboxPool
+from tiling import SlicedInference, box_overlap
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def label_path_for(image_path: str) -> str:
+    """ultralytics 규칙: .../images/<split>/x.png -> .../labels/<split>/x.txt"""
+    head, name = os.path.split(image_path)
+    parts = head.split(os.sep)
+    if "images" in parts:
+        parts[len(parts) - 1 - parts[::-1].index("images")] = "labels"
+    return os.path.join(os.sep.join(parts), os.path.splitext(name)[0] + ".txt")
+
+
+def load_ground_truth(label_path: str, width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+    """YOLO 형식(cls cx cy w h, 0~1 정규화) 라벨을 픽셀 xyxy로 읽습니다."""
+    if not os.path.exists(label_path):
+        return np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.int32)
+    rows = np.loadtxt(label_path, ndmin=2, dtype=np.float32)
+    if rows.size == 0:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.int32)
+    cls = rows[:, 0].astype(np.int32)
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return xyxy, cls
+
+
+def count_matches(pred: Detections, gt_xyxy: np.ndarray, gt_cls: np.ndarray, iou: float = 0.5) -> int:
+    """정답 박스마다 같은 클래스이면서 IoU가 가장 큰 예측을 한 번씩만 짝지어 찾은 개수."""
+    used = np.zeros(len(pred), dtype=bool)
+    matched = 0
+    for box, c in zip(gt_xyxy, gt_cls):
+        candidates = np.nonzero(~used & (pred.cls == c))[0]
+        if candidates.size == 0:
+            continue
+        overlaps = box_overlap(box, pred.xyxy[candidates], "iou")
+        best = int(np.argmax(overlaps))
+        if overlaps[best] >= iou:
+            used[candidates[best]] = True
+            matched += 1
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="./runs/detect/train/weights/best.pt")
+    parser.add_argument("--images", default="box_detection/images/val")
+    parser.add_argument("--tiles", type=int, nargs="+", default=[640, 480, 320])
+    parser.add_argument("--overlaps", type=float, nargs="+", default=[0.2])
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.images, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise SystemExit(f"No images found in {args.images}")
+    samples = []
+    for path in paths:
+        with open(path, "rb") as f:
+            samples.append((path, f.read()))
+
+    model = YOLO(args.model)
+    pool = LetterboxPool(imgsz=args.imgsz, max_buffers=64)
+
+    def predict(frames) -> List[Detections]:
+        results = model.predict([f.image for f in frames], verbose=False)
+        return [Detections.from_result(r) for r in results]
+
+    def run_whole(contents: bytes) -> Tuple[Detections, int, int, int]:
+        frame = pool.decode(contents)
+        detections = frame.to_original(predict([frame])[0])
+        pool.release(frame)
+        return detections, frame.orig_width, frame.orig_height, 1
+
+    def make_sliced_runner(slicer: SlicedInference, tile_size: int, overlap: float):
+        def run(contents: bytes) -> Tuple[Detections, int, int, int]:
+            prepared = slicer.prepare(contents, tile_size, overlap)
+            detections = slicer.merge(prepared, predict(prepared.frames))
+            slicer.release(prepared)
+            return detections, prepared.orig_width, prepared.orig_height, len(prepared.frames)
+        return run
+
+    configs = [("whole image", run_whole)]
+    slicer = SlicedInference(pool, max_tiles=1024)
+    for tile_size in args.tiles:
+        for overlap in args.overlaps:
+            configs.append((f"tile {tile_size} / {overlap:.2f}", make_sliced_runner(slicer, tile_size, overlap)))
+
+    run_whole(samples[0][1])  # 모델 워밍업
+    print(f"{len(samples)} images from {args.images}")
+    print(f"{'mode':>20} {'img/s':>8} {'ms/img':>8} {'frames':>7} {'recall':>7} {'gt':>5} {'pred':>6}")
+    for name, run in configs:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            matched = total_gt = total_pred = total_frames = 0
+            for path, contents in samples:
+                detections, width, height, n_frames = run(contents)
+                gt_xyxy, gt_cls = load_ground_truth(label_path_for(path), width, height)
+                matched += count_matches(detections, gt_xyxy, gt_cls)
+                total_gt += len(gt_cls)
+                total_pred += len(detections)
+                total_frames += n_frames
+        elapsed = (time.perf_counter() - start) / (args.repeat * len(samples))
+        recall = matched / total_gt if total_gt else 0.0
+        frames = total_frames / len(samples)
+        print(f"{name:>20} {1 / elapsed:>8.2f} {elapsed * 1000:>8.1f} {frames:>7.1f} {recall:>7.3f} {total_gt:>5} {total_pred:>6}")
+
+
+if __name__ == "__main__":
+    main()
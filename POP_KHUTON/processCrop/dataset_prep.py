@@ -0,0 +1,365 @@
+"""
+학습용 데이터셋을 한 번 검증/전처리해 두고 train.py가 매 에폭 재사용하게 합니다.
+
+processCrop 폴더에서 실행:
+    python dataset_prep.py                                   # -> box_detection/prepared/
+    python dataset_prep.py --strict                          # 라벨 오류가 하나라도 있으면 실패
+    python dataset_prep.py --pseudo-label-weights ./runs/detect/train/weights/best.pt
+
+수집 대상 (같은 내용의 파일은 SHA-256으로 한 번만 포함, val에 있는 이미지는 train에서 제외):
+  - box_detection/images/{train,val} + labels/{train,val}/*.txt  (data.yaml의 12개 클래스로 검증)
+  - farm_plants_dataset/<클래스 이름>.{png,jpg}                    (작물 한 개를 자른 사진: 이미지 전체를 박스 하나로)
+  - Login/db/<ID>/*.{png,jpg}                                     (사용자 업로드: 옆에 같은 이름의 .txt 라벨이 있거나
+                                                                   --pseudo-label-weights 모델이 conf 이상으로 탐지한 것만)
+
+결과 폴더 (data.yaml을 train.py --data로 그대로 사용):
+  images/<split>/<hash>.png  긴 변을 imgsz로 줄인 이미지 (라벨 캐시를 만들 때 크기 확인용)
+  images/<split>/<hash>.npy  같은 이미지의 (h, w, 3) uint8 BGR 배열. 학습 중에는 PNG 대신 이것을 읽음
+  labels/<split>/<hash>.txt  검증된 라벨
+  manifest.json, data.yaml
+
+다시 실행하면 이전 결과에 있던 이미지(같은 해시, 같은 imgsz)는 디코딩하지 않고 파일을 그대로 가져옵니다.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+SPLITS = ("train", "val")
+MANIFEST_FILENAME = "manifest.json"
+
+
+@dataclass
+class Sample:
+    source: str                 # 원본 이미지 경로
+    split: str
+    digest: str                 # 원본 파일 SHA-256
+    labels: np.ndarray          # (N, 5) float32: class, x, y, w, h (정규화 좌표)
+    kind: str                   # "labeled" | "crop" | "upload" | "pseudo"
+
+
+@dataclass
+class PrepareReport:
+    images: Dict[str, int] = field(default_factory=dict)
+    duplicates: int = 0
+    reused: int = 0
+    unlabeled_uploads: int = 0
+    label_errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "images": self.images,
+            "duplicates": self.duplicates,
+            "reused": self.reused,
+            "unlabeled_uploads": self.unlabeled_uploads,
+            "label_errors": len(self.label_errors),
+        }
+
+
+def load_class_names(data_yaml: str) -> List[str]:
+    """data.yaml의 names를 읽고 nc와 개수가 맞는지 확인합니다."""
+    with open(data_yaml, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    names = data["names"]
+    if isinstance(names, dict):
+        names = [names[i] for i in sorted(names)]
+    if "nc" in data and int(data["nc"]) != len(names):
+        raise ValueError(f"{data_yaml}: nc={data['nc']} but {len(names)} names are listed.")
+    return list(names)
+
+
+def validate_label_file(path: str, num_classes: int) -> Tuple[np.ndarray, List[str]]:
+    """
+    YOLO 박스 라벨 파일을 읽어 올바른 행만 (N, 5) 배열로 돌려줍니다. 클래스 번호 범위, 좌표 범위(0~1),
+    0 이하의 폭/높이, 열 개수, 중복 행을 검사하며 문제가 있는 행은 빼고 사유를 함께 돌려줍니다.
+    """
+    rows, errors, seen = [], [], set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            where = f"{path}:{line_no}"
+            if len(parts) != 5:
+                errors.append(f"{where}: expected 5 columns (class x y w h), got {len(parts)}")
+                continue
+            try:
+                values = [float(p) for p in parts]
+            except ValueError:
+                errors.append(f"{where}: non-numeric value")
+                continue
+            cls, x, y, w, h = values
+            if not cls.is_integer() or not 0 <= cls < num_classes:
+                errors.append(f"{where}: class {parts[0]} is not in 0..{num_classes - 1}")
+            elif not all(0.0 <= v <= 1.0 for v in (x, y, w, h)) or w <= 0 or h <= 0:
+                errors.append(f"{where}: box {parts[1:]} is outside the normalized range")
+            elif tuple(values) in seen:
+                errors.append(f"{where}: duplicate box")
+            else:
+                seen.add(tuple(values))
+                rows.append(values)
+    return np.array(rows, dtype=np.float32).reshape(-1, 5), errors
+
+
+def check_classes_file(path: str, names: Sequence[str]) -> List[str]:
+    """labeling 도구가 남긴 classes.txt가 비어 있지 않으면 data.yaml의 순서와 같은지 확인합니다."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        listed = [line.strip() for line in f if line.strip()]
+    if listed and listed != list(names):
+        return [f"{path}: class order {listed} does not match data.yaml names {list(names)}"]
+    return []
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _image_paths(folder: str) -> List[str]:
+    return sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def _label_path_for(image_path: str, labels_dir: Optional[str] = None) -> str:
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(labels_dir or os.path.dirname(image_path), stem + ".txt")
+
+
+def collect_samples(
+    dataset_dir: str,
+    crops_dir: str,
+    uploads_dir: str,
+    names: Sequence[str],
+    report: PrepareReport,
+    pseudo_labeler=None,
+) -> List[Sample]:
+    """세 곳의 이미지를 정해진 순서(val -> train -> 작물 사진 -> 업로드, 각 폴더 안은 이름순)로 모읍니다."""
+    samples: List[Sample] = []
+    for split in ("val", "train"):  # val을 먼저 넣어 같은 이미지가 train에 또 들어가지 않게 함
+        labels_dir = os.path.join(dataset_dir, "labels", split)
+        report.label_errors += check_classes_file(os.path.join(labels_dir, "classes.txt"), names)
+        for path in _image_paths(os.path.join(dataset_dir, "images", split)):
+            label_path = _label_path_for(path, labels_dir)
+            if os.path.exists(label_path):
+                labels, errors = validate_label_file(label_path, len(names))
+                report.label_errors += errors
+            else:
+                labels = np.zeros((0, 5), dtype=np.float32)  # 라벨 없는 이미지는 배경 이미지로 학습
+            samples.append(Sample(path, split, file_digest(path), labels, "labeled"))
+
+    class_ids = {name: i for i, name in enumerate(names)}
+    for path in _image_paths(crops_dir):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if stem not in class_ids:
+            report.label_errors.append(f"{path}: file name is not one of the class names")
+            continue
+        labels = np.array([[class_ids[stem], 0.5, 0.5, 1.0, 1.0]], dtype=np.float32)
+        samples.append(Sample(path, "train", file_digest(path), labels, "crop"))
+
+    for path in sorted(glob.glob(os.path.join(uploads_dir, "*", "*"))):
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        label_path = _label_path_for(path)
+        if os.path.exists(label_path):
+            labels, errors = validate_label_file(label_path, len(names))
+            report.label_errors += errors
+            kind = "upload"
+        elif pseudo_labeler is not None:
+            labels, kind = pseudo_labeler(path), "pseudo"
+        else:
+            labels = None
+        if labels is None or len(labels) == 0:
+            report.unlabeled_uploads += 1
+            continue
+        samples.append(Sample(path, "train", file_digest(path), labels, kind))
+    return samples
+
+
+def deduplicate(samples: List[Sample], report: PrepareReport) -> List[Sample]:
+    """같은 해시의 이미지는 처음 나온 것(val 우선)만 남깁니다."""
+    seen, unique = set(), []
+    for sample in samples:
+        if sample.digest in seen:
+            report.duplicates += 1
+            continue
+        seen.add(sample.digest)
+        unique.append(sample)
+    return unique
+
+
+def make_pseudo_labeler(weights: str, conf: float, names: Sequence[str]):
+    """현재 모델이 conf 이상으로 탐지한 박스를 라벨로 쓰는 함수. 클래스 이름이 data.yaml과 다르면 실패합니다."""
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    if [model.names[i] for i in sorted(model.names)] != list(names):
+        raise SystemExit(f"Classes of {weights} do not match data.yaml.")
+
+    def label(path: str) -> np.ndarray:
+        boxes = model.predict(path, conf=conf, verbose=False)[0].boxes
+        if boxes is None or len(boxes) == 0:
+            return np.zeros((0, 5), dtype=np.float32)
+        return np.column_stack([boxes.cls.cpu().numpy(), boxes.xywhn.cpu().numpy()]).astype(np.float32)
+
+    return label
+
+
+def resized_shape(width: int, height: int, imgsz: int) -> Tuple[int, int]:
+    """ultralytics load_image와 같은 규칙: 긴 변을 imgsz로 맞추고 비율은 유지. (width, height)"""
+    r = imgsz / max(width, height)
+    return min(math.ceil(width * r), imgsz), min(math.ceil(height * r), imgsz)
+
+
+def write_resized(source: str, png_path: str, npy_path: str, imgsz: int) -> Tuple[int, int]:
+    """
+    작업 프로세스에서 실행: 이미지를 디코딩해 긴 변 imgsz로 줄인 뒤 PNG와 (h, w, 3) BGR .npy로 씁니다.
+    ultralytics는 이미지 옆에 같은 이름의 .npy가 있으면 디코딩 대신 그 배열을 읽고, 긴 변이 이미 imgsz라
+    다시 리사이즈하지도 않습니다. 돌려주는 값은 (h, w).
+    """
+    with Image.open(source) as img:
+        size = resized_shape(img.width, img.height, imgsz)
+        if img.format == "JPEG":
+            img.draft("RGB", size)
+        rgb = img.convert("RGB")  # 알파 채널은 cv2.imread처럼 버림
+    if rgb.size != size:
+        rgb = rgb.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    rgb.save(png_path, compress_level=1)
+    np.save(npy_path, np.ascontiguousarray(np.asarray(rgb)[:, :, ::-1]))
+    return rgb.height, rgb.width
+
+
+def _previous_outputs(output_dir: str, imgsz: int) -> Dict[str, dict]:
+    """이전 실행 결과의 digest -> manifest 항목. imgsz가 다르면 재사용하지 않음."""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("imgsz") != imgsz:
+        return {}
+    return {
+        entry["digest"]: dict(entry, split=split)
+        for split, entries in manifest["splits"].items()
+        for entry in entries
+    }
+
+
+def _link_or_copy(source: str, target: str):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _write_label_file(path: str, labels: np.ndarray):
+    with open(path, "w", encoding="utf-8") as f:
+        for cls, x, y, w, h in labels.tolist():
+            f.write(f"{int(cls)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n")
+
+
+def prepare(
+    samples: List[Sample],
+    output_dir: str,
+    names: Sequence[str],
+    imgsz: int,
+    workers: int,
+    report: PrepareReport,
+):
+    """
+    샘플을 split별 폴더로 씁니다. 디코딩/리사이즈는 프로세스 풀에서 병렬로 하며, 파일 이름이 내용 해시라
+    실행 순서나 작업 수와 관계없이 같은 입력이면 같은 결과가 나옵니다. 새 결과는 임시 폴더에 만든 뒤 바꿔 넣습니다.
+    """
+    previous = _previous_outputs(output_dir, imgsz)
+    staging_dir = output_dir.rstrip("/\\") + ".tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    manifest = {"imgsz": imgsz, "names": list(names), "splits": {}}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for split in SPLITS:
+            split_samples = [s for s in samples if s.split == split]
+            report.images[split] = len(split_samples)
+            images_dir = os.path.join(staging_dir, "images", split)
+            labels_dir = os.path.join(staging_dir, "labels", split)
+            os.makedirs(images_dir)
+            os.makedirs(labels_dir)
+
+            entries, jobs = [], []
+            for sample in split_samples:
+                name = sample.digest[:16]
+                png_path = os.path.join(images_dir, name + ".png")
+                npy_path = os.path.join(images_dir, name + ".npy")
+                _write_label_file(os.path.join(labels_dir, name + ".txt"), sample.labels)
+                entry = {"name": name, "digest": sample.digest, "shape": None, "source": sample.source, "kind": sample.kind}
+                entries.append(entry)
+                old = previous.get(sample.digest)
+                if old is not None:
+                    old_dir = os.path.join(output_dir, "images", old["split"])
+                    _link_or_copy(os.path.join(old_dir, name + ".png"), png_path)
+                    _link_or_copy(os.path.join(old_dir, name + ".npy"), npy_path)
+                    entry["shape"] = old["shape"]
+                    report.reused += 1
+                else:
+                    jobs.append((entry, executor.submit(write_resized, sample.source, png_path, npy_path, imgsz)))
+            for entry, job in jobs:
+                entry["shape"] = list(job.result())
+            manifest["splits"][split] = entries
+
+    manifest["report"] = report.to_dict()
+    with open(os.path.join(staging_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    with open(os.path.join(staging_dir, "data.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(
+            {"path": os.path.abspath(output_dir), "train": "images/train", "val": "images/val",
+             "nc": len(names), "names": list(names)},
+            f, allow_unicode=True, sort_keys=False,
+        )
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(staging_dir, output_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="./box_detection/data.yaml", help="클래스 이름을 읽을 data.yaml")
+    parser.add_argument("--dataset", default="./box_detection", help="images/, labels/가 있는 라벨링 데이터 폴더")
+    parser.add_argument("--crops", default="./farm_plants_dataset")
+    parser.add_argument("--uploads", default="./Login/db")
+    parser.add_argument("--output", default="./box_detection/prepared")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--strict", action="store_true", help="라벨 오류가 있으면 결과를 쓰지 않고 실패")
+    parser.add_argument("--pseudo-label-weights", default=None, help="라벨 없는 업로드를 이 모델의 탐지 결과로 라벨링")
+    parser.add_argument("--pseudo-label-conf", type=float, default=0.6)
+    args = parser.parse_args()
+
+    names = load_class_names(args.data)
+    report = PrepareReport()
+    pseudo_labeler = None
+    if args.pseudo_label_weights:
+        pseudo_labeler = make_pseudo_labeler(args.pseudo_label_weights, args.pseudo_label_conf, names)
+    samples = collect_samples(args.dataset, args.crops, args.uploads, names, report, pseudo_labeler)
+    for error in report.label_errors:
+        print(f"Label error: {error}")
+    if report.label_errors and args.strict:
+        raise SystemExit(f"{len(report.label_errors)} label errors found; nothing was written.")
+
+    samples = deduplicate(samples, report)
+    prepare(samples, args.output, names, args.imgsz, max(1, args.workers), report)
+    print(f"Prepared dataset in {args.output}: {json.dumps(report.to_dict(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,123 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request, Response
-from fastapi.responses import StreamingResponse
-from ultralytics import YOLO
-from PIL import Image
-import io
+from fastapi import APIRouter, FastAPI, File, UploadFile, Form, HTTPException, Request, Response, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
-from typing import Dict, List, Any, Optional
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
 import asyncio
+import hmac
 import json
+import logging
+import time
+from contextlib import asynccontextmanager
 from pydantic import BaseModel # <<--- 이 줄을 추가합니다.
 
-app = FastAPI()
+from app_logging import setup_logging
+from backends import InferenceBackend, ModelSpec, load_backend
+from detection_writer import DetectionWriter
+from frame_stream import FrameDiffer, FrameReader, FrameStreamError, SectorSmoother, frame_signature
+from inference import Detections, InferenceBatcher, InferenceQueueFull
+from inference_cache import CachedDetections, InferenceCache, model_version_for
+from invalidation import InvalidationBus
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, counter, gauge, histogram
+from model_pool import ModelWorkerPool, PoolSaturated, WorkerCrashed
+from model_registry import ModelRegistry
+from preprocess import LetterboxedImage, LetterboxPool
+from grid_delta import GridDeltaTracker
+from history_store import MAX_STAGE, DetectionHistoryStore, stage_number
+from sector_grid import assign_sectors
+from sse_hub import SSEHub
+from storage import STORAGE_OP_SECONDS, create_storage
+from tiling import SlicedInference
+from user_data_cache import UserDataCache
+
+setup_logging()
+logger = logging.getLogger("detect")
+
+# /detect/ 한 요청이 어느 단계에서 시간을 썼는지 (파일 쓰기는 write-behind라 storage_op_seconds에 따로 기록)
+DETECT_STAGE_SECONDS = histogram("detect_stage_seconds", "/detect/ 처리 단계별 소요 시간", ["stage"])
+STAGE = {
+    name: DETECT_STAGE_SECONDS.labels(stage=name)
+    for name in ("upload_read", "decode", "inference", "grid_assign", "serialize", "persist_enqueue", "sse_enqueue")
+}
+INFERENCE_BATCH_SECONDS = histogram("inference_batch_seconds", "모델 predict 한 번(배치)의 소요 시간 (프로세스 내 추론)")
+INFERENCE_BATCH_SIZE = histogram("inference_batch_size", "predict 한 번에 묶인 이미지 수", buckets=(1, 2, 4, 8, 16, 32, 64))
+FRAME_STREAM_FRAMES = counter("frame_stream_frames", "스트림으로 받은 프레임 수 (처리 결과별)", ["result"])
 
 # --- 모델 로드 ---
-MODEL_PATH = './runs/detect/train/weights/best.pt' # 실제 모델 경로로 수정하세요.
-yolo_model = None
+MODEL_PATH = './runs/detect/train/weights/best.pt' # 레지스트리에 등록된 모델이 없을 때 사용하는 기본 모델
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", "./models")  # export_model.py가 모델을 등록하는 폴더
+MODEL_VERSION = os.environ.get("MODEL_VERSION", "")                    # 비우면 레지스트리의 active 버전
+MODEL_ADMIN_TOKEN = os.environ.get("MODEL_ADMIN_TOKEN", "")            # /models/activate의 X-Admin-Token (비우면 엔드포인트를 쓸 수 없음)
+MODEL_REGISTRY_POLL_SECONDS = float(os.environ.get("MODEL_REGISTRY_POLL_SECONDS", "5"))  # active 버전 변경 확인 주기 (0이면 끔, MODEL_VERSION 지정 시 항상 끔)
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+active_model: Optional[ModelSpec] = None              # 현재 서빙 중인 모델
+inference_backend: Optional[InferenceBackend] = None  # 프로세스 안에서 추론할 때의 백엔드 (hot-swap 시 교체)
 model_load_error = None
-
-# 사용자 ID별 SSE 구독자(Unity 클라이언트) 큐를 저장하는 딕셔너리
-user_specific_subscribers: Dict[str, asyncio.Queue] = {}
-
-try:
+model_state = "loading"  # "loading" | "warming_up" | "ready" | "failed" (lifespan의 백그라운드 태스크가 갱신)
+model_swap_lock = asyncio.Lock()  # 시작 시 로드, /models/activate, 레지스트리 감시가 동시에 모델을 바꾸지 않도록
+MODEL_LOAD_RETRY_SECONDS = float(os.environ.get("MODEL_LOAD_RETRY_SECONDS", "30"))  # 시작 시 로드에 실패하면 이 간격으로 다시 시도 (0이면 안 함)
+
+# --- 추론 배칭 설정 ---
+INFERENCE_MAX_BATCH_SIZE = int(os.environ.get("INFERENCE_MAX_BATCH_SIZE", "8"))   # 한 번의 predict에 묶을 최대 이미지 수
+INFERENCE_MAX_WAIT_MS = float(os.environ.get("INFERENCE_MAX_WAIT_MS", "10"))      # 첫 요청 이후 배치를 모으는 최대 대기 시간
+INFERENCE_MAX_QUEUE_SIZE = int(os.environ.get("INFERENCE_MAX_QUEUE_SIZE", "256")) # 이 이상 쌓이면 503으로 거절
+
+INFERENCE_IMGSZ = int(os.environ.get("INFERENCE_IMGSZ", "640"))                    # 모델 입력 크기 (train.py의 imgsz)
+# 모델을 로드한 뒤 합성 입력으로 미리 실행해 볼 배치 크기들 (비우면 warm-up 생략)
+MODEL_WARMUP_BATCH_SIZES = [int(n) for n in os.environ.get("MODEL_WARMUP_BATCH_SIZES", f"1,{INFERENCE_MAX_BATCH_SIZE}").split(",") if n.strip()]
+
+# --- 타일(sliced) 추론 설정: /detect/에 sliced=true를 보낸 요청에만 적용 ---
+SLICED_TILE_SIZE = int(os.environ.get("SLICED_TILE_SIZE", "640"))             # 원본 이미지 기준 타일 한 변(px)
+SLICED_TILE_OVERLAP = float(os.environ.get("SLICED_TILE_OVERLAP", "0.2"))     # 이웃 타일이 겹치는 비율
+SLICED_MAX_TILES = int(os.environ.get("SLICED_MAX_TILES", "64"))              # 이보다 많은 타일이 필요하면 400
+SLICED_NMS_THRESHOLD = float(os.environ.get("SLICED_NMS_THRESHOLD", "0.5"))   # 타일 간 중복 박스 제거 기준 (IoS)
+
+# --- 프레임 스트림(/detect_stream/, /detect_ws/) 설정 ---
+FRAME_DIFF_THRESHOLD = float(os.environ.get("FRAME_DIFF_THRESHOLD", "2.0"))      # 마지막 추론 프레임과의 평균 밝기 차이가 이 미만이면 추론 생략 (0이면 모두 추론)
+FRAME_MAX_SKIPPED = int(os.environ.get("FRAME_MAX_SKIPPED", "30"))               # 연속으로 건너뛸 수 있는 최대 프레임 수
+FRAME_SMOOTHING_WINDOW = int(os.environ.get("FRAME_SMOOTHING_WINDOW", "5"))      # 섹터 결과를 평활화할 최근 추론 프레임 수 (1이면 평활화 안 함)
+FRAME_STREAM_MAX_BYTES = int(os.environ.get("FRAME_STREAM_MAX_BYTES", str(20 * 1024 * 1024)))  # 프레임 한 장의 최대 크기
+
+# --- 추론 프로세스 풀 설정 (0이면 API 프로세스 안의 배칭 스레드에서 추론) ---
+INFERENCE_PROCESSES = int(os.environ.get("INFERENCE_PROCESSES", "0"))               # 모델을 각각 로드할 워커 프로세스 수
+INFERENCE_WORKER_QUEUE_SIZE = int(os.environ.get("INFERENCE_WORKER_QUEUE_SIZE", "8")) # 워커당 대기 가능한 요청 수
+
+# --- 추론 결과 캐시 설정 ---
+INFERENCE_CACHE_MAX_MB = float(os.environ.get("INFERENCE_CACHE_MAX_MB", "64"))  # 메모리 계층 최대 크기 (0이면 캐시 끔)
+INFERENCE_CACHE_DIR = os.environ.get("INFERENCE_CACHE_DIR", "")                 # 비어 있지 않으면 디스크 계층 사용
+
+# --- SSE 설정 ---
+SSE_QUEUE_SIZE = int(os.environ.get("SSE_QUEUE_SIZE", "16"))                  # 구독자별 대기 이벤트 최대 수
+SSE_REPLAY_SIZE = int(os.environ.get("SSE_REPLAY_SIZE", "32"))                # Last-Event-ID 재전송용 사용자별 보관 이벤트 수
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))  # 이벤트가 없을 때 keepalive 주석 전송 주기
+SSE_OVERFLOW_POLICY = os.environ.get("SSE_OVERFLOW_POLICY", "coalesce")       # "coalesce" | "drop_oldest"
+
+# 사용자 ID별 SSE 구독자(Unity 클라이언트)들에게 이벤트를 나눠 주는 허브
+sse_hub = SSEHub(
+    max_queue_size=SSE_QUEUE_SIZE,
+    replay_size=SSE_REPLAY_SIZE,
+    heartbeat_interval=SSE_HEARTBEAT_SECONDS,
+    overflow=SSE_OVERFLOW_POLICY,
+)
+# ?mode=delta 구독자용: 바뀐 섹터만 보내므로 이벤트를 합치지 않고, 놓친 경우 클라이언트가 버전으로 감지
+delta_sse_hub = SSEHub(
+    max_queue_size=SSE_QUEUE_SIZE,
+    replay_size=SSE_REPLAY_SIZE,
+    heartbeat_interval=SSE_HEARTBEAT_SECONDS,
+    overflow="drop_oldest",
+)
+grid_tracker = GridDeltaTracker()  # 사용자별 마지막 발행 격자와 버전
+
+def resolve_model_spec() -> ModelSpec:
+    """MODEL_VERSION 또는 레지스트리의 active 항목을 고르고, 둘 다 없으면 학습 결과 best.pt를 사용합니다."""
+    if MODEL_VERSION:
+        spec = model_registry.get(MODEL_VERSION)
+        if spec is None:
+            raise KeyError(f"MODEL_VERSION '{MODEL_VERSION}' is not registered in '{model_registry.path}'.")
+        return spec
+    spec = model_registry.active()
+    if spec is not None:
+        return spec
     if not os.path.exists(MODEL_PATH):
         cwd = os.getcwd()
         raise FileNotFoundError(
@@ -28,35 +126,224 @@ try:
             "Please ensure the server is started from the correct project root directory "
             "and the model path is correct."
         )
-    yolo_model = YOLO(MODEL_PATH)
-    print(f"YOLO model loaded successfully from '{MODEL_PATH}' (relative to CWD: {os.getcwd()})")
-except Exception as e:
-    model_load_error = str(e)
-    print(f"Error loading YOLO model: {e}")
-
-async def send_detection_update_to_specific_subscriber(user_id: str, data_json_string: str):
-    """특정 user_id의 SSE 구독자에게 탐지 결과 업데이트를 전송합니다."""
-    if user_id in user_specific_subscribers:
-        queue = user_specific_subscribers[user_id]
+    return ModelSpec(version=model_version_for(MODEL_PATH), backend="pytorch", path=MODEL_PATH, imgsz=INFERENCE_IMGSZ)
+
+
+
+def predict_batch(images: List[Any]) -> List[Detections]:
+    """추론 워커 스레드에서 실행됩니다. 이미지 목록을 한 번의 predict 호출로 처리합니다."""
+    backend = inference_backend  # hot-swap은 참조만 바꾸므로 진행 중인 배치는 이전 모델로 끝남
+    INFERENCE_BATCH_SIZE.observe(len(images))
+    with INFERENCE_BATCH_SECONDS.time():
+        return backend.predict_batch(images)
+
+
+inference_batcher = InferenceBatcher(
+    predict_batch,
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    max_queue_size=INFERENCE_MAX_QUEUE_SIZE,
+)
+
+# 같은 사진이 다시 올라오면(재시도, test.py 반복 업로드 등) 모델을 거치지 않고 박스를 재사용
+inference_cache: Optional[InferenceCache] = None
+if INFERENCE_CACHE_MAX_MB > 0:
+    inference_cache = InferenceCache(
+        model_version_for(MODEL_PATH),  # 모델 로드가 끝나면 서빙 모델 버전으로 바뀜
+        max_bytes=int(INFERENCE_CACHE_MAX_MB * 1024 * 1024),
+        disk_dir=INFERENCE_CACHE_DIR or None,
+    )
+
+model_pool: Optional[ModelWorkerPool] = None  # INFERENCE_PROCESSES > 0이면 시작 시 로드 태스크가 만듦
+
+
+# 업로드를 곧바로 imgsz x imgsz BGR letterbox 배열로 디코딩 (버퍼는 요청 사이에 재사용)
+letterbox_pool = LetterboxPool(imgsz=INFERENCE_IMGSZ, max_buffers=INFERENCE_MAX_BATCH_SIZE * 2)
+sliced_inference = SlicedInference(
+    letterbox_pool,
+    tile_size=SLICED_TILE_SIZE,
+    overlap=SLICED_TILE_OVERLAP,
+    nms_threshold=SLICED_NMS_THRESHOLD,
+    max_tiles=SLICED_MAX_TILES,
+)
+
+
+def get_class_names() -> Dict[int, str]:
+    return model_pool.names if model_pool is not None else inference_backend.names
+
+
+def inference_available() -> bool:
+    if model_state != "ready":
+        return False
+    if model_pool is not None:
+        return model_pool.ready
+    return inference_backend is not None
+
+
+def load_warm_backend(spec: ModelSpec) -> InferenceBackend:
+    """스레드에서 실행: 백엔드를 로드하고 warm-up까지 마친 뒤 돌려줍니다."""
+    global model_state
+    backend = load_backend(spec)
+    if model_state != "ready":
+        model_state = "warming_up"
+    backend.warm_up(MODEL_WARMUP_BATCH_SIZES)
+    return backend
+
+
+async def load_model():
+    """
+    lifespan에서 백그라운드로 실행: 서빙할 모델을 고르고 로드/warm-up한 뒤 추론을 열어 줍니다.
+    그동안 /user_data/, /detection_stream/ 같은 추론이 필요 없는 엔드포인트는 바로 응답하고, /detect/와
+    /readyz는 503을 돌려줍니다. 실패하면 MODEL_LOAD_RETRY_SECONDS마다 다시 시도합니다 (그 사이 파일을
+    고치거나 레지스트리에 새 버전을 등록하면 반영됨).
+    """
+    global active_model, inference_backend, model_pool, model_load_error, model_state
+    while True:
+        started = time.perf_counter()
         try:
-            await queue.put(data_json_string)
+            async with model_swap_lock:
+                model_state = "loading"
+                spec = await asyncio.to_thread(resolve_model_spec)
+                if INFERENCE_PROCESSES > 0:
+                    pool = ModelWorkerPool(
+                        spec,
+                        num_workers=INFERENCE_PROCESSES,
+                        queue_size=INFERENCE_WORKER_QUEUE_SIZE,
+                        max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                        warmup_batch_sizes=MODEL_WARMUP_BATCH_SIZES,
+                    )
+                    await pool.start()
+                    try:
+                        await pool.wait_ready()  # 워커가 각자 로드와 warm-up을 마쳐야 ready
+                    except BaseException:
+                        await pool.stop()
+                        raise
+                    model_pool = pool
+                else:
+                    inference_backend = await asyncio.to_thread(load_warm_backend, spec)
+                    await inference_batcher.start()
+                active_model = spec
+                if inference_cache is not None:
+                    inference_cache.model_version = spec.version
+                model_load_error = None
+                model_state = "ready"
+            logger.info("Model '%s' (%s) loaded and warmed up from '%s' in %.1fs (relative to CWD: %s)", spec.version, spec.backend, spec.path, time.perf_counter() - started, os.getcwd())
+            return
         except Exception as e:
-            print(f"Error sending update to subscriber queue for user_id {user_id}: {e}")
-    else:
-        pass
+            model_load_error = str(e)
+            model_state = "failed"
+            logger.error("Error loading YOLO model: %s", e)
+            if MODEL_LOAD_RETRY_SECONDS <= 0:
+                return
+            await asyncio.sleep(MODEL_LOAD_RETRY_SECONDS)
 
 
-@app.post("/detect/")
-async def detect_objects_save_and_send_to_user(
-    user_id: str = Form(..., description="요청을 보낸 사용자의 고유 ID"),
-    x_divisions: int = Form(..., description="이미지를 가로로 나눌 섹터의 수 (열의 수)"),
-    y_divisions: int = Form(..., description="이미지를 세로로 나눌 섹터의 수 (행의 수)"),
-    image: UploadFile = File(...)
-) -> Dict[str, Any]:
-    global yolo_model, model_load_error
+async def run_inference(image_array: np.ndarray) -> Detections:
+    """letterbox된 BGR 배열 한 장을 추론합니다. 박스는 입력 배열 좌표계입니다."""
+    if model_pool is not None:
+        return await model_pool.submit(image_array)
+    return await inference_batcher.submit(image_array)
+
+
+def inference_capacity() -> int:
+    """지금 한꺼번에 제출해도 거절되지 않는 추론 요청 수 (워커 풀이면 준비된 워커의 대기열 합)."""
+    if model_pool is not None:
+        return model_pool.capacity
+    return INFERENCE_MAX_QUEUE_SIZE
+
+
+async def infer_frames(frames: List[LetterboxedImage]) -> List[Detections]:
+    """
+    letterbox 입력 여러 장을 동시에 제출해 같은 배치로 추론합니다. sliced 모드처럼 장수가 대기열보다 많으면
+    대기열 크기만큼씩 나눠 제출합니다. 추론이 끝난 묶음의 버퍼를 풀에 돌려주며, 실패한 요청이 있으면
+    남은 묶음은 제출하지 않고 첫 번째 예외를 다시 발생시킵니다.
+    """
+    results: List[Detections] = []
+    error: Optional[BaseException] = None
+    chunk_size = max(1, inference_capacity())
+    for start in range(0, len(frames), chunk_size):
+        chunk = frames[start:start + chunk_size]
+        if error is None:
+            chunk_results = await asyncio.gather(*(run_inference(f.image) for f in chunk), return_exceptions=True)
+            error = next((r for r in chunk_results if isinstance(r, BaseException)), None)
+            results.extend(chunk_results)
+        # 취소된 경우에는 여기까지 오지 않으므로, 추론 스레드가 읽고 있을 수 있는 버퍼는 풀에 돌아가지 않음
+        for frame in chunk:
+            letterbox_pool.release(frame)
+    if error is not None:
+        raise error
+    return results
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 모델 로드를 기다리지 않고 바로 요청을 받기 시작함 (준비 상태는 /readyz)
+    background = [asyncio.create_task(load_model())]
+    await detection_writer.start()
+    if invalidation_bus is not None:
+        await invalidation_bus.start()
+    if MODEL_REGISTRY_POLL_SECONDS > 0 and not MODEL_VERSION:
+        background.append(asyncio.create_task(watch_model_registry()))
+    yield
+    for task in background:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    if model_pool is not None:
+        await model_pool.stop()
+    await inference_batcher.stop()
+    await detection_writer.stop()  # 남은 탐지 결과를 모두 기록한 뒤 저장소를 닫음
+    storage.close()
+    if invalidation_bus is not None:
+        invalidation_bus.stop()
+
 
-    if model_load_error or yolo_model is None:
-        raise HTTPException(status_code=500, detail=f"YOLO model not loaded. Error: {model_load_error}")
+# 엔드포인트는 router에 등록하고, 단독 실행용 app과 통합 모드(gateway.py)가 각각 포함함
+router = APIRouter()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+
+def send_detection_update_to_specific_subscriber(user_id: str, data_json_string: str):
+    """특정 user_id의 모든 SSE 구독자에게 탐지 결과 업데이트를 전송합니다. (대기하지 않음)"""
+    try:
+        sse_hub.publish(user_id, data_json_string)
+    except Exception as e:
+        logger.error("Error publishing update for user_id %s: %s", user_id, e)
+
+
+def publish_detection_delta(user_id: str, grid_results: Dict[str, List[Dict[str, Any]]], rows: int, cols: int):
+    """마지막 발행 격자와 비교하여 delta 구독자에게 바뀐 섹터만 보냅니다. 격자 크기가 바뀌면 스냅샷을 보냅니다."""
+    version, changed = grid_tracker.update(user_id, grid_results, rows, cols)
+    if delta_sse_hub.subscriber_count(user_id) == 0:
+        return  # 구독자는 연결 시 스냅샷을 받으므로 지금은 버전만 올려 두면 됨
+    if changed is None:
+        delta_sse_hub.publish(user_id, grid_tracker.snapshot_json(user_id), event_name="snapshot")
+    elif changed:
+        delta_sse_hub.publish(user_id, GridDeltaTracker.delta_json(version, changed), event_name="delta")
+
+
+async def load_detection_results(user_id: str) -> Optional[Dict[str, Any]]:
+    """최신 탐지 결과. 아직 저장소에 기록되지 않은 결과가 있으면 그것을 돌려줍니다."""
+    pending = detection_writer.pending(user_id)
+    if pending is not None:
+        return pending
+    return await asyncio.to_thread(get_detection_results_timed, user_id)
+
+
+def get_detection_results_timed(user_id: str) -> Optional[Dict[str, Any]]:
+    with STORAGE_OP_SECONDS.labels(op="get_detection_results").time():
+        return storage.get_detection_results(user_id)
+
+
+def check_detect_request(user_id: str, x_divisions: int, y_divisions: int):
+    """/detect/와 프레임 스트림 공통: 모델 상태와 격자 파라미터를 확인하고, 문제가 있으면 HTTPException."""
+    if not inference_available():
+        if model_state == "failed":
+            raise HTTPException(status_code=503, detail=f"YOLO model is not available: {model_load_error}")
+        raise HTTPException(status_code=503, detail="YOLO model is still loading, please retry later.")
 
     if not user_id:
         raise HTTPException(status_code=400, detail="Parameter 'user_id' must be provided.")
@@ -65,67 +352,225 @@ async def detect_objects_save_and_send_to_user(
     if y_divisions <= 0:
         raise HTTPException(status_code=400, detail="Parameter 'y_divisions' must be a positive integer.")
 
+
+def publish_detection(user_id: str, grid_results: Dict[str, List[Dict[str, Any]]], x_divisions: int, y_divisions: int):
+    """섹터 격자를 write-behind 저장 단계에 넘기고 full/delta SSE 구독자에게 보냅니다."""
+    with STAGE["serialize"].time():
+        json_for_sse_transmission = json.dumps(grid_results, separators=(',', ':'))
+
+    # 저장은 write-behind 단계가 모아서 스레드에서 기록하므로 응답 지연에 포함되지 않음
+    with STAGE["persist_enqueue"].time():
+        detection_writer.submit(user_id, grid_results)
+        user_data_cache.invalidate(user_id)
+
+    with STAGE["sse_enqueue"].time():
+        send_detection_update_to_specific_subscriber(user_id, json_for_sse_transmission)
+        publish_detection_delta(user_id, grid_results, y_divisions, x_divisions)
+
+
+async def ensure_grid_tracked(user_id: str):
+    """서버 재시작 후 첫 스냅샷 요청이면 저장소의 마지막 탐지 결과로 추적 상태를 채웁니다."""
+    if grid_tracker.has(user_id):
+        return
     try:
-        contents = await image.read()
-        pil_image = Image.open(io.BytesIO(contents))
-        img_width, img_height = pil_image.size
-        if img_width == 0 or img_height == 0:
-            raise HTTPException(status_code=400, detail="Uploaded image has zero width or height.")
+        grid = await load_detection_results(user_id)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid image file or could not read image: {str(e)}")
+        logger.warning("Could not load last detection results for user_id %s: %s", user_id, e)
+        return
+    if grid is not None:
+        grid_tracker.seed(user_id, grid)
 
-    try:
-        results = yolo_model.predict(pil_image, verbose=False)
-        sector_width = img_width / x_divisions
-        sector_height = img_height / y_divisions
-        grid_results: Dict[str, List[Dict[str, Any]]] = {
-            f"{row}-{col}": [] for row in range(y_divisions) for col in range(x_divisions)
-        }
 
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                cls_id = int(box.cls[0])
-                class_name = yolo_model.names[cls_id]
-                _coords_tensor = box.xyxy[0]
-                _x1, _y1, _x2, _y2 = _coords_tensor[0].item(), _coords_tensor[1].item(), _coords_tensor[2].item(), _coords_tensor[3].item()
-                center_x = (_x1 + _x2) / 2
-                center_y = (_y1 + _y2) / 2
-                
-                sector_col = min(int(center_x // sector_width), x_divisions - 1)
-                sector_row = min(int(center_y // sector_height), y_divisions - 1)
-                sector_key = f"{sector_row}-{sector_col}"
-
-                obj_data = {
-                    "sector_row": sector_row,
-                    "sector_col": sector_col,
-                    "Lv": class_name[:2],
-                    "type": class_name[3:] 
-                }
-                if sector_key in grid_results:
-                    grid_results[sector_key].append(obj_data)
-        
-        json_for_file_storage = json.dumps(grid_results, indent=4, ensure_ascii=False)
-        json_for_sse_transmission = json.dumps(grid_results, separators=(',', ':'))
+@router.post("/detect/")
+async def detect_objects_save_and_send_to_user(
+    user_id: str = Form(..., description="요청을 보낸 사용자의 고유 ID"),
+    x_divisions: int = Form(..., description="이미지를 가로로 나눌 섹터의 수 (열의 수)"),
+    y_divisions: int = Form(..., description="이미지를 세로로 나눌 섹터의 수 (행의 수)"),
+    image: UploadFile = File(...),
+    sliced: bool = Form(False, description="큰 이미지를 겹치는 타일로 나눠 추론 (작은/먼 식물용, 느림)"),
+    tile_size: Optional[int] = Form(None, description="sliced 모드의 타일 한 변(px, 원본 기준)"),
+    tile_overlap: Optional[float] = Form(None, description="sliced 모드의 타일 겹침 비율 (0 이상 1 미만)"),
+) -> Dict[str, Any]:
+    check_detect_request(user_id, x_divisions, y_divisions)
+    tile_size = tile_size or SLICED_TILE_SIZE
+    tile_overlap = SLICED_TILE_OVERLAP if tile_overlap is None else tile_overlap
+    if sliced and tile_size < 32:
+        raise HTTPException(status_code=400, detail="Parameter 'tile_size' must be at least 32.")
+    if sliced and not 0.0 <= tile_overlap < 1.0:
+        raise HTTPException(status_code=400, detail="Parameter 'tile_overlap' must be in [0, 1).")
+
+    with STAGE["upload_read"].time():
+        contents = await image.read()
 
-        user_data_dir = os.path.join("./Login/db", user_id) # YOLO 서버 기준 상대 경로
-        os.makedirs(user_data_dir, exist_ok=True)
-        output_filepath = os.path.join(user_data_dir, "detection_results.json") # 탐지 결과 저장 파일명
+    async def decode_and_infer() -> CachedDetections:
+        try:
+            with STAGE["decode"].time():
+                if sliced:
+                    prepared = await asyncio.to_thread(sliced_inference.prepare, contents, tile_size, tile_overlap)
+                    frames = prepared.frames
+                else:
+                    frames = [await asyncio.to_thread(letterbox_pool.decode, contents)]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid image file or could not read image: {str(e)}")
 
-        with open(output_filepath, "w", encoding="utf-8") as f:
-            f.write(json_for_file_storage)
-        print(f"Detection results saved to: {output_filepath}")
+        try:
+            with STAGE["inference"].time():  # 배처/워커 대기열에서 기다린 시간 포함
+                results = await infer_frames(frames)
+        except (InferenceQueueFull, PoolSaturated, WorkerCrashed) as e:
+            raise HTTPException(status_code=503, detail=f"Detection server is busy, please retry later. {e}")
+        except Exception as e:
+            logger.error("Error during inference for user_id %s: %s", user_id, e)
+            raise HTTPException(status_code=500, detail=f"An error occurred during object detection: {str(e)}")
+
+        # 섹터 배정은 원본 이미지 크기 기준이므로 박스를 원본 좌표로 되돌림
+        if sliced:
+            return CachedDetections(sliced_inference.merge(prepared, results), prepared.orig_width, prepared.orig_height)
+        frame = frames[0]
+        return CachedDetections(frame.to_original(results[0]), frame.orig_width, frame.orig_height)
+
+    if inference_cache is not None:
+        variant = f"sliced-{tile_size}-{tile_overlap}" if sliced else ""
+        result = await inference_cache.get_or_compute(inference_cache.key_for(contents, variant), decode_and_infer)
+    else:
+        result = await decode_and_infer()
+
+    try:
+        with STAGE["grid_assign"].time():
+            grid_results = assign_sectors(
+                result.detections.xyxy, result.detections.cls, get_class_names(),
+                result.img_width, result.img_height, x_divisions, y_divisions,
+            )
+        publish_detection(user_id, grid_results, x_divisions, y_divisions)
+        output_filepath = storage.detection_results_location(user_id)
 
-        await send_detection_update_to_specific_subscriber(user_id, json_for_sse_transmission)
-        
         return {"status": "success", "message": f"Detection processed, results saved to '{output_filepath}', and sent to user {user_id} if subscribed."}
 
     except Exception as e:
-        print(f"Error during detection processing for user_id {user_id}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error during detection processing for user_id %s: %s", user_id, e)
         raise HTTPException(status_code=500, detail=f"An error occurred during object detection: {str(e)}")
 
+
+# --- 프레임 스트림: 현장 카메라가 연결 하나로 프레임을 연속 전송 ---
+class FrameStreamSession:
+    """
+    스트림 연결 하나의 처리 상태. 프레임을 도착 순서대로 하나씩 처리합니다.
+
+    1. 축소 이미지로 직전 추론 프레임과 비교해 거의 같은 장면이면 디코딩/추론 없이 건너뜀 (FrameDiffer)
+    2. 추론한 섹터 격자를 최근 몇 프레임과 평활화 (SectorSmoother)
+    3. 평활화 결과가 마지막으로 발행한 격자와 다를 때만 저장/SSE 발행
+
+    여러 연결의 프레임은 /detect/ 요청과 같은 배처(또는 워커 풀)에서 함께 배치로 추론됩니다.
+    """
+
+    def __init__(self, user_id: str, x_divisions: int, y_divisions: int):
+        self.user_id = user_id
+        self.x_divisions = x_divisions
+        self.y_divisions = y_divisions
+        self.differ = FrameDiffer(FRAME_DIFF_THRESHOLD, FRAME_MAX_SKIPPED)
+        self.smoother = SectorSmoother(FRAME_SMOOTHING_WINDOW)
+        self.published: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self.frames = 0
+        self.results: Dict[str, int] = {}
+
+    def _result(self, status: str, **extra: Any) -> Dict[str, Any]:
+        self.results[status] = self.results.get(status, 0) + 1
+        FRAME_STREAM_FRAMES.labels(result=status).inc()
+        return {"frame": self.frames, "status": status, **extra}
+
+    async def process(self, contents: bytes) -> Dict[str, Any]:
+        """
+        프레임 한 장을 처리하고 결과 상태(skipped / unchanged / published / invalid / dropped / error)를 돌려줍니다.
+        예상하지 못한 오류도 그 프레임의 "error"로만 보고하므로 프레임 하나 때문에 스트림이 끊기지 않습니다.
+        """
+        self.frames += 1
+        try:
+            return await self._process(contents)
+        except Exception as e:
+            logger.exception("Error processing frame %d of stream for user_id %s: %s", self.frames, self.user_id, e)
+            self.differ.reset()
+            return self._result("error", detail=str(e))
+
+    async def _process(self, contents: bytes) -> Dict[str, Any]:
+        try:
+            with STAGE["decode"].time():
+                signature = await asyncio.to_thread(frame_signature, contents)
+                if not self.differ.should_infer(signature):
+                    return self._result("skipped")
+                frame = await asyncio.to_thread(letterbox_pool.decode, contents)
+        except ValueError as e:
+            self.differ.reset()
+            return self._result("invalid", detail=str(e))
+
+        try:
+            with STAGE["inference"].time():
+                (detections,) = await infer_frames([frame])
+        except (InferenceQueueFull, PoolSaturated, WorkerCrashed) as e:
+            self.differ.reset()  # 다음 프레임은 비교 없이 추론
+            return self._result("dropped", detail=str(e))
+
+        with STAGE["grid_assign"].time():
+            detections = frame.to_original(detections)
+            grid_results = self.smoother.push(assign_sectors(
+                detections.xyxy, detections.cls, get_class_names(),
+                frame.orig_width, frame.orig_height, self.x_divisions, self.y_divisions,
+            ))
+        if grid_results == self.published:
+            return self._result("unchanged")
+        publish_detection(self.user_id, grid_results, self.x_divisions, self.y_divisions)
+        self.published = grid_results
+        return self._result("published")
+
+    def summary(self) -> Dict[str, Any]:
+        return {"frames": self.frames, **self.results}
+
+
+@router.post("/detect_stream/")
+async def detect_frame_stream(request: Request, user_id: str, x_divisions: int, y_divisions: int):
+    """
+    chunked 업로드 본문으로 프레임을 연속 수신합니다. 본문은 `[4바이트 big-endian 길이][이미지 바이트]`의
+    반복이며, 파라미터는 본문 대신 쿼리 문자열로 받습니다. 스트림이 끝나면 프레임 처리 결과 수를 돌려줍니다.
+    """
+    check_detect_request(user_id, x_divisions, y_divisions)
+    session = FrameStreamSession(user_id, x_divisions, y_divisions)
+    reader = FrameReader(FRAME_STREAM_MAX_BYTES)
+    try:
+        async for chunk in request.stream():
+            for contents in reader.feed(chunk):
+                await session.process(contents)
+        reader.close()
+    except FrameStreamError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid frame stream after {session.frames} frames: {e}")
+    logger.info("Frame stream for user_id %s finished: %s", user_id, session.summary())
+    return {"status": "success", **session.summary()}
+
+
+@router.websocket("/detect_ws/{user_id}")
+async def detect_frame_websocket(websocket: WebSocket, user_id: str, x_divisions: int, y_divisions: int):
+    """바이너리 메시지 하나가 프레임 한 장이며, 프레임마다 처리 결과를 JSON 메시지로 돌려줍니다."""
+    try:
+        check_detect_request(user_id, x_divisions, y_divisions)
+    except HTTPException as e:
+        await websocket.close(code=1013 if e.status_code == 503 else 1008, reason=str(e.detail))
+        return
+    await websocket.accept()
+    session = FrameStreamSession(user_id, x_divisions, y_divisions)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            contents = message.get("bytes")
+            if contents is None:  # 텍스트 메시지는 프레임이 아니므로 1003(unsupported data)으로 닫음
+                logger.info("Frame websocket for user_id %s sent a text message; closing: %s", user_id, session.summary())
+                await websocket.close(code=1003, reason="frames must be sent as binary messages")
+                return
+            await websocket.send_json(await session.process(contents))
+    except WebSocketDisconnect:
+        logger.info("Frame websocket for user_id %s closed: %s", user_id, session.summary())
+    except Exception as e:  # 프레임 처리 밖의 오류는 close 프레임을 보내고 끝냄
+        logger.exception("Frame websocket for user_id %s failed: %s", user_id, e)
+        await websocket.close(code=1011, reason="internal error")
+
 # --- UserDataResponse 모델 정의 (수정됨) ---
 class UserDataResponse(BaseModel):
     id: str
@@ -139,97 +584,372 @@ class UserDataResponse(BaseModel):
 USER_AUTH_DATA_FILENAME = "user_data.json"       # 회원가입 정보 파일명 (auth 서버와 파일명 일치 가정)
 DETECTION_DATA_FILENAME = "detection_results.json" # YOLO 탐지 결과 파일명
 DB_BASE_DIR = "./Login/db"                         # 데이터 기본 경로 (YOLO 서버 기준)
+storage = create_storage(DB_BASE_DIR)              # auth 서버와 같은 STORAGE_BACKEND 설정을 사용해야 함
+
+DETECTION_FLUSH_DELAY_MS = float(os.environ.get("DETECTION_FLUSH_DELAY_MS", "50"))  # 이 시간 동안 들어온 결과를 모아 한 번에 기록
+DETECTION_TIMESERIES = os.environ.get("DETECTION_TIMESERIES", "1") == "1"          # 1이면 db/<ID>/history/에 /history 질의용 열 단위 이력 누적
+history_store = DetectionHistoryStore(DB_BASE_DIR) if DETECTION_TIMESERIES else None
+detection_writer = DetectionWriter(
+    storage,
+    flush_delay=DETECTION_FLUSH_DELAY_MS / 1000.0,
+    history=history_store,
+)
+
+def read_auth_user(user_id: str) -> Optional[Dict[str, Any]]:
+    """auth 서버가 저장소에 기록한 사용자 정보. 통합 모드(gateway.py)에서는 auth 쪽 메모리 UserStore 조회로 바뀝니다."""
+    return storage.get_user(user_id)
 
-@app.post("/user_data/", response_model=UserDataResponse)
+
+auth_user_source = read_auth_user  # load_user_data_body가 인증 정보를 읽는 함수 (스레드에서 호출됨)
+
+
+def load_user_data_body(user_id: str) -> Tuple[Any, Optional[bytes]]:
+    """
+    UserDataCache의 loader. 저장소에서 인증 정보와 탐지 결과를 읽어 직렬화한 응답 본문을 만듭니다.
+    (스레드에서 실행) 버전은 읽기 전에 얻어야 그 사이의 변경을 다음 확인 때 놓치지 않습니다.
+    """
+    started = time.perf_counter()
+    version = storage.data_version(user_id)
+
+    # 1. 사용자 인증 정보(닉네임, 레벨, 경험치 등) 읽기
+    auth_data: Optional[Dict[str, Any]] = None
+    auth_data_found = True
+    try:
+        auth_data = auth_user_source(user_id)
+        auth_data_found = auth_data is not None
+    except json.JSONDecodeError:
+        logger.warning("Error decoding %s for user_id: %s. File might be corrupted.", USER_AUTH_DATA_FILENAME, user_id)
+    except Exception as e:
+        logger.warning("Could not read %s for user_id: %s: %s", USER_AUTH_DATA_FILENAME, user_id, e)
+
+    # 2. 탐지 데이터 읽기 (아직 기록되지 않은 최신 결과가 있으면 그것을 사용)
+    detection_data_content = detection_writer.pending(user_id)
+    if detection_data_content is None:
+        detection_data_content = storage.get_detection_results(user_id)
+
+    STORAGE_OP_SECONDS.labels(op="load_user_data").observe(time.perf_counter() - started)
+    if not auth_data_found and detection_data_content is None:
+        return version, None
+
+    auth_data = auth_data or {}
+    response = UserDataResponse(
+        id=user_id,
+        nickname=auth_data.get("nickname"),
+        level=auth_data.get("level"),
+        exp=auth_data.get("exp"),
+        detection_data=detection_data_content,
+    )
+    return version, response.model_dump_json().encode("utf-8")
+
+
+USER_DATA_CACHE_SIZE = int(os.environ.get("USER_DATA_CACHE_SIZE", "4096"))                 # 보관할 사용자 수 (0이면 캐시 끔)
+INVALIDATION_LISTEN = os.environ.get("INVALIDATION_LISTEN", "")  # 예: 127.0.0.1:8101. auth 서버(INVALIDATION_PEERS)가 보내는 사용자 무효화 이벤트를 받을 주소
+# auth 서버의 변경을 저장소에서 확인하는 최소 간격. 무효화 이벤트를 받으면 유실 대비로만 확인하므로 길게 둠
+USER_DATA_CACHE_VALIDATE_MS = float(os.environ.get("USER_DATA_CACHE_VALIDATE_MS", "30000" if INVALIDATION_LISTEN else "1000"))
+user_data_cache = UserDataCache(
+    load_user_data_body,
+    storage.data_version,
+    max_entries=USER_DATA_CACHE_SIZE,
+    validate_interval=USER_DATA_CACHE_VALIDATE_MS / 1000.0,
+)
+invalidation_bus = InvalidationBus.from_config(listen=INVALIDATION_LISTEN)
+if invalidation_bus is not None:
+    invalidation_bus.subscribe(user_data_cache.invalidate)
+
+
+@router.post("/user_data/", response_model=UserDataResponse)
 async def get_user_data_and_respond(user_id: str = Form(...)):
     """
     지정된 사용자 ID에 대해 저장된 인증 정보(닉네임, 레벨, 경험치)와 탐지 데이터를 조회하여
     HTTP 응답으로 반환합니다. SSE 재전송은 하지 않습니다.
+    직렬화된 응답은 캐시되며, /detect/ 저장 시 또는 파일(행)이 바뀌면 다시 읽습니다.
     """
     if not user_id:
         raise HTTPException(status_code=400, detail="Parameter 'user_id' must be provided.")
 
-    user_auth_data_path = os.path.join(DB_BASE_DIR, user_id, USER_AUTH_DATA_FILENAME)
-    detection_data_path = os.path.join(DB_BASE_DIR, user_id, DETECTION_DATA_FILENAME)
-
-    nickname_from_file: Optional[str] = None
-    level_from_file: Optional[int] = None
-    exp_from_file: Optional[int] = None # 경험치 변수 추가
-    detection_data_content: Optional[Dict[str, Any]] = None
+    try:
+        body = await user_data_cache.get(user_id)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=500, detail=f"Error decoding {DETECTION_DATA_FILENAME} for user_id: {user_id}. File might be corrupted.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading {DETECTION_DATA_FILENAME} for user_id: {user_id}: {e}")
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"No data or user information found for user_id: {user_id}")
+    return Response(content=body, media_type="application/json")
+
+# --- /user_data_cache/stats 엔드포인트 ---
+@router.get("/user_data_cache/stats")
+async def user_data_cache_stats():
+    """/user_data/ 응답 캐시의 항목 수와 적중/재확인/미스 횟수를 반환합니다."""
+    return user_data_cache.stats()
+
+# --- /healthz, /readyz 엔드포인트 (로드 밸런서/오케스트레이터용) ---
+@router.get("/healthz")
+async def healthz():
+    """프로세스가 요청을 처리할 수 있으면 항상 200. 모델 상태는 참고용으로만 포함합니다."""
+    return {"status": "ok", "model_state": model_state}
+
+
+@router.get("/readyz")
+async def readyz():
+    """모델 로드와 warm-up이 끝나 /detect/를 처리할 수 있을 때만 200, 아니면 503."""
+    body = {
+        "status": "ready" if inference_available() else "not_ready",
+        "model_state": model_state,
+        "model_version": active_model.version if active_model is not None else None,
+    }
+    if model_load_error:
+        body["error"] = model_load_error
+    return JSONResponse(body, status_code=200 if body["status"] == "ready" else 503)
+
+# --- /inference_pool/health 엔드포인트 ---
+@router.get("/inference_pool/health")
+async def inference_pool_health():
+    """추론 워커 프로세스 풀의 상태(생존 여부, 대기 요청 수, 재시작 횟수)를 반환합니다."""
+    if model_pool is None:
+        return {
+            "mode": "in_process",
+            "ready": inference_backend is not None,
+            "model_version": active_model.version if active_model is not None else None,
+            "queue_depth": inference_batcher.queue_depth,
+        }
+    return {"mode": "process_pool", **model_pool.status()}
 
-    # 1. 사용자 인증 정보 파일(닉네임, 레벨, 경험치 등) 읽기
-    if os.path.exists(user_auth_data_path):
+# --- /models 엔드포인트 (모델 레지스트리 조회 / hot-swap) ---
+async def switch_model_locked(spec: ModelSpec) -> Optional[str]:
+    """
+    새 모델을 모두 로드한 뒤에 서빙 모델을 바꾸고 이전 버전을 돌려줍니다. model_swap_lock을 잡은 채 호출해야 합니다.
+    프로세스 안 추론은 다음 배치부터 새 백엔드를 쓰고, 워커 풀은 새 워커가 준비된 뒤 이전 워커를 비우므로
+    교체 중에 들어온 요청도 이전 모델로 끝까지 처리됩니다. 로드에 실패하면 예외가 나고 이전 모델이 유지됩니다.
+    """
+    global active_model, inference_backend, model_load_error, model_state
+    if model_pool is not None:
+        await model_pool.swap_model(spec)
+    else:
+        inference_backend = await asyncio.to_thread(load_warm_backend, spec)
+        await inference_batcher.start()  # 시작할 때 모델이 없었던 경우 (이미 돌고 있으면 아무것도 안 함)
+    model_load_error = None
+    model_state = "ready"
+    previous = active_model.version if active_model is not None else None
+    active_model = spec
+    if inference_cache is not None:
+        inference_cache.model_version = spec.version  # 이전 모델의 결과는 키가 달라 더 이상 적중하지 않음
+    logger.info("Switched serving model from '%s' to '%s' (%s).", previous, spec.version, spec.backend)
+    return previous
+
+
+async def watch_model_registry():
+    """
+    retrain.py 등이 레지스트리의 active 버전을 바꾸면 백그라운드에서 그 모델로 교체합니다.
+    registry.json은 원자적으로 교체되므로 읽는 도중에 반쯤 쓰인 파일을 보지 않습니다. 로드에 실패한 버전은
+    active가 다른 버전으로 바뀔 때까지 다시 시도하지 않습니다.
+    """
+    failed_version = None
+    while True:
+        await asyncio.sleep(MODEL_REGISTRY_POLL_SECONDS)
         try:
-            with open(user_auth_data_path, "r", encoding="utf-8") as f:
-                auth_data = json.load(f)
-            nickname_from_file = auth_data.get("nickname")
-            level_from_file = auth_data.get("level")
-            exp_from_file = auth_data.get("exp") # 경험치 읽어오기
-        except json.JSONDecodeError:
-            print(f"Warning: Error decoding {USER_AUTH_DATA_FILENAME} for user_id: {user_id}. File might be corrupted.")
+            async with model_swap_lock:  # /models/activate와 순서가 섞여 이전 버전으로 되돌리지 않도록 잠금 안에서 확인
+                if model_state != "ready":
+                    continue  # 시작 시 로드가 아직 진행 중이거나 재시도 중 (재시도할 때 active 버전을 다시 읽음)
+                version = await asyncio.to_thread(model_registry.active_version)
+                if not version or version == failed_version or (active_model is not None and version == active_model.version):
+                    continue
+                spec = await asyncio.to_thread(model_registry.get, version)
+                if spec is None:
+                    continue
+                logger.info("Registry active version changed to '%s'; loading it in the background.", version)
+                try:
+                    await switch_model_locked(spec)
+                    failed_version = None
+                except Exception as e:
+                    failed_version = version
+                    logger.error("Could not load registry active version '%s'; keeping '%s': %s", version, active_model.version if active_model else None, e)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"Warning: Could not read {USER_AUTH_DATA_FILENAME} for user_id: {user_id}: {e}")
-    else:
-        print(f"Info: {USER_AUTH_DATA_FILENAME} not found for user_id: {user_id}")
-
-    # 2. 탐지 데이터 파일 읽기
-    if os.path.exists(detection_data_path):
+            logger.warning("Could not check model registry: %s", e)
+
+@router.get("/models")
+async def list_models():
+    """레지스트리에 등록된 모델과 현재 서빙 중인 모델을 반환합니다."""
+    registered = await asyncio.to_thread(model_registry.list)
+    return {
+        "serving": active_model.to_dict() if active_model is not None else None,
+        "registry_active": await asyncio.to_thread(model_registry.active_version),
+        "registered": {version: spec.to_dict() for version, spec in registered.items()},
+    }
+
+@router.post("/models/activate")
+async def activate_model(
+    version: str = Form(..., description="레지스트리에 등록된 모델 버전"),
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+):
+    """서버 재시작 없이 등록된 다른 모델 버전으로 교체합니다. 새 모델 로드가 끝난 뒤에 요청이 넘어갑니다."""
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model activation is disabled. Set MODEL_ADMIN_TOKEN to enable it.")
+    if not admin_token or not hmac.compare_digest(admin_token.encode("utf-8"), MODEL_ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    spec = await asyncio.to_thread(model_registry.get, version)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Model version '{version}' is not registered.")
+
+    async with model_swap_lock:
         try:
-            with open(detection_data_path, "r", encoding="utf-8") as f:
-                detection_data_content = json.load(f)
-        except json.JSONDecodeError:
-            raise HTTPException(status_code=500, detail=f"Error decoding {DETECTION_DATA_FILENAME} for user_id: {user_id}. File might be corrupted.")
+            previous = await switch_model_locked(spec)
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error reading {DETECTION_DATA_FILENAME} for user_id: {user_id}: {e}")
-    else:
-        print(f"Info: {DETECTION_DATA_FILENAME} not found for user_id: {user_id}")
-
-    if not os.path.exists(user_auth_data_path) and not os.path.exists(detection_data_path):
-        raise HTTPException(status_code=404, detail=f"No data or user information found for user_id: {user_id}")
-
-    return UserDataResponse(
-        id=user_id,
-        nickname=nickname_from_file,
-        level=level_from_file,
-        exp=exp_from_file, # 응답에 경험치 포함
-        detection_data=detection_data_content
-    )
+            logger.error("Error activating model version '%s': %s", version, e)
+            raise HTTPException(status_code=500, detail=f"Could not load model version '{version}': {e}")
+        await asyncio.to_thread(model_registry.set_active, version)
+
+    return {"status": "success", "previous": previous, "active": spec.to_dict()}
+
+# --- /inference_cache/stats 엔드포인트 ---
+@router.get("/inference_cache/stats")
+async def inference_cache_stats():
+    """추론 결과 캐시의 크기와 적중/미스 횟수를 반환합니다."""
+    if inference_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **inference_cache.stats()}
+
+# --- /detection_writer/stats 엔드포인트 ---
+@router.get("/detection_writer/stats")
+async def detection_writer_stats():
+    """탐지 결과 write-behind 단계의 대기/기록/합쳐진 건수를 반환합니다."""
+    return detection_writer.stats()
+
+# --- /history/{user_id} 엔드포인트 ---
+def require_history_store() -> DetectionHistoryStore:
+    if history_store is None:
+        raise HTTPException(status_code=404, detail="Detection history is disabled (DETECTION_TIMESERIES=0).")
+    return history_store
+
+
+@router.get("/history/{user_id}")
+async def history_summary(user_id: str):
+    """쌓인 스냅샷 수와 기간, 관측된 작물 종류를 반환합니다."""
+    store = require_history_store()
+    return await asyncio.to_thread(store.summary, user_id)
+
+
+@router.get("/history/{user_id}/stage_counts")
+async def history_stage_counts(user_id: str, days: float = 7, crop: Optional[str] = None):
+    """최근 days일 동안 섹터별 생육 단계(v1~v4) 관측 횟수. crop으로 작물을 한정할 수 있습니다."""
+    store = require_history_store()
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="Parameter 'days' must be positive.")
+    return await asyncio.to_thread(store.stage_counts, user_id, days, crop)
+
+
+@router.get("/history/{user_id}/stage_reached")
+async def history_stage_reached(user_id: str, stage: str = f"v{MAX_STAGE}", sector: Optional[str] = None):
+    """섹터별로 stage 단계(기본 v4)가 처음 관측된 시각과 그 뒤 지난 시간(초)."""
+    store = require_history_store()
+    try:
+        stage_value = stage_number(stage)
+    except ValueError:
+        stage_value = 0
+    if not stage.startswith("v") or not 1 <= stage_value <= MAX_STAGE:
+        raise HTTPException(status_code=400, detail=f"Parameter 'stage' must be one of v1..v{MAX_STAGE}.")
+    return await asyncio.to_thread(store.stage_reached, user_id, stage_value, sector)
+
+# --- /detection_snapshot/{user_id} 엔드포인트 ---
+@router.get("/detection_snapshot/{user_id}")
+async def detection_snapshot_for_user(user_id: str):
+    """delta 구독자가 버전 공백을 감지했을 때 다시 받는 전체 스냅샷 (SSE snapshot 이벤트와 같은 형식)."""
+    await ensure_grid_tracked(user_id)
+    return Response(content=grid_tracker.snapshot_json(user_id), media_type="application/json")
 
 # --- /detection_stream/{user_id} 엔드포인트 ---
-@app.get("/detection_stream/{user_id}")
-async def detection_event_stream_for_user(user_id: str, request: Request):
+@router.get("/detection_stream/{user_id}")
+async def detection_event_stream_for_user(
+    user_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    mode: str = "full",
+):
+    """
+    mode=full (기본, 기존 Unity 클라이언트): 탐지 때마다 전체 격자를 data로 보냅니다.
+    mode=delta: 연결 직후 `event: snapshot`, 이후 바뀐 섹터만 `event: delta`로 보냅니다.
+    """
     if not user_id:
         raise HTTPException(status_code=400, detail="User ID must be provided in the path.")
-
-    client_queue = asyncio.Queue()
-    user_specific_subscribers[user_id] = client_queue
-    print(f"New SSE client connected for user_id: {user_id}. Client: {request.client}. Total specific subscribers: {len(user_specific_subscribers)}")
+    if mode not in ("full", "delta"):
+        raise HTTPException(status_code=400, detail="Parameter 'mode' must be 'full' or 'delta'.")
+
+    if mode == "delta":
+        # 먼저 구독한 뒤 스냅샷을 넣어야 그 사이에 발행된 변경분을 놓치지 않음
+        hub = delta_sse_hub
+        subscriber = hub.subscribe(user_id)
+        await ensure_grid_tracked(user_id)
+        hub.send(subscriber, grid_tracker.snapshot_json(user_id), event_name="snapshot")
+    else:
+        # 재연결한 클라이언트는 Last-Event-ID 헤더(또는 ?last_event_id=)로 놓친 이벤트를 다시 받음
+        hub = sse_hub
+        last_event_id = last_event_id or request.query_params.get("last_event_id")
+        subscriber = hub.subscribe(user_id, last_event_id=last_event_id)
+    logger.info("New SSE client connected for user_id: %s. Client: %s. Subscribers for this user: %d", user_id, request.client, hub.subscriber_count(user_id))
 
     async def event_generator():
-        processed_events_count = 0
         try:
-            while True:
-                if await request.is_disconnected():
-                    print(f"SSE client for user_id {user_id} ({request.client}) disconnected. Processed {processed_events_count} events for this client.")
-                    break
-                
-                message = await client_queue.get()
-                if message is None: 
-                    print(f"Received None, breaking event generator for user_id {user_id} ({request.client}). Processed {processed_events_count} events.")
-                    break
-                
-                yield f"data: {message}\n\n"
-                processed_events_count += 1
+            async for frame in hub.event_stream(subscriber, request):
+                yield frame
         except asyncio.CancelledError:
-            print(f"SSE client for user_id {user_id} ({request.client}) connection cancelled. Processed {processed_events_count} events.")
-        except Exception as e:
-            print(f"Exception in event_generator for user_id {user_id} ({request.client}): {e}. Processed {processed_events_count} events.")
+            logger.info("SSE client for user_id %s (%s) connection cancelled.", user_id, request.client)
+            raise
         finally:
-            if user_id in user_specific_subscribers and user_specific_subscribers[user_id] == client_queue:
-                del user_specific_subscribers[user_id]
-            print(f"SSE client for user_id {user_id} ({request.client}) cleanup. Total specific subscribers: {len(user_specific_subscribers)}. This client processed {processed_events_count} events.")
+            logger.info("SSE client for user_id %s (%s) cleanup. Sent %d events, dropped %d. Total subscribers: %d", user_id, request.client, subscriber.sent, subscriber.dropped, hub.subscriber_count())
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- /metrics 엔드포인트 (Prometheus 텍스트 형식) ---
+def _register_runtime_metrics():
+    """다른 객체가 이미 세고 있는 값들을 스크레이프 시점에 읽는 게이지/카운터로 등록합니다."""
+    subscribers = gauge("sse_subscribers", "연결된 SSE 구독자 수", ["stream"])
+    queued = gauge("sse_queued_events", "구독자 대기열에 쌓인 이벤트 수", ["stream"])
+    published = counter("sse_published_events", "발행한 SSE 이벤트 수", ["stream"])
+    for stream, hub in (("full", sse_hub), ("delta", delta_sse_hub)):
+        subscribers.labels(stream=stream).set_function(hub.subscriber_count)
+        queued.labels(stream=stream).set_function(lambda hub=hub: hub.stats()["queued"])
+        published.labels(stream=stream).set_function(lambda hub=hub: hub.published)
+
+    def inference_queue_depth() -> int:
+        if model_pool is not None:
+            return sum(worker["pending"] for worker in model_pool.status()["workers"])
+        return inference_batcher.queue_depth
+    gauge("inference_queue_depth", "추론을 기다리는 이미지 수", fn=inference_queue_depth)
+    gauge("model_ready", "모델 로드와 warm-up이 끝나 추론할 수 있으면 1", fn=lambda: 1 if inference_available() else 0)
+
+    if inference_cache is not None:
+        lookups = counter("inference_cache_lookups", "추론 결과 캐시 조회 결과별 횟수", ["result"])
+        for result in ("hits", "disk_hits", "misses", "coalesced"):
+            lookups.labels(result=result).set_function(lambda result=result: getattr(inference_cache, result))
+        gauge("inference_cache_bytes", "추론 결과 캐시 메모리 계층 크기", fn=lambda: inference_cache.current_bytes)
+
+    lookups = counter("user_data_cache_lookups", "/user_data/ 응답 캐시 조회 결과별 횟수", ["result"])
+    for result in ("hits", "revalidated", "misses", "coalesced"):
+        lookups.labels(result=result).set_function(lambda result=result: getattr(user_data_cache, result))
+    if invalidation_bus is not None:
+        counter("user_data_invalidations_received", "auth 서버에서 받은 사용자 무효화 이벤트 수", fn=lambda: invalidation_bus.received)
+
+    gauge("detection_writer_pending_users", "아직 저장소에 기록되지 않은 탐지 결과 수", fn=lambda: detection_writer.pending_users)
+    counter("detection_writer_submitted", "write-behind 단계에 들어온 탐지 결과 수", fn=lambda: detection_writer.submitted)
+    counter("detection_writer_written", "저장소에 기록한 탐지 결과 수 (합쳐진 결과 제외)", fn=lambda: detection_writer.written)
+
+
+_register_runtime_metrics()
+
+
+app.include_router(router)
+
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -238,6 +958,6 @@ if __name__ == "__main__":
     # 이 경로는 회원가입/로그인 서버의 DB_DIR과 일치하거나, 접근 가능해야 합니다.
     if not os.path.exists(DB_BASE_DIR):
         os.makedirs(DB_BASE_DIR, exist_ok=True)
-        print(f"Created base directory {DB_BASE_DIR}")
+        logger.info("Created base directory %s", DB_BASE_DIR)
         
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from history_store import DetectionHistoryStore, HistoryRecord
+from storage import STORAGE_OP_SECONDS, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+Grid = Dict[str, List[Dict[str, Any]]]
+
+
+class DetectionWriter:
+    """
+    탐지 결과 저장을 요청 처리 경로에서 분리하는 write-behind 단계.
+
+    `submit`은 메모리에 최신 격자를 두고 바로 돌아오며, 백그라운드 태스크가 `flush_delay`초 동안 들어온
+    결과를 모아 스레드에서 한 번에 기록합니다. 같은 사용자의 결과가 연달아 오면 최신 것 하나만
+    저장소에 쓰고(합치기), 이력 저장소(DetectionHistoryStore)가 있으면 모든 결과를 이력에 이어 붙입니다.
+    아직 기록되지 않은 결과는 `pending`으로 조회할 수 있어 읽는 쪽이 이전 값을 보지 않습니다.
+    """
+
+    def __init__(self, storage: StorageBackend, flush_delay: float = 0.05, history: Optional[DetectionHistoryStore] = None):
+        self.storage = storage
+        self.flush_delay = flush_delay
+        self.history = history
+        self._latest: Dict[str, Grid] = {}
+        self._writing: Dict[str, Grid] = {}  # 지금 스레드에서 기록 중인 격자
+        self._history_pending: Dict[str, List[HistoryRecord]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.submitted = 0
+        self.written = 0
+        self.failures = 0
+
+    def submit(self, user_id: str, grid: Grid, timestamp: Optional[float] = None):
+        self._latest[user_id] = grid
+        if self.history is not None:
+            self._history_pending.setdefault(user_id, []).append((timestamp or time.time(), grid))
+        self.submitted += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def pending_users(self) -> int:
+        return len(self._latest)
+
+    def pending(self, user_id: str) -> Optional[Grid]:
+        """아직 저장소에 기록되지 않은 최신 격자. 없으면 None."""
+        grid = self._latest.get(user_id)
+        return grid if grid is not None else self._writing.get(user_id)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._latest and not self._history_pending:
+                return
+            latest, self._latest = self._latest, {}
+            history, self._history_pending = self._history_pending, {}
+            self._writing = latest
+            try:
+                failed_latest, failed_history = await asyncio.to_thread(self._write_batch, latest, history)
+            finally:
+                self._writing = {}
+            # 실패한 항목은 그 사이 더 새로운 결과가 들어오지 않았을 때만 다시 대기열에 넣음
+            for user_id, grid in failed_latest.items():
+                self._latest.setdefault(user_id, grid)
+            for user_id, records in failed_history.items():
+                self._history_pending[user_id] = records + self._history_pending.get(user_id, [])
+
+    def _write_batch(self, latest: Dict[str, Grid], history: Dict[str, List[HistoryRecord]]):
+        failed_latest: Dict[str, Grid] = {}
+        failed_history: Dict[str, List[HistoryRecord]] = {}
+        if latest:
+            try:
+                with STORAGE_OP_SECONDS.labels(op="save_detection_results").time():
+                    self.storage.save_detection_results_batch(list(latest.items()))
+                self.written += len(latest)
+            except Exception as e:
+                logger.error("Error writing detection results for %d users to %s storage: %s", len(latest), self.storage.name, e)
+                self.failures += 1
+                failed_latest = latest
+        for user_id, records in history.items():
+            try:
+                with STORAGE_OP_SECONDS.labels(op="append_history").time():
+                    self.history.append(user_id, records)
+            except Exception as e:
+                logger.error("Error appending detection history for user_id %s: %s", user_id, e)
+                self.failures += 1
+                failed_history[user_id] = records
+        return failed_latest, failed_history
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(self.flush_delay)  # 이 사이에 들어온 같은 사용자의 결과는 하나로 합쳐짐
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception("Error in detection writer flush loop: %s", e)
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            if self._latest or self._history_pending:
+                self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_users": self.pending_users,
+            "submitted": self.submitted,
+            "written": self.written,
+            "coalesced": max(0, self.submitted - self.written - len(self._latest)),
+            "failures": self.failures,
+            "history": self.history is not None,
+        }
@@ -0,0 +1,126 @@
+"""
+학습된 YOLO 가중치를 ONNX로 내보내고 (선택) INT8 정적 양자화한 뒤 모델 레지스트리에 등록합니다.
+
+processCrop 폴더에서 실행:
+    python export_model.py                                   # best.pt -> models/<버전>/model.onnx
+    python export_model.py --int8                            # box_detection/images/val로 보정한 INT8 모델
+    python export_model.py --int8 --version v2-int8 --activate
+
+--activate를 주면 레지스트리의 active 버전이 바뀌며, 실행 중인 detect.py에는
+POST /models/activate (version=<버전>, X-Admin-Token: $MODEL_ADMIN_TOKEN)로 재시작 없이 반영할 수 있습니다.
+"""
+import argparse
+import glob
+import os
+import shutil
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from backends import ModelSpec
+from model_registry import ModelRegistry
+from preprocess import LetterboxPool
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def export_onnx(weights: str, imgsz: int, opset: Optional[int]) -> Tuple[str, Dict[int, str]]:
+    """ultralytics export로 배치 크기가 가변인 ONNX 파일을 만들고 (경로, 클래스 이름)을 돌려줍니다."""
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    kwargs = {"format": "onnx", "imgsz": imgsz, "dynamic": True, "simplify": True}
+    if opset:
+        kwargs["opset"] = opset
+    onnx_path = model.export(**kwargs)
+    return str(onnx_path), dict(model.names)
+
+
+def calibration_batches(image_dir: str, imgsz: int, limit: int) -> Iterator[np.ndarray]:
+    """서빙과 같은 letterbox 전처리를 거친 (1, 3, imgsz, imgsz) float32 입력을 만듭니다."""
+    paths = sorted(p for p in glob.glob(os.path.join(image_dir, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise SystemExit(f"No calibration images found in {image_dir}")
+    pool = LetterboxPool(imgsz=imgsz, max_buffers=1)
+    for path in paths[:limit]:
+        with open(path, "rb") as f:
+            frame = pool.decode(f.read())
+        batch = np.ascontiguousarray(frame.image[None, ..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        pool.release(frame)
+        yield batch
+
+
+def quantize_int8(onnx_path: str, output_path: str, image_dir: str, imgsz: int, limit: int):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    import onnx
+
+    input_name = onnx.load(onnx_path).graph.input[0].name
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = calibration_batches(image_dir, imgsz, limit)
+
+        def get_next(self):
+            batch = next(self._batches, None)
+            return None if batch is None else {input_name: batch}
+
+    prepared_path = onnx_path.replace(".onnx", ".prep.onnx")
+    quant_pre_process(onnx_path, prepared_path)  # 양자화 전에 shape 추론/그래프 정리
+    try:
+        quantize_static(
+            prepared_path,
+            output_path,
+            _Reader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    finally:
+        os.remove(prepared_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default="./runs/detect/train/weights/best.pt")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--opset", type=int, default=None)
+    parser.add_argument("--int8", action="store_true", help="보정 이미지로 INT8 정적 양자화")
+    parser.add_argument("--calib-images", default="./box_detection/images/val")
+    parser.add_argument("--calib-limit", type=int, default=200, help="보정에 쓸 최대 이미지 수")
+    parser.add_argument("--registry", default="./models")
+    parser.add_argument("--version", default=None, help="기본값: 현재 시각 (INT8이면 -int8 접미사)")
+    parser.add_argument("--activate", action="store_true", help="등록과 동시에 active 버전으로 지정")
+    args = parser.parse_args()
+
+    version = args.version or time.strftime("%Y%m%d-%H%M%S") + ("-int8" if args.int8 else "")
+    registry = ModelRegistry(args.registry)
+    if registry.get(version) is not None:
+        raise SystemExit(f"Model version '{version}' is already registered.")
+    target_dir = os.path.join(args.registry, version)
+    os.makedirs(target_dir, exist_ok=True)
+    target_path = os.path.join(target_dir, "model.onnx")
+
+    onnx_path, names = export_onnx(args.weights, args.imgsz, args.opset)
+    print(f"Exported ONNX model: {onnx_path}")
+    if args.int8:
+        quantize_int8(onnx_path, target_path, args.calib_images, args.imgsz, args.calib_limit)
+        print(f"INT8 model calibrated on {args.calib_images}: {target_path}")
+    else:
+        shutil.copy2(onnx_path, target_path)
+
+    spec = ModelSpec(
+        version=version,
+        backend="onnx",
+        path=target_path,
+        imgsz=args.imgsz,
+        names=names,
+        quantization="int8" if args.int8 else None,
+    )
+    registry.register(spec, activate=args.activate)
+    print(f"Registered model version '{version}' in {registry.path}" + (" (active)" if args.activate else ""))
+
+
+if __name__ == "__main__":
+    main()
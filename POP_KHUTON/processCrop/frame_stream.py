@@ -0,0 +1,131 @@
+import struct
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from preprocess import open_image
+
+Grid = Dict[str, List[Dict[str, Any]]]
+
+FRAME_HEADER = struct.Struct(">I")  # 프레임 앞의 4바이트 big-endian 길이
+SIGNATURE_SIZE = 32                  # 장면 비교용 축소 이미지 한 변(px)
+
+
+class FrameStreamError(ValueError):
+    """프레임 구분 형식이 잘못된 스트림."""
+
+
+class FrameReader:
+    """
+    `[4바이트 길이][이미지 바이트]`가 이어진 청크 업로드 본문을 프레임 단위로 잘라 냅니다.
+    네트워크 청크 경계와 프레임 경계는 무관하므로 남은 바이트를 다음 청크와 이어 붙입니다.
+    """
+
+    def __init__(self, max_frame_bytes: int):
+        self.max_frame_bytes = max_frame_bytes
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        self._buffer += chunk
+        frames = []
+        offset = 0
+        while len(self._buffer) - offset >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(self._buffer, offset)
+            if length == 0 or length > self.max_frame_bytes:
+                raise FrameStreamError(f"Frame length {length} is out of range (1..{self.max_frame_bytes}).")
+            end = offset + FRAME_HEADER.size + length
+            if end > len(self._buffer):
+                break
+            frames.append(bytes(self._buffer[offset + FRAME_HEADER.size:end]))
+            offset = end
+        del self._buffer[:offset]
+        return frames
+
+    def close(self):
+        """스트림이 끝났을 때 잘린 프레임이 남아 있으면 FrameStreamError."""
+        if self._buffer:
+            raise FrameStreamError(f"Stream ended in the middle of a frame ({len(self._buffer)} bytes left).")
+
+
+def frame_signature(contents: bytes) -> np.ndarray:
+    """
+    장면 비교용 32x32 회색조 축소 이미지. JPEG은 `draft`로 1/8 크기까지 줄여 디코딩하므로 전체 디코딩보다
+    훨씬 싸고, BOX 리샘플링이 평균을 내므로 센서 노이즈와 JPEG 블록 차이는 대부분 사라집니다.
+    이미지가 아니면 ValueError.
+    """
+    img = open_image(contents)
+    try:
+        if img.format == "JPEG":
+            img.draft("L", (SIGNATURE_SIZE * 2, SIGNATURE_SIZE * 2))
+        img = img.convert("L").resize((SIGNATURE_SIZE, SIGNATURE_SIZE), Image.BOX)
+        return np.asarray(img, dtype=np.int16)
+    except Exception as e:
+        raise ValueError(f"could not decode image: {e}") from e
+
+
+class FrameDiffer:
+    """
+    마지막으로 추론한 프레임과 새 프레임의 축소 이미지 평균 밝기 차이(0~255)가 `threshold` 미만이면
+    거의 같은 장면으로 보고 추론을 건너뜁니다. 비교 기준은 추론한 프레임에서만 바뀌므로 조금씩 변하는
+    장면도 누적 차이가 threshold를 넘으면 다시 추론하며, `max_skipped`장 연속으로 건너뛰면 한 번은 추론합니다.
+    """
+
+    def __init__(self, threshold: float, max_skipped: int):
+        self.threshold = threshold
+        self.max_skipped = max_skipped
+        self._reference: Optional[np.ndarray] = None
+        self._skipped = 0
+
+    def should_infer(self, signature: np.ndarray) -> bool:
+        if (
+            self._reference is None
+            or self._skipped >= self.max_skipped
+            or float(np.abs(signature - self._reference).mean()) >= self.threshold
+        ):
+            self._reference = signature
+            self._skipped = 0
+            return True
+        self._skipped += 1
+        return False
+
+    def reset(self):
+        """추론하지 못한 프레임이 기준이 되지 않도록, 다음 프레임은 비교 없이 추론하게 합니다."""
+        self._reference = None
+
+
+class SectorSmoother:
+    """
+    최근 `window`장의 추론 결과로 섹터별 객체 목록을 평활화합니다.
+
+    섹터마다 (Lv, type)별 개수를 프레임별로 세고, 그 중앙값(짝수 개면 작은 쪽)만큼의 객체를 남깁니다.
+    한두 프레임에서만 나타나거나 사라지는 탐지는 결과에 반영되지 않으므로, 흔들리는 탐지 때문에 같은
+    장면에서 SSE 이벤트와 저장이 반복되지 않습니다. 창이 다 차기 전에는 들어온 프레임만으로 계산합니다.
+    """
+
+    def __init__(self, window: int):
+        self.window = max(1, window)
+        self._frames: Deque[Dict[str, Counter]] = deque(maxlen=self.window)
+
+    @staticmethod
+    def _count(grid: Grid) -> Dict[str, Counter]:
+        return {key: Counter((obj["Lv"], obj["type"]) for obj in objects) for key, objects in grid.items()}
+
+    def push(self, grid: Grid) -> Grid:
+        """새 추론 결과를 넣고 평활화된 격자를 돌려줍니다. 격자 키 구성은 입력과 같습니다."""
+        self._frames.append(self._count(grid))
+        frames = list(self._frames)
+        median_index = (len(frames) - 1) // 2
+        smoothed: Grid = {}
+        for key in grid:
+            row, col = (int(part) for part in key.split("-", 1))
+            labels: Dict[Tuple[str, str], None] = {}
+            for counts in reversed(frames):  # 최신 프레임에 나온 순서를 우선
+                labels.update(dict.fromkeys(counts.get(key, ())))
+            objects = []
+            for lv, crop_type in labels:
+                count = sorted(counts.get(key, Counter())[(lv, crop_type)] for counts in frames)[median_index]
+                objects.extend({"sector_row": row, "sector_col": col, "Lv": lv, "type": crop_type} for _ in range(count))
+            smoothed[key] = objects
+        return smoothed
@@ -0,0 +1,60 @@
+"""
+auth API(Login/LoginServer.py)와 탐지 API(detect.py)를 한 프로세스, 한 포트에서 함께 서빙하는 통합 모드.
+
+processCrop 폴더에서 실행:
+    python gateway.py                  # http://127.0.0.1:8000 에서 두 서버의 엔드포인트를 모두 제공
+
+두 모듈의 router를 그대로 포함하므로 경로는 단독 실행 때와 같습니다. 한 프로세스라서
+- /user_data/는 auth 서버가 메모리에 들고 있는 UserStore에서 인증 정보를 읽고 (저장소를 다시 읽지 않음),
+- 회원가입/정보 변경은 기록을 기다리지 않고 바로 /user_data/ 캐시 항목을 버리며,
+- SSE 허브, 추론/응답 캐시, 모델은 하나만 둡니다.
+두 서버를 따로 실행할 때는 invalidation.py의 로컬 소켓으로 같은 무효화를 주고받습니다.
+"""
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+# 두 서버가 같은 데이터 폴더를 보도록 auth 쪽 DB_DIR을 탐지 서버 기준 경로로 맞춤
+os.environ.setdefault("AUTH_DB_DIR", os.path.join("Login", "db"))
+# auth 변경은 같은 프로세스에서 바로 무효화되므로 저장소 버전 확인은 외부 수정 대비로만 함
+os.environ.setdefault("USER_DATA_CACHE_VALIDATE_MS", "30000")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Login"))
+
+from fastapi import FastAPI, Response
+
+import detect
+import LoginServer
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+
+
+def read_auth_user(user_id: str) -> Optional[Dict[str, Any]]:
+    user = LoginServer.user_store.get(user_id)
+    return user.model_dump() if user is not None else None
+
+
+detect.auth_user_source = read_auth_user
+LoginServer.user_store.on_change(detect.user_data_cache.invalidate)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # auth가 먼저 사용자를 올리고, 종료 시에는 탐지 쪽을 먼저 멈춘 뒤 auth의 남은 변경을 기록
+    async with LoginServer.lifespan(app), detect.lifespan(app):
+        yield
+
+
+app = FastAPI(title="POP_KHUTON 통합 API", description="회원가입/로그인과 작물 탐지 API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.include_router(LoginServer.router)
+app.include_router(detect.router)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("GATEWAY_PORT", "8000")), log_level="info")
@@ -0,0 +1,71 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+Grid = Dict[str, List[Dict[str, Any]]]
+
+
+def grid_dimensions(grid: Grid) -> Tuple[int, int]:
+    """"row-col" 키에서 (행 수, 열 수)를 구합니다."""
+    rows = cols = 0
+    for key in grid:
+        row, col = key.split("-", 1)
+        rows = max(rows, int(row) + 1)
+        cols = max(cols, int(col) + 1)
+    return rows, cols
+
+
+class GridDeltaTracker:
+    """
+    사용자별로 마지막에 발행한 탐지 격자와 버전 번호를 기억합니다.
+
+    새 격자가 들어오면 이전 격자와 섹터 단위로 비교하여 바뀐 섹터만 돌려주고, 버전을 1 올립니다.
+    바뀐 섹터가 없으면 버전을 그대로 두고 빈 dict를 돌려주므로, 발행된 delta의 base는 항상 직전 발행 버전입니다.
+    격자 크기(x_divisions, y_divisions)가 바뀌었거나 이전 격자가 없으면 변경분 대신 전체 스냅샷이
+    필요하다는 의미로 None을 돌려줍니다.
+    """
+
+    def __init__(self):
+        self._latest: Dict[str, Tuple[int, Grid, int, int]] = {}  # user_id -> (version, grid, rows, cols)
+
+    def seed(self, user_id: str, grid: Grid):
+        """저장소에서 읽은 마지막 격자로 초기 상태를 채웁니다 (버전 0)."""
+        if user_id not in self._latest:
+            rows, cols = grid_dimensions(grid)
+            self._latest[user_id] = (0, grid, rows, cols)
+
+    def has(self, user_id: str) -> bool:
+        return user_id in self._latest
+
+    def update(self, user_id: str, grid: Grid, rows: int, cols: int) -> Tuple[int, Optional[Grid]]:
+        previous = self._latest.get(user_id)
+        if previous is None:
+            self._latest[user_id] = (1, grid, rows, cols)
+            return 1, None
+        version, old_grid, old_rows, old_cols = previous
+        if (old_rows, old_cols) != (rows, cols):
+            self._latest[user_id] = (version + 1, grid, rows, cols)
+            return version + 1, None
+        changed = {key: objects for key, objects in grid.items() if old_grid.get(key) != objects}
+        if not changed:
+            # 보낼 것이 없으므로 버전을 올리지 않음 (올리면 다음 delta의 base가 비어 구독자가 스냅샷을 다시 받아야 함)
+            return version, changed
+        self._latest[user_id] = (version + 1, grid, rows, cols)
+        return version + 1, changed
+
+    def snapshot_json(self, user_id: str) -> str:
+        """전체 스냅샷 이벤트 본문. 빈 섹터는 생략하고 격자 크기를 함께 보냅니다."""
+        version, grid, rows, cols = self._latest.get(user_id, (0, {}, 0, 0))
+        return json.dumps(
+            {
+                "version": version,
+                "rows": rows,
+                "cols": cols,
+                "sectors": {key: objects for key, objects in grid.items() if objects},
+            },
+            separators=(',', ':'),
+        )
+
+    @staticmethod
+    def delta_json(version: int, changed: Grid) -> str:
+        """변경분 이벤트 본문. base가 클라이언트의 현재 버전과 다르면 이벤트를 놓친 것이므로 스냅샷을 다시 받아야 합니다."""
+        return json.dumps({"version": version, "base": version - 1, "changed": changed}, separators=(',', ':'))
@@ -0,0 +1,249 @@
+"""
+사용자별 탐지 이력을 열(column) 단위 바이너리 파일로 쌓아 두고 시계열 질의에 답하는 저장소.
+
+    db/<ID>/history/
+      snapshots.bin   스냅샷(= /detect/ 한 번)마다 (timestamp, rows, cols, 누적 객체 수) 고정 길이 레코드
+      objects.bin     탐지 객체마다 (timestamp, sector_row, sector_col, stage, crop) 고정 길이 레코드
+      crops.json      crop 번호 -> 이름 ("cabbage", "eggplant", "tomato" ...)
+
+두 파일 모두 추가 전용이며 timestamp 순으로 쌓이므로, 시간 구간은 snapshots의 이진 탐색으로 곧바로
+objects의 연속 구간이 됩니다. 질의 때는 JSON을 다시 파싱하지 않고 numpy 배열로 읽어 메모리에 두며,
+파일이 커진 만큼만 이어서 읽습니다. 섹터별로 각 생육 단계(v1~v4)를 처음/마지막으로 본 시각은
+색인으로 따로 유지하여 "v4가 된 지 얼마나 지났는가" 같은 질의를 전체 이력 스캔 없이 처리합니다.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from storage import write_json_atomic
+
+HISTORY_DIRNAME = "history"
+SNAPSHOTS_FILENAME = "snapshots.bin"
+OBJECTS_FILENAME = "objects.bin"
+CROPS_FILENAME = "crops.json"
+
+SNAPSHOT_DTYPE = np.dtype([("ts", "<f8"), ("rows", "<u2"), ("cols", "<u2"), ("end", "<u8")])  # end: 이 스냅샷까지의 누적 객체 수
+OBJECT_DTYPE = np.dtype([("ts", "<f8"), ("row", "<u2"), ("col", "<u2"), ("stage", "u1"), ("crop", "u1")])
+MAX_STAGE = 4  # data.yaml의 v1~v4
+
+Grid = Dict[str, List[Dict[str, Any]]]
+HistoryRecord = Tuple[float, Grid]
+
+
+def stage_number(lv: str) -> int:
+    """'v3' -> 3"""
+    return int(lv[1:])
+
+
+def sector_key(row: np.ndarray, col: np.ndarray) -> np.ndarray:
+    # 요청마다 격자 크기가 다를 수 있으므로 cols에 의존하지 않는 키를 씀
+    return (row.astype(np.uint32) << 16) | col.astype(np.uint32)
+
+
+def sector_name(key: int) -> str:
+    return f"{key >> 16}-{key & 0xFFFF}"
+
+
+class _Column:
+    """용량을 두 배씩 늘리는 추가 전용 numpy 배열."""
+
+    def __init__(self, dtype: np.dtype):
+        self._data = np.empty(0, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values: np.ndarray):
+        needed = self.size + len(values)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data), 256), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+
+class _UserHistory:
+    """한 사용자의 이력 배열과 색인 (메모리)."""
+
+    def __init__(self):
+        self.snapshots = _Column(SNAPSHOT_DTYPE)
+        self.objects = _Column(OBJECT_DTYPE)
+        self.snapshots_bytes = 0  # 지금까지 읽은 파일 크기
+        self.crops: List[str] = []
+        # (stage, sector_key) -> 그 단계를 처음/마지막으로 본 timestamp
+        self.first_seen: Dict[Tuple[int, int], float] = {}
+        self.last_seen: Dict[Tuple[int, int], float] = {}
+
+    def index_objects(self, objects: np.ndarray):
+        if len(objects) == 0:
+            return
+        combined = (objects["stage"].astype(np.uint64) << 32) | sector_key(objects["row"], objects["col"]).astype(np.uint64)
+        # objects는 timestamp 순이므로 처음 나온 위치가 가장 이른 관측, 뒤집어서 처음 나온 위치가 가장 늦은 관측
+        unique, first_idx = np.unique(combined, return_index=True)
+        _, last_idx = np.unique(combined[::-1], return_index=True)
+        ts = objects["ts"]
+        for value, first, last in zip(unique.tolist(), first_idx.tolist(), (len(objects) - 1 - last_idx).tolist()):
+            key = (value >> 32, value & 0xFFFFFFFF)
+            self.first_seen.setdefault(key, float(ts[first]))
+            self.last_seen[key] = float(ts[last])
+
+
+class DetectionHistoryStore:
+    """
+    DetectionWriter의 이력 대상(`append`)이면서 시계열 질의를 제공하는 저장소.
+
+    `append`는 DetectionWriter의 스레드에서, 질의 메서드는 `asyncio.to_thread`로 호출합니다.
+    같은 사용자의 기록과 질의는 잠금으로 직렬화되며, 다른 프로세스가 기록한 내용도 파일 크기를 보고
+    다음 질의 때 이어서 읽습니다.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._users: Dict[str, _UserHistory] = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, user_id: str) -> str:
+        return os.path.join(self.root_dir, user_id, HISTORY_DIRNAME)
+
+    def _load_crops(self, user_id: str) -> List[str]:
+        try:
+            with open(os.path.join(self._dir(user_id), CROPS_FILENAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _refresh(self, user_id: str) -> _UserHistory:
+        """파일에서 아직 읽지 않은 꼬리 부분만 읽어 메모리 배열과 색인에 붙입니다. (잠금 안에서 호출)"""
+        history = self._users.get(user_id)
+        directory = self._dir(user_id)
+        try:
+            size = os.path.getsize(os.path.join(directory, SNAPSHOTS_FILENAME))
+        except FileNotFoundError:
+            return history or _UserHistory()  # 이력이 없는 ID는 메모리에 올려 두지 않음
+        if history is None:
+            history = self._users[user_id] = _UserHistory()
+        size -= size % SNAPSHOT_DTYPE.itemsize  # 기록 도중 잘린 마지막 레코드는 무시
+        if size <= history.snapshots_bytes:
+            return history
+
+        with open(os.path.join(directory, SNAPSHOTS_FILENAME), "rb") as f:
+            f.seek(history.snapshots_bytes)
+            new_snapshots = np.frombuffer(f.read(size - history.snapshots_bytes), dtype=SNAPSHOT_DTYPE)
+        # objects는 snapshots보다 먼저 기록되므로 마지막 스냅샷의 end까지는 항상 파일에 있음
+        start, end = history.objects.size, int(new_snapshots["end"][-1])
+        with open(os.path.join(directory, OBJECTS_FILENAME), "rb") as f:
+            f.seek(start * OBJECT_DTYPE.itemsize)
+            new_objects = np.frombuffer(f.read((end - start) * OBJECT_DTYPE.itemsize), dtype=OBJECT_DTYPE)
+
+        history.snapshots.extend(new_snapshots)
+        history.objects.extend(new_objects)
+        history.snapshots_bytes = size
+        history.index_objects(new_objects)
+        if new_objects.size and int(new_objects["crop"].max()) >= len(history.crops):
+            history.crops = self._load_crops(user_id)
+        return history
+
+    def append(self, user_id: str, records: List[HistoryRecord]):
+        """탐지 결과 격자들을 이력 끝에 붙입니다."""
+        directory = self._dir(user_id)
+        with self._lock:
+            history = self._refresh(user_id)
+            os.makedirs(directory, exist_ok=True)
+            crops = list(history.crops) or self._load_crops(user_id)
+            crop_codes = {name: code for code, name in enumerate(crops)}
+            last_ts = float(history.snapshots.view["ts"][-1]) if history.snapshots.size else 0.0
+            total = history.objects.size
+
+            snapshots = np.empty(len(records), dtype=SNAPSHOT_DTYPE)
+            object_rows = []
+            for i, (timestamp, grid) in enumerate(records):
+                timestamp = max(timestamp, last_ts)  # 시각이 되돌아가도 이진 탐색이 가능하도록 단조 증가 유지
+                last_ts = timestamp
+                rows = cols = 0
+                for key, objects in grid.items():
+                    row, col = key.split("-", 1)
+                    rows, cols = max(rows, int(row) + 1), max(cols, int(col) + 1)
+                    for obj in objects:
+                        crop = obj["type"]
+                        if crop not in crop_codes:
+                            crop_codes[crop] = len(crops)
+                            crops.append(crop)
+                        object_rows.append((timestamp, obj["sector_row"], obj["sector_col"], stage_number(obj["Lv"]), crop_codes[crop]))
+                total += sum(len(objects) for objects in grid.values())
+                snapshots[i] = (timestamp, rows, cols, total)
+            objects = np.array(object_rows, dtype=OBJECT_DTYPE)
+
+            if len(crops) != len(history.crops):
+                write_json_atomic(os.path.join(directory, CROPS_FILENAME), crops, indent=None)
+                history.crops = crops
+            with open(os.path.join(directory, OBJECTS_FILENAME), "ab") as f:
+                f.write(objects.tobytes())
+            with open(os.path.join(directory, SNAPSHOTS_FILENAME), "ab") as f:
+                f.write(snapshots.tobytes())
+            self._refresh(user_id)
+
+    def stage_counts(self, user_id: str, days: float, crop: Optional[str] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        최근 `days`일 동안의 스냅샷에서 섹터별로 각 생육 단계가 관측된 횟수.
+        같은 개체도 스냅샷마다 한 번씩 세므로, 평균 개체 수는 counts / snapshots 입니다.
+        """
+        now = time.time() if now is None else now
+        since = now - days * 86400
+        with self._lock:
+            history = self._refresh(user_id)
+            snapshots = history.snapshots.view
+            first = int(np.searchsorted(snapshots["ts"], since, side="left"))
+            start = int(snapshots["end"][first - 1]) if first > 0 else 0
+            end = int(snapshots["end"][-1]) if len(snapshots) else 0
+            objects = history.objects.view[start:end]
+            crops = list(history.crops)
+        n_snapshots = len(snapshots) - first
+
+        if crop is not None:
+            objects = objects[objects["crop"] == crops.index(crop)] if crop in crops else objects[:0]
+        keys, inverse = np.unique(sector_key(objects["row"], objects["col"]), return_inverse=True)
+        counts = np.bincount(inverse * (MAX_STAGE + 1) + objects["stage"], minlength=len(keys) * (MAX_STAGE + 1))
+        counts = counts.reshape(len(keys), MAX_STAGE + 1)[:, 1:]
+        sectors = {
+            sector_name(key): {f"v{stage + 1}": count for stage, count in enumerate(row)}
+            for key, row in zip(keys.tolist(), counts.tolist())
+        }
+        return {"since": since, "until": now, "snapshots": n_snapshots, "crop": crop, "sectors": sectors}
+
+    def stage_reached(self, user_id: str, stage: int = MAX_STAGE, sector: Optional[str] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """섹터별로 `stage` 단계가 처음 관측된 시각과 그 뒤 지난 시간(초). 마지막 관측 시각도 함께 돌려줍니다."""
+        now = time.time() if now is None else now
+        with self._lock:
+            history = self._refresh(user_id)
+            first_seen = {key: ts for key, ts in history.first_seen.items() if key[0] == stage}
+            last_seen = history.last_seen
+        sectors = {}
+        for (_, key), first in sorted(first_seen.items(), key=lambda item: item[0][1]):
+            name = sector_name(key)
+            if sector is not None and name != sector:
+                continue
+            sectors[name] = {
+                "first_reached": first,
+                "last_seen": last_seen[(stage, key)],
+                "seconds_since": max(0.0, now - first),
+            }
+        return {"stage": f"v{stage}", "now": now, "sectors": sectors}
+
+    def summary(self, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            history = self._refresh(user_id)
+            snapshots = history.snapshots.view
+            return {
+                "snapshots": len(snapshots),
+                "objects": history.objects.size,
+                "first": float(snapshots["ts"][0]) if len(snapshots) else None,
+                "last": float(snapshots["ts"][-1]) if len(snapshots) else None,
+                "crops": list(history.crops),
+            }
@@ -0,0 +1,161 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+import numpy as np
+
+
+# --- 탐지 결과 표현 ---
+@dataclass
+class Detections:
+    """이미지 한 장에 대한 탐지 결과. 박스 좌표는 원본 이미지 픽셀 좌표계(x1, y1, x2, y2)."""
+    xyxy: np.ndarray  # (N, 4) float32
+    conf: np.ndarray  # (N,) float32
+    cls: np.ndarray   # (N,) int32
+
+    def __len__(self) -> int:
+        return int(self.cls.shape[0])
+
+    @classmethod
+    def empty(cls) -> "Detections":
+        return cls(
+            xyxy=np.zeros((0, 4), dtype=np.float32),
+            conf=np.zeros((0,), dtype=np.float32),
+            cls=np.zeros((0,), dtype=np.int32),
+        )
+
+    @classmethod
+    def from_result(cls, result: Any) -> "Detections":
+        """ultralytics Results 객체에서 텐서를 한 번에 numpy 배열로 꺼냅니다."""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty()
+        return cls(
+            xyxy=boxes.xyxy.cpu().numpy().astype(np.float32, copy=False),
+            conf=boxes.conf.cpu().numpy().astype(np.float32, copy=False),
+            cls=boxes.cls.cpu().numpy().astype(np.int32),
+        )
+
+
+class InferenceQueueFull(Exception):
+    """대기 중인 추론 요청이 최대치에 도달했을 때 발생합니다."""
+
+
+# --- 마이크로 배칭 추론 워커 ---
+class InferenceBatcher:
+    """
+    동시에 들어온 추론 요청을 모아 한 번의 배치 predict 호출로 처리합니다.
+
+    요청은 이벤트 루프 위의 대기열에 쌓이고, 수집 태스크가 최대 `max_batch_size`개 또는
+    첫 요청 이후 `max_wait_ms`가 지날 때까지 모은 뒤 전용 스레드에서 `predict_batch_fn`을
+    실행합니다. 각 요청의 future는 자기 이미지에 해당하는 결과만 받습니다.
+    """
+
+    def __init__(
+        self,
+        predict_batch_fn: Callable[[List[Any]], List[Detections]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 256,
+    ):
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be a positive integer.")
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+
+        self._pending: Deque[Tuple[Any, asyncio.Future]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        # 모델 하나를 여러 스레드에서 동시에 호출하지 않도록 워커 스레드는 하나만 둡니다.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yolo-infer")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            _, fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_exception(RuntimeError("Inference worker stopped."))
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def submit(self, image: Any) -> Detections:
+        """이미지 한 장을 대기열에 넣고, 배치 추론이 끝나면 그 이미지의 탐지 결과를 돌려줍니다."""
+        if self._task is None:
+            raise RuntimeError("Inference worker is not running.")
+        if len(self._pending) >= self.max_queue_size:
+            raise InferenceQueueFull(f"Inference queue is full ({self.max_queue_size} pending requests).")
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((image, fut))
+        self._wakeup.set()
+        return await fut
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+        deadline = loop.time() + self.max_wait
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        batch = []
+        while self._pending and len(batch) < self.max_batch_size:
+            image, fut = self._pending.popleft()
+            if not fut.cancelled():  # 클라이언트가 이미 끊은 요청은 추론하지 않음
+                batch.append((image, fut))
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+            images = [image for image, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.predict_batch_fn, images)
+                if len(results) != len(batch):
+                    raise RuntimeError(f"predict_batch_fn returned {len(results)} results for {len(batch)} images.")
+            except asyncio.CancelledError:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(RuntimeError("Inference worker stopped."))
+                raise
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), detections in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(detections)
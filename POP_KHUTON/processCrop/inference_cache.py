@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from inference import Detections
+
+logger = logging.getLogger(__name__)
+
+# 항목당 박스 배열 외에 OrderedDict 노드, 키 문자열, dataclass 등에 드는 대략적인 고정 비용(바이트)
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+def model_version_for(model_path: str) -> str:
+    """모델 파일 이름/크기/수정 시각으로 만든 버전 문자열. 모델을 다시 학습해 덮어쓰면 캐시 키가 바뀝니다."""
+    try:
+        st = os.stat(model_path)
+    except OSError:
+        return os.path.basename(model_path)
+    return f"{os.path.basename(model_path)}-{st.st_size}-{st.st_mtime_ns}"
+
+
+@dataclass
+class CachedDetections:
+    """업로드 한 장의 원시 추론 결과. 격자가 아닌 박스를 보관하므로 x/y_divisions가 달라도 재사용됩니다."""
+    detections: Detections
+    img_width: int
+    img_height: int
+
+    @property
+    def nbytes(self) -> int:
+        d = self.detections
+        return d.xyxy.nbytes + d.conf.nbytes + d.cls.nbytes + _ENTRY_OVERHEAD_BYTES
+
+
+class InferenceCache:
+    """
+    업로드 바이트의 해시 + 모델 버전을 키로 하는 추론 결과 캐시.
+
+    메모리 계층은 OrderedDict LRU이며, 보관 중인 배열 크기 합이 `max_bytes`를 넘으면 가장 오래 쓰이지
+    않은 항목부터 내보냅니다. `disk_dir`를 주면 결과를 `.npz`로도 저장해 서버 재시작 후에도 재사용합니다.
+    같은 이미지가 동시에 여러 번 올라오면 추론은 한 번만 실행하고 나머지 요청은 그 결과를 기다립니다.
+    """
+
+    def __init__(self, model_version: str, max_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.model_version = model_version
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries: "OrderedDict[str, CachedDetections]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key_for(self, contents: bytes, variant: str = "") -> str:
+        """`variant`는 같은 이미지라도 결과가 달라지는 추론 방식(예: 타일 크기)을 구분합니다."""
+        digest = hashlib.blake2b(contents, digest_size=16).hexdigest()
+        return f"{self.model_version}:{variant}:{digest}" if variant else f"{self.model_version}:{digest}"
+
+    def _disk_path(self, key: str) -> str:
+        name = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.disk_dir, f"{name}.npz")
+
+    def _get_memory(self, key: str) -> Optional[CachedDetections]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key: str, entry: CachedDetections):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old.nbytes
+        self._entries[key] = entry
+        self.current_bytes += entry.nbytes
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _load_disk(self, key: str) -> Optional[CachedDetections]:
+        path = self._disk_path(key)
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) != key:
+                    return None
+                width, height = (int(v) for v in data["size"])
+                detections = Detections(
+                    xyxy=data["xyxy"].astype(np.float32, copy=False),
+                    conf=data["conf"].astype(np.float32, copy=False),
+                    cls=data["cls"].astype(np.int32, copy=False),
+                )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Could not read inference cache file '%s': %s", path, e)
+            return None
+        return CachedDetections(detections, width, height)
+
+    def _save_disk(self, key: str, entry: CachedDetections):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # storage.write_json_atomic과 같은 임시 파일 + os.replace 방식
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    key=np.array(key),
+                    size=np.array([entry.img_width, entry.img_height], dtype=np.int64),
+                    xyxy=entry.detections.xyxy,
+                    conf=entry.detections.conf,
+                    cls=entry.detections.cls,
+                )
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("Could not write inference cache file '%s': %s", path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[CachedDetections]]
+    ) -> CachedDetections:
+        """
+        캐시에 있으면 바로 돌려주고, 없으면 `compute`로 추론한 결과를 저장한 뒤 돌려줍니다.
+        같은 키의 계산은 요청과 분리된 태스크 하나로 실행하므로, 먼저 온 요청이 취소(연결 끊김)되어도
+        같은 키를 기다리는 다른 요청은 계속 기다리고 결과는 캐시에 채워집니다.
+        """
+        entry = self._get_memory(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._load_or_compute(key, compute))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._on_compute_done(key, t))
+        return await asyncio.shield(task)
+
+    async def _load_or_compute(self, key: str, compute: Callable[[], Awaitable[CachedDetections]]) -> CachedDetections:
+        entry = None
+        if self.disk_dir:
+            entry = await asyncio.to_thread(self._load_disk, key)
+            if entry is not None:
+                self.disk_hits += 1
+        if entry is None:
+            self.misses += 1
+            entry = await compute()
+            if self.disk_dir:
+                await asyncio.to_thread(self._save_disk, key, entry)
+        self._put_memory(key, entry)
+        return entry
+
+    def _on_compute_done(self, key: str, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # 기다리던 요청이 모두 취소됐어도 "never retrieved" 경고가 나지 않도록
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.hits + self.disk_hits + self.coalesced  # 모델을 거치지 않고 응답한 요청 수
+        lookups = served + self.misses
+        return {
+            "model_version": self.model_version,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_tier": bool(self.disk_dir),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+        }
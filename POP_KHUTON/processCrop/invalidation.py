@@ -0,0 +1,145 @@
+"""
+두 서버를 따로 실행할 때 캐시 무효화 이벤트를 주고받는 로컬 UDP 소켓.
+
+auth 서버(Login/LoginServer.py)는 사용자 정보를 저장소에 기록한 직후 바뀐 사용자 ID들을 보내고,
+탐지 서버(detect.py)는 받은 ID의 /user_data/ 캐시 항목을 버립니다. 그래서 탐지 서버는 상대 서버의
+파일(행)을 짧은 주기로 다시 확인하지 않아도 됩니다. 데이터그램은 루프백에서만 쓰므로 유실은 드물지만,
+유실되더라도 캐시의 버전 확인(긴 주기)이 안전망 역할을 합니다.
+
+    INVALIDATION_LISTEN=127.0.0.1:8101 python detect.py          # 받는 쪽
+    INVALIDATION_PEERS=127.0.0.1:8101 python LoginServer.py      # 보내는 쪽 (쉼표로 여러 주소)
+
+통합 모드(gateway.py)에서는 같은 프로세스 안에서 바로 무효화하므로 이 모듈을 쓰지 않습니다.
+"""
+import asyncio
+import json
+import logging
+import socket
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_DATAGRAM_BYTES = 8192  # 한 데이터그램에 담을 최대 크기 (넘으면 여러 개로 나눠 보냄)
+
+Address = Tuple[str, int]
+
+
+def parse_address(value: str) -> Address:
+    """'host:port' 또는 ':port'(127.0.0.1). 형식이 잘못되면 ValueError."""
+    host, sep, port = value.strip().rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid invalidation address '{value}'. Use host:port.")
+    return host or "127.0.0.1", int(port)
+
+
+def parse_peers(value: str) -> List[Address]:
+    return [parse_address(part) for part in value.split(",") if part.strip()]
+
+
+def encode_keys(keys: Sequence[str]) -> List[bytes]:
+    """ID 목록을 데이터그램 크기 제한에 맞춰 `{"keys": [...]}` JSON 여러 개로 나눕니다."""
+    datagrams: List[bytes] = []
+    batch: List[str] = []
+    size = 0
+    for key in keys:
+        key_size = len(json.dumps(key, ensure_ascii=False).encode("utf-8")) + 1
+        if batch and size + key_size > MAX_DATAGRAM_BYTES - 64:
+            datagrams.append(_encode_batch(batch))
+            batch, size = [], 0
+        batch.append(key)
+        size += key_size
+    if batch:
+        datagrams.append(_encode_batch(batch))
+    return datagrams
+
+
+def _encode_batch(keys: List[str]) -> bytes:
+    return json.dumps({"keys": keys}, ensure_ascii=False).encode("utf-8")
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, bus: "InvalidationBus"):
+        self.bus = bus
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            keys = json.loads(data.decode("utf-8"))["keys"]
+        except Exception as e:  # JSON/UnicodeDecodeError/KeyError
+            self.bus.malformed += 1
+            logger.warning("Ignoring malformed invalidation datagram from %s: %s", addr, e)
+            return
+        self.bus.received += len(keys)
+        for key in keys:
+            for callback in self.bus.subscribers:
+                try:
+                    callback(key)
+                except Exception as e:
+                    logger.exception("Invalidation callback failed for '%s': %s", key, e)
+
+
+class InvalidationBus:
+    """
+    `listen` 주소로 받은 ID마다 `subscribe`한 콜백을 이벤트 루프에서 호출하고, `publish`한 ID를 `peers`로 보냅니다.
+    보내기는 non-blocking sendto 한 번이라 요청 경로에서 기다리지 않으며, 상대가 꺼져 있어도 오류를 내지 않습니다.
+    """
+
+    def __init__(self, listen: Optional[Address] = None, peers: Sequence[Address] = ()):
+        self.listen = listen
+        self.peers = list(peers)
+        self.subscribers: List[Callable[[str], None]] = []
+        self.sent = 0
+        self.received = 0
+        self.malformed = 0
+        self.send_errors = 0
+        self._send_sock: Optional[socket.socket] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    @classmethod
+    def from_config(cls, listen: str = "", peers: str = "") -> Optional["InvalidationBus"]:
+        """환경 변수 값으로 만듭니다. 둘 다 비어 있으면 None (이벤트를 쓰지 않음)."""
+        if not listen and not peers:
+            return None
+        return cls(parse_address(listen) if listen else None, parse_peers(peers))
+
+    def subscribe(self, callback: Callable[[str], None]):
+        self.subscribers.append(callback)
+
+    def publish(self, keys: Iterable[str]):
+        keys = list(keys)
+        if not keys or not self.peers:
+            return
+        if self._send_sock is None:
+            self._send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._send_sock.setblocking(False)
+        for datagram in encode_keys(keys):
+            for peer in self.peers:
+                try:
+                    self._send_sock.sendto(datagram, peer)
+                except OSError as e:  # 받는 쪽이 없을 때의 ECONNREFUSED, 버퍼가 찬 경우 등
+                    self.send_errors += 1
+                    logger.debug("Could not send invalidation to %s:%d: %s", peer[0], peer[1], e)
+        self.sent += len(keys)
+
+    async def start(self):
+        if self.listen is not None and self._transport is None:
+            loop = asyncio.get_running_loop()
+            self._transport, _ = await loop.create_datagram_endpoint(lambda: _Protocol(self), local_addr=self.listen)
+            logger.info("Listening for cache invalidations on %s:%d", *self.listen)
+
+    def stop(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._send_sock is not None:
+            self._send_sock.close()
+            self._send_sock = None
+
+    def stats(self) -> dict:
+        return {
+            "listen": f"{self.listen[0]}:{self.listen[1]}" if self.listen else None,
+            "peers": [f"{host}:{port}" for host, port in self.peers],
+            "sent": self.sent,
+            "received": self.received,
+            "malformed": self.malformed,
+            "send_errors": self.send_errors,
+        }
@@ -0,0 +1,248 @@
+"""
+외부 의존성 없는 작은 계측 모듈. Prometheus 텍스트 형식(0.0.4)으로 /metrics를 내보냅니다.
+
+    STAGE_SECONDS = histogram("detect_stage_seconds", "/detect/ 단계별 소요 시간", ["stage"])
+    with STAGE_SECONDS.labels(stage="decode").time():
+        ...
+    gauge("sse_subscribers", "SSE 구독자 수", fn=lambda: hub.subscriber_count())
+
+이벤트 루프 스레드와 작업 스레드가 함께 기록하므로 값 갱신은 잠금 하나로 보호합니다. 관측 한 번은
+버킷 이진 탐색과 정수 덧셈뿐이라 요청 경로에 넣어도 비용이 거의 없습니다. 큐 길이처럼 이미 다른 객체가
+알고 있는 값은 `fn`을 준 게이지로 만들어 스크레이프할 때만 읽습니다.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 1ms ~ 10s. 요청 단계(수 ms)부터 bcrypt/모델 로드(수 초)까지 한 벌로 사용
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), lock: Optional[threading.Lock] = None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = lock or threading.Lock()
+        self._children: Dict[LabelValues, "_Metric"] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _new_child(self) -> "_Metric":
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _series(self) -> Iterator[Tuple[LabelValues, "_Metric"]]:
+        if self.labelnames:
+            yield from list(self._children.items())
+        else:
+            yield (), self
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, series in self._series():
+            lines.extend(series._render_samples(self.name, self.labelnames, values))
+        return lines
+
+    def _render_samples(self, name: str, labelnames: Sequence[str], values: LabelValues) -> List[str]:
+        raise NotImplementedError
+
+
+class _ValueMetric(_Metric):
+    """값 하나를 가지는 counter/gauge. `fn`을 주면 스크레이프할 때 호출해 값을 읽습니다."""
+    suffix = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), fn: Optional[Callable[[], float]] = None,
+                 lock: Optional[threading.Lock] = None):
+        super().__init__(name, help_text, labelnames, lock)
+        self.value = 0.0
+        self.fn = fn
+
+    def _new_child(self) -> "_ValueMetric":
+        return type(self)(self.name, self.help, lock=self._lock)
+
+    def set_function(self, fn: Callable[[], float]):
+        self.fn = fn
+
+    def _render_samples(self, name, labelnames, values):
+        try:
+            value = self.fn() if self.fn is not None else self.value
+        except Exception:
+            return []  # 아직 준비되지 않은 객체 등: 이번 스크레이프에서는 생략
+        return [f"{name}{self.suffix}{_format_labels(labelnames, values)} {_format_value(value)}"]
+
+
+class Counter(_ValueMetric):
+    kind = "counter"
+    suffix = "_total"
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(_ValueMetric):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 lock: Optional[threading.Lock] = None):
+        super().__init__(name, help_text, labelnames, lock)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.help, buckets=self.buckets, lock=self._lock)
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def _render_samples(self, name, labelnames, values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, ('le', _format_value(bound)))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric '{metric.name}' is already registered as {existing.kind}.")
+                return existing  # 모듈을 다시 import해도 같은 객체를 씀
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _register_value(metric: _ValueMetric, registry: Registry):
+    registered = registry.register(metric)
+    if metric.fn is not None:
+        registered.set_function(metric.fn)  # 다시 등록하면 새 객체를 읽도록 바꿈
+    return registered
+
+
+def counter(name: str, help_text: str, labelnames: Iterable[str] = (), fn: Optional[Callable[[], float]] = None,
+            registry: Registry = REGISTRY) -> Counter:
+    """`fn`을 주면 다른 객체가 이미 세고 있는 누적 값(예: 캐시 적중 수)을 스크레이프 때 읽습니다."""
+    return _register_value(Counter(name, help_text, tuple(labelnames), fn=fn), registry)
+
+
+def gauge(name: str, help_text: str, labelnames: Iterable[str] = (), fn: Optional[Callable[[], float]] = None,
+          registry: Registry = REGISTRY) -> Gauge:
+    return _register_value(Gauge(name, help_text, tuple(labelnames), fn=fn), registry)
+
+
+def histogram(name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+              registry: Registry = REGISTRY) -> Histogram:
+    return registry.register(Histogram(name, help_text, tuple(labelnames), buckets=buckets))
+
+
+class MetricsMiddleware:
+    """
+    요청별 응답 시작까지의 시간을 `http_request_duration_seconds{method, route, status}`로 기록하는 ASGI 미들웨어.
+    경로 대신 라우트 템플릿(`/detection_stream/{user_id}`)을 라벨로 써서 사용자마다 시계열이 늘어나지 않게 하며,
+    SSE처럼 오래 열리는 응답도 첫 바이트까지만 잽니다.
+    """
+
+    def __init__(self, app, registry: Registry = REGISTRY):
+        self.app = app
+        self.duration = histogram("http_request_duration_seconds", "HTTP 요청을 받아 응답 헤더를 보내기까지의 시간",
+                                  ["method", "route", "status"], registry=registry)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        recorded = False
+
+        async def send_wrapper(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                route = scope.get("route")
+                self.duration.labels(
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=str(message["status"]),
+                ).observe(time.perf_counter() - start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,375 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backends import InferenceBackend, ModelSpec, load_backend
+from inference import Detections
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """모든 워커의 대기열이 가득 찼거나 준비된 워커가 없을 때 발생합니다."""
+
+
+class WorkerCrashed(Exception):
+    """요청을 처리하던 워커 프로세스가 죽었거나 응답하지 않을 때 발생합니다."""
+
+
+# --- 워커 프로세스 본체 (spawn으로 실행되므로 모듈 최상위 함수여야 함) ---
+def _worker_main(index: int, model_spec: ModelSpec, request_q, result_q, max_batch_size: int, heartbeat_interval: float,
+                 warmup_batch_sizes: Sequence[int] = (), backend_loader: Callable[[ModelSpec], InferenceBackend] = load_backend):
+    try:
+        backend = backend_loader(model_spec)
+        backend.warm_up(warmup_batch_sizes)  # warm-up이 끝난 뒤에 ready를 보내 첫 요청이 느리지 않게 함
+    except Exception as e:
+        result_q.put(("init_error", str(e)))
+        return
+    result_q.put(("ready", dict(backend.names)))
+
+    stopping = False
+    while not stopping:
+        try:
+            job = request_q.get(timeout=heartbeat_interval)
+        except queue.Empty:
+            result_q.put(("heartbeat",))
+            continue
+        if job is None:
+            break
+
+        # 대기열에 이미 쌓여 있는 요청은 같은 predict 호출로 묶어서 처리
+        jobs = [job]
+        while len(jobs) < max_batch_size:
+            try:
+                job = request_q.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                stopping = True
+                break
+            jobs.append(job)
+
+        # 세그먼트를 열 수 없는 요청은 그 요청만 실패로 응답하고 나머지는 그대로 배치로 처리
+        replies = []
+        batch: List[int] = []
+        segments = []
+        arrays = []
+        for job_id, shm_name, shape, dtype in jobs:
+            try:
+                shm = SharedMemory(name=shm_name)
+            except Exception as e:
+                replies.append(("fail", job_id, f"could not attach shared memory: {e}"))
+                continue
+            segments.append(shm)
+            arrays.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+            batch.append(job_id)
+        try:
+            if arrays:
+                results = backend.predict_batch(arrays)
+                for job_id, det in zip(batch, results):
+                    replies.append(("ok", job_id, det.xyxy, det.conf, det.cls))
+        except Exception as e:
+            replies.extend(("fail", job_id, str(e)) for job_id in batch)
+        finally:
+            del arrays
+            for shm in segments:
+                shm.close()  # unlink은 응답을 받은 API 프로세스가 담당
+        for reply in replies:
+            result_q.put(reply)
+
+
+class _Worker:
+    """API 프로세스 쪽에서 관리하는 워커 프로세스 하나의 상태."""
+
+    def __init__(self, index: int, restarts: int):
+        self.index = index
+        self.restarts = restarts
+        self.process = None
+        self.request_q = None
+        self.result_q = None
+        self.reader: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.ready = False
+        self.init_error: Optional[str] = None
+        self.last_seen = time.monotonic()
+        self.pending: Dict[int, asyncio.Future] = {}
+        # 큐에 넣은 요청의 공유 메모리. 요청이 취소돼도 워커가 응답하거나 워커를 정리할 때까지 unlink하지 않음
+        self.segments: Dict[int, SharedMemory] = {}
+
+
+# --- 추론 워커 프로세스 풀 ---
+class ModelWorkerPool:
+    """
+    모델을 한 번씩 로드한 N개의 추론 프로세스를 관리합니다.
+
+    디코딩된 이미지 배열은 `multiprocessing.shared_memory`로 워커에 넘기고, 큐에는 세그먼트
+    이름과 shape/dtype만 보냅니다. 주기적인 헬스 체크가 죽거나 멈춘 워커를 재시작하며,
+    모든 워커의 대기열이 가득 차면 `PoolSaturated`로 즉시 거절합니다. 세그먼트는 워커가 그 요청에 응답했거나
+    워커를 정리할 때 unlink하므로, 기다리던 요청이 취소돼도 워커가 아직 읽지 않은 세그먼트가 사라지지 않습니다.
+
+    `backend_loader`는 워커 프로세스 안에서 모델을 로드하는 함수이며, spawn으로 넘기므로 모듈 최상위 함수여야 합니다.
+    """
+
+    def __init__(
+        self,
+        model_spec: ModelSpec,
+        num_workers: int = 2,
+        queue_size: int = 8,
+        max_batch_size: int = 8,
+        health_interval: float = 2.0,
+        hang_timeout: float = 120.0,
+        warmup_batch_sizes: Sequence[int] = (),
+        backend_loader: Callable[[ModelSpec], InferenceBackend] = load_backend,
+    ):
+        if num_workers <= 0:
+            raise ValueError("num_workers must be a positive integer.")
+        self.model_spec = model_spec
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.max_batch_size = max_batch_size
+        self.health_interval = health_interval
+        self.hang_timeout = hang_timeout
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self.backend_loader = backend_loader
+        self.names: Dict[int, str] = {}
+
+        self._ctx = mp.get_context("spawn")  # torch 스레드 상태를 fork로 물려받지 않도록 spawn 사용
+        self._workers: List[_Worker] = []
+        self._job_ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._swap_lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return any(w.ready for w in self._workers)
+
+    @property
+    def capacity(self) -> int:
+        """준비된 워커들이 한꺼번에 받을 수 있는 요청 수. 이보다 많이 동시에 제출하면 `PoolSaturated`."""
+        return sum(self.queue_size for w in self._workers if w.ready)
+
+    async def start(self):
+        if self._monitor_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._workers = [self._spawn(i, restarts=0) for i in range(self.num_workers)]
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def wait_ready(self, timeout: float = 300.0):
+        """워커 하나 이상이 모델 로드와 warm-up을 마칠 때까지 기다립니다. 모든 워커가 로드에 실패하면 RuntimeError."""
+        deadline = time.monotonic() + timeout
+        while not self.ready:
+            errors = [w.init_error for w in self._workers if w.init_error]
+            if errors and len(errors) == len(self._workers):
+                raise RuntimeError(f"Could not load model '{self.model_spec.version}': {errors[0]}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"No inference worker became ready within {timeout:.0f}s.")
+            await asyncio.sleep(0.1)
+
+    async def stop(self):
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+            self._monitor_task = None
+        for w in self._workers:
+            try:
+                w.request_q.put_nowait(None)
+            except Exception:
+                pass
+        await asyncio.to_thread(self._join_all)
+        for w in self._workers:
+            self._retire(w, WorkerCrashed("Inference pool stopped."))
+        self._workers = []
+
+    async def swap_model(self, model_spec: ModelSpec, ready_timeout: float = 300.0):
+        """
+        재시작 없이 모든 워커를 새 모델로 교체합니다. 새 워커를 모두 띄워 모델 로드가 끝난 뒤에 한 번에
+        요청을 넘기므로 교체 중에도 요청은 이전 모델이 계속 처리하고, 로드에 실패하면 이전 모델을 그대로
+        유지합니다. 이전 워커는 이미 받은 요청을 마저 처리한 뒤 종료합니다.
+        """
+        async with self._swap_lock:
+            previous_spec = self.model_spec
+            self.model_spec = model_spec
+            fresh = [self._spawn(i, restarts=0) for i in range(self.num_workers)]
+            deadline = time.monotonic() + ready_timeout
+            while not all(w.ready for w in fresh):
+                failed = next((w for w in fresh if w.init_error or not w.process.is_alive()), None)
+                if failed is not None or time.monotonic() > deadline:
+                    reason = failed.init_error if failed is not None and failed.init_error else "worker did not become ready"
+                    for w in fresh:
+                        self._retire(w, WorkerCrashed("Model swap aborted."))
+                    self.model_spec = previous_spec
+                    raise RuntimeError(f"Could not load model '{model_spec.version}': {reason}")
+                await asyncio.sleep(0.1)
+
+            old_workers, self._workers = self._workers, fresh
+            await asyncio.gather(*(self._drain(w) for w in old_workers))
+            logger.info("Inference pool switched from model '%s' to '%s'", previous_spec.version, model_spec.version)
+
+    async def _drain(self, w: _Worker):
+        """새 요청을 더 받지 않는 워커에게 종료 신호를 보내고, 남은 요청의 응답을 기다린 뒤 정리합니다."""
+        try:
+            await asyncio.to_thread(w.request_q.put, None, True, self.hang_timeout)
+            await asyncio.to_thread(w.process.join, self.hang_timeout)
+        except Exception as e:
+            logger.warning("Inference worker %d did not stop cleanly: %s", w.index, e)
+        deadline = time.monotonic() + 5.0
+        while w.pending and time.monotonic() < deadline:  # 결과 큐에 남은 응답을 reader 스레드가 전달할 시간
+            await asyncio.sleep(0.05)
+        self._retire(w, WorkerCrashed(f"Inference worker {w.index} was replaced."))
+
+    def _join_all(self):
+        for w in self._workers:
+            w.process.join(timeout=5)
+
+    def _spawn(self, index: int, restarts: int) -> _Worker:
+        w = _Worker(index, restarts)
+        w.request_q = self._ctx.Queue(maxsize=self.queue_size)
+        w.result_q = self._ctx.Queue()
+        w.process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.model_spec, w.request_q, w.result_q, self.max_batch_size, self.health_interval, self.warmup_batch_sizes,
+                  self.backend_loader),
+            name=f"yolo-worker-{index}",
+            daemon=True,
+        )
+        w.process.start()
+        w.reader = threading.Thread(target=self._read_results, args=(w,), name=f"yolo-worker-{index}-reader", daemon=True)
+        w.reader.start()
+        logger.info("Started inference worker %d (pid %d, restarts: %d)", index, w.process.pid, restarts)
+        return w
+
+    def _retire(self, w: _Worker, error: Exception):
+        """워커를 정리하고, 그 워커에 걸려 있던 요청은 모두 실패 처리합니다."""
+        w.stop_event.set()
+        w.ready = False
+        if w.process.is_alive():
+            w.process.kill()
+        for fut in w.pending.values():
+            if not fut.done():
+                fut.set_exception(error)
+        w.pending.clear()
+        for job_id in list(w.segments):
+            self._release_segment(w, job_id)
+
+    @staticmethod
+    def _release_segment(w: _Worker, job_id: int):
+        shm = w.segments.pop(job_id, None)
+        if shm is not None:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _read_results(self, w: _Worker):
+        while not w.stop_event.is_set():
+            try:
+                msg = w.result_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._loop.call_soon_threadsafe(self._on_message, w, msg)
+
+    def _on_message(self, w: _Worker, msg: Tuple[Any, ...]):
+        w.last_seen = time.monotonic()
+        kind = msg[0]
+        if kind == "ok":
+            _, job_id, xyxy, conf, cls = msg
+            self._release_segment(w, job_id)
+            fut = w.pending.pop(job_id, None)
+            if fut is not None and not fut.done():
+                fut.set_result(Detections(xyxy=xyxy, conf=conf, cls=cls))
+        elif kind == "fail":
+            _, job_id, error = msg
+            self._release_segment(w, job_id)
+            fut = w.pending.pop(job_id, None)
+            if fut is not None and not fut.done():
+                fut.set_exception(RuntimeError(error))
+        elif kind == "ready":
+            self.names = msg[1]
+            w.ready = True
+            logger.info("Inference worker %d loaded model '%s' from '%s'", w.index, self.model_spec.version, self.model_spec.path)
+        elif kind == "init_error":
+            w.init_error = msg[1]
+            logger.error("Inference worker %d failed to load model: %s", w.index, msg[1])
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            now = time.monotonic()
+            for i, w in enumerate(self._workers):
+                if w.init_error:
+                    continue  # 모델 파일 자체가 문제라면 재시작해도 같은 오류가 반복됨
+                if not w.process.is_alive():
+                    reason = f"exited with code {w.process.exitcode}"
+                elif w.pending and now - w.last_seen > self.hang_timeout:
+                    reason = f"no response for {now - w.last_seen:.0f}s"
+                else:
+                    continue
+                logger.warning("Inference worker %d (pid %d) %s. Restarting.", w.index, w.process.pid, reason)
+                self._retire(w, WorkerCrashed(f"Inference worker {w.index} {reason}."))
+                self._workers[i] = self._spawn(i, restarts=w.restarts + 1)
+
+    async def submit(self, image: np.ndarray) -> Detections:
+        """디코딩된 이미지(HxWx3 uint8, BGR)를 대기열이 가장 짧은 워커에 보내고 결과를 기다립니다."""
+        candidates = [w for w in self._workers if w.ready and len(w.pending) < self.queue_size]
+        if not candidates:
+            raise PoolSaturated("All inference workers are busy or still loading the model.")
+        w = min(candidates, key=lambda c: len(c.pending))
+
+        image = np.ascontiguousarray(image)
+        shm = SharedMemory(create=True, size=max(image.nbytes, 1))
+        job_id = next(self._job_ids)
+        try:
+            view = np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)
+            view[...] = image
+            del view
+            w.request_q.put_nowait((job_id, shm.name, image.shape, image.dtype.str))
+        except BaseException as e:
+            shm.close()
+            shm.unlink()
+            if isinstance(e, queue.Full):
+                raise PoolSaturated("All inference workers are busy or still loading the model.")
+            raise
+        # 여기부터 세그먼트는 워커의 응답(_on_message) 또는 _retire가 정리함
+        w.segments[job_id] = shm
+        fut = self._loop.create_future()
+        w.pending[job_id] = fut
+        try:
+            return await fut
+        finally:
+            w.pending.pop(job_id, None)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "ready": self.ready,
+            "model_version": self.model_spec.version,
+            "workers": [
+                {
+                    "index": w.index,
+                    "pid": w.process.pid,
+                    "alive": w.process.is_alive(),
+                    "ready": w.ready,
+                    "pending": len(w.pending),
+                    "restarts": w.restarts,
+                    "last_seen_seconds_ago": round(now - w.last_seen, 1),
+                    "init_error": w.init_error,
+                }
+                for w in self._workers
+            ],
+        }
@@ -0,0 +1,75 @@
+"""
+서빙할 모델 버전 목록과 현재 활성 버전을 기록하는 작은 레지스트리.
+
+    models/
+      registry.json          {"active": "<version>", "models": {"<version>": ModelSpec, ...}}
+      <version>/model.onnx   export_model.py가 만든 파일 (또는 best.pt 사본)
+
+detect.py는 시작할 때 MODEL_VERSION(없으면 active) 항목을 로드하고, 레지스트리가 비어 있으면
+기존처럼 runs/detect/train/weights/best.pt를 pytorch 백엔드로 사용합니다.
+"""
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from backends import ModelSpec
+from storage import write_json_atomic
+
+REGISTRY_FILENAME = "registry.json"
+
+
+class ModelRegistry:
+    def __init__(self, root: str = "./models"):
+        self.root = root
+        self.path = os.path.join(root, REGISTRY_FILENAME)
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"active": None, "models": {}}
+
+    def _write(self, data: Dict):
+        os.makedirs(self.root, exist_ok=True)
+        write_json_atomic(self.path, data)
+
+    def _resolve(self, spec: ModelSpec) -> ModelSpec:
+        # 레지스트리에는 root 기준 상대 경로로 기록하므로 폴더째 옮겨도 동작함
+        if not os.path.isabs(spec.path):
+            spec.path = os.path.join(self.root, spec.path)
+        return spec
+
+    def list(self) -> Dict[str, ModelSpec]:
+        return {v: self._resolve(ModelSpec.from_dict(d)) for v, d in self._read().get("models", {}).items()}
+
+    def get(self, version: str) -> Optional[ModelSpec]:
+        data = self._read().get("models", {}).get(version)
+        return self._resolve(ModelSpec.from_dict(data)) if data else None
+
+    def active_version(self) -> Optional[str]:
+        return self._read().get("active")
+
+    def active(self) -> Optional[ModelSpec]:
+        version = self.active_version()
+        return self.get(version) if version else None
+
+    def register(self, spec: ModelSpec, activate: bool = False) -> ModelSpec:
+        """모델 파일이 이미 `root/<version>/` 아래에 있다고 보고 항목을 추가합니다."""
+        data = self._read()
+        entry = spec.to_dict()
+        entry["path"] = os.path.relpath(spec.path, self.root)
+        entry["registered_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        data.setdefault("models", {})[spec.version] = entry
+        if activate or not data.get("active"):
+            data["active"] = spec.version
+        self._write(data)
+        return spec
+
+    def set_active(self, version: str):
+        data = self._read()
+        if version not in data.get("models", {}):
+            raise KeyError(f"Model version '{version}' is not registered.")
+        data["active"] = version
+        self._write(data)
@@ -0,0 +1,109 @@
+import io
+import threading
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+from inference import Detections
+
+LETTERBOX_PAD_VALUE = 114  # ultralytics LetterBox와 같은 회색 여백
+
+
+@dataclass
+class LetterboxedImage:
+    """
+    모델 입력 크기(imgsz x imgsz)로 줄이고 여백을 채운 BGR 이미지와, 원본 좌표로 되돌리는 데 필요한 값.
+    `image`는 버퍼 풀에서 빌린 배열이므로 추론이 끝나면 `LetterboxPool.release`로 돌려줘야 합니다.
+    """
+    image: np.ndarray  # (imgsz, imgsz, 3) uint8 BGR
+    orig_width: int
+    orig_height: int
+    scale: float
+    pad_x: int
+    pad_y: int
+
+    def to_original(self, detections: Detections) -> Detections:
+        """letterbox 좌표계의 박스를 원본 이미지 픽셀 좌표로 옮깁니다."""
+        if len(detections) == 0:
+            return detections
+        xyxy = detections.xyxy.astype(np.float32, copy=True)
+        xyxy[:, [0, 2]] -= self.pad_x
+        xyxy[:, [1, 3]] -= self.pad_y
+        xyxy /= self.scale
+        xyxy[:, [0, 2]] = np.clip(xyxy[:, [0, 2]], 0, self.orig_width)
+        xyxy[:, [1, 3]] = np.clip(xyxy[:, [1, 3]], 0, self.orig_height)
+        return Detections(xyxy=xyxy, conf=detections.conf, cls=detections.cls)
+
+
+def open_image(contents: bytes) -> Image.Image:
+    """이미지 헤더만 읽어 PIL 이미지를 엽니다. 이미지가 아니거나 크기가 0이면 ValueError."""
+    try:
+        img = Image.open(io.BytesIO(contents))
+    except Exception as e:
+        raise ValueError(str(e)) from e
+    if img.width == 0 or img.height == 0:
+        raise ValueError("Uploaded image has zero width or height.")
+    return img
+
+
+class LetterboxPool:
+    """
+    업로드 바이트를 모델 입력용 letterbox 배열로 바로 디코딩합니다.
+
+    JPEG은 `Image.draft`로 DCT 단계에서 1/2, 1/4, 1/8 크기로 줄여 디코딩하므로 수 메가픽셀 사진도
+    전체 해상도 버퍼를 만들지 않습니다. 다른 형식은 `reducing_gap`으로 정수 배 축소를 먼저 한 뒤
+    리샘플링합니다. 결과는 미리 할당해 둔 imgsz x imgsz 버퍼에 BGR 순서로 복사하며, 버퍼는 재사용됩니다.
+    """
+
+    def __init__(self, imgsz: int = 640, max_buffers: int = 16):
+        self.imgsz = imgsz
+        self.max_buffers = max_buffers
+        self._free: List[np.ndarray] = []
+        self._lock = threading.Lock()
+        self.allocated = 0
+
+    def _acquire(self) -> np.ndarray:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return np.full((self.imgsz, self.imgsz, 3), LETTERBOX_PAD_VALUE, dtype=np.uint8)
+
+    def release(self, frame: LetterboxedImage):
+        with self._lock:
+            if len(self._free) < self.max_buffers:
+                self._free.append(frame.image)
+
+    def decode(self, contents: bytes) -> LetterboxedImage:
+        """이미지 바이트를 letterbox 배열로 변환합니다. 이미지가 아니거나 크기가 0이면 ValueError."""
+        return self.letterbox(open_image(contents))
+
+    def letterbox(self, img: Image.Image) -> LetterboxedImage:
+        """열린(아직 디코딩 전일 수 있는) PIL 이미지를 letterbox 배열로 변환합니다."""
+        orig_width, orig_height = img.size
+        scale = min(self.imgsz / orig_width, self.imgsz / orig_height)
+        new_width = max(1, min(self.imgsz, int(round(orig_width * scale))))
+        new_height = max(1, min(self.imgsz, int(round(orig_height * scale))))
+
+        try:
+            if img.format == "JPEG":
+                img.draft("RGB", (new_width, new_height))  # 요청 크기 이상인 가장 작은 DCT 배율로 디코딩
+            img = img.convert("RGB")
+            if img.size != (new_width, new_height):
+                img = img.resize((new_width, new_height), Image.BILINEAR, reducing_gap=2.0)
+            rgb = np.asarray(img)
+        except Exception as e:
+            raise ValueError(f"could not decode image: {e}") from e
+
+        pad_x = (self.imgsz - new_width) // 2
+        pad_y = (self.imgsz - new_height) // 2
+        canvas = self._acquire()
+        # 이전 요청의 이미지가 남아 있을 수 있는 여백 영역만 다시 채움
+        canvas[:pad_y] = LETTERBOX_PAD_VALUE
+        canvas[pad_y + new_height:] = LETTERBOX_PAD_VALUE
+        canvas[pad_y:pad_y + new_height, :pad_x] = LETTERBOX_PAD_VALUE
+        canvas[pad_y:pad_y + new_height, pad_x + new_width:] = LETTERBOX_PAD_VALUE
+        canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = rgb[:, :, ::-1]  # RGB -> BGR
+        return LetterboxedImage(canvas, orig_width, orig_height, scale, pad_x, pad_y)
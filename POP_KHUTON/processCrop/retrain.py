@@ -0,0 +1,239 @@
+"""
+현재 서빙 모델에서 이어 학습(fine-tune)하고, 서빙 모델보다 나을 때만 레지스트리에 등록/활성화합니다.
+
+processCrop 폴더에서 실행:
+    python dataset_prep.py && python retrain.py              # 새 라벨을 포함해 데이터셋을 다시 만든 뒤 재학습
+    python retrain.py --epochs 10 --dry-run                  # 평가 결과만 보고 등록하지 않음
+
+1. 레지스트리의 active 모델(없으면 runs/detect/train/weights/best.pt)의 가중치에서 학습을 시작합니다.
+   active 모델이 ONNX면 같은 폴더의 best.pt(이 스크립트가 함께 남겨 둠), 없으면 --base-weights에서 시작합니다.
+2. 서빙 모델이 ONNX면 후보도 export_model.py와 같은 방식으로 ONNX(서빙 모델이 INT8이면 INT8)로 내보내,
+   두 모델을 같은 백엔드로 비교합니다.
+3. 같은 val split(box_detection/images/val)으로 후보와 서빙 모델의 mAP50-95를 구하고, 서빙과 같은
+   letterbox 전처리 + 백엔드로 이미지 한 장의 CPU 추론 지연을 잽니다.
+4. mAP가 서빙 모델보다 --min-map-gain 이상 높고, 지연 중앙값이 서빙 모델의 --max-latency-ratio배 이하일 때만
+   models/<버전>/에 복사해 active로 등록합니다. 실행 중인 detect.py는 레지스트리 변경을
+   MODEL_REGISTRY_POLL_SECONDS 안에 알아차리고 백그라운드에서 새 모델을 로드한 뒤 교체합니다.
+
+결과는 runs/retrain/<버전>/report.json에 남습니다.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from backends import ModelSpec, load_backend
+from export_model import export_onnx, quantize_int8
+from inference_cache import model_version_for
+from model_registry import ModelRegistry
+from preprocess import LetterboxPool
+from train import PREPARED_DATA, RAW_DATA
+
+DEFAULT_WEIGHTS = "./runs/detect/train/weights/best.pt"  # detect.py의 MODEL_PATH
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+@dataclass
+class Evaluation:
+    version: str
+    path: str
+    map50_95: float
+    map50: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+
+
+def serving_model(registry: ModelRegistry) -> Optional[ModelSpec]:
+    """detect.py가 MODEL_VERSION 없이 시작했을 때 고르는 것과 같은 모델."""
+    spec = registry.active()
+    if spec is not None:
+        return spec
+    if os.path.exists(DEFAULT_WEIGHTS):
+        return ModelSpec(version=model_version_for(DEFAULT_WEIGHTS), backend="pytorch", path=DEFAULT_WEIGHTS)
+    return None
+
+
+def base_weights_for(spec: Optional[ModelSpec], default: str) -> str:
+    """이어 학습을 시작할 .pt 가중치. ONNX 모델이면 같은 폴더에 남겨 둔 best.pt를 사용합니다."""
+    if spec is None:
+        return default
+    if spec.backend == "pytorch":
+        return spec.path
+    sibling = os.path.join(os.path.dirname(spec.path), "best.pt")
+    return sibling if os.path.exists(sibling) else default
+
+
+def build_candidate(weights: str, version: str, serving: Optional[ModelSpec], args) -> ModelSpec:
+    """
+    후보를 서빙 모델과 같은 백엔드/양자화로 만듭니다. 그래야 지연 비교가 PyTorch와 ONNX Runtime처럼
+    서로 다른 런타임 사이의 비교가 되지 않습니다.
+    """
+    if serving is None or serving.backend == "pytorch":
+        return ModelSpec(version=version, backend="pytorch", path=weights, imgsz=args.imgsz)
+    onnx_path, names = export_onnx(weights, args.imgsz, None)
+    if serving.quantization == "int8":
+        int8_path = onnx_path.replace(".onnx", ".int8.onnx")
+        quantize_int8(onnx_path, int8_path, args.calib_images, args.imgsz, args.calib_limit)
+        onnx_path = int8_path
+    return ModelSpec(
+        version=version, backend="onnx", path=onnx_path, imgsz=args.imgsz, names=names, quantization=serving.quantization,
+    )
+
+
+def fine_tune(weights: str, data: str, args, run_name: str) -> str:
+    """weights에서 이어 학습하고 가장 좋은 에폭의 가중치 경로를 돌려줍니다."""
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    model.train(
+        data=data,
+        epochs=args.epochs,
+        imgsz=args.imgsz,
+        batch=args.batch,
+        device=args.device,
+        workers=args.workers,
+        seed=args.seed,
+        deterministic=True,
+        cache="disk",
+        lr0=args.lr0,
+        project="runs/retrain",
+        name=run_name,
+    )
+    return str(model.trainer.best)
+
+
+def val_image_paths(data: str) -> List[str]:
+    import yaml
+    with open(data, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    root = config.get("path") or "."
+    if not os.path.isabs(root):
+        root = os.path.join(os.path.dirname(os.path.abspath(data)), root)
+    val_dir = os.path.join(root, config["val"])
+    return sorted(p for p in glob.glob(os.path.join(val_dir, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def measure_latency(spec: ModelSpec, image_paths: List[str], runs: int, warmup: int = 3) -> List[float]:
+    """서빙과 같은 경로(letterbox 디코딩 + 백엔드 predict, 한 장씩)의 CPU 지연(ms)을 잽니다."""
+    backend = load_backend(spec, device="cpu")
+    pool = LetterboxPool(imgsz=spec.imgsz, max_buffers=1)
+    contents = []
+    for path in image_paths:
+        with open(path, "rb") as f:
+            contents.append(f.read())
+    latencies = []
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        frame = pool.decode(contents[i % len(contents)])
+        backend.predict_batch([frame.image])
+        pool.release(frame)
+        if i >= warmup:
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def evaluate(spec: ModelSpec, data: str, args) -> Evaluation:
+    from ultralytics import YOLO
+    metrics = YOLO(spec.path).val(data=data, split="val", imgsz=spec.imgsz, device="cpu", plots=False, verbose=False)
+    latencies = sorted(measure_latency(spec, val_image_paths(data), args.latency_runs))
+    return Evaluation(
+        version=spec.version,
+        path=spec.path,
+        map50_95=float(metrics.box.map),
+        map50=float(metrics.box.map50),
+        latency_p50_ms=statistics.median(latencies),
+        latency_p95_ms=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    )
+
+
+def check_gates(candidate: Evaluation, serving: Optional[Evaluation], args) -> List[str]:
+    """통과하지 못한 조건의 설명 목록 (비어 있으면 승격)."""
+    if serving is None:
+        return []
+    failures = []
+    if candidate.map50_95 < serving.map50_95 + args.min_map_gain:
+        failures.append(f"mAP50-95 {candidate.map50_95:.4f} < serving {serving.map50_95:.4f} + {args.min_map_gain}")
+    if candidate.latency_p50_ms > serving.latency_p50_ms * args.max_latency_ratio:
+        failures.append(
+            f"CPU latency p50 {candidate.latency_p50_ms:.1f}ms > serving {serving.latency_p50_ms:.1f}ms x {args.max_latency_ratio}"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=None, help=f"기본값: {PREPARED_DATA}가 있으면 그것, 없으면 {RAW_DATA}")
+    parser.add_argument("--base-weights", default=DEFAULT_WEIGHTS, help="active 모델이 ONNX이고 옆에 best.pt가 없을 때 학습을 시작할 가중치")
+    parser.add_argument("--calib-images", default="./box_detection/images/val", help="서빙 모델이 INT8일 때 후보 양자화 보정 이미지")
+    parser.add_argument("--calib-limit", type=int, default=200)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--lr0", type=float, default=0.001, help="처음부터 학습할 때(0.01)보다 낮은 학습률로 이어 학습")
+    parser.add_argument("--device", default=None, help="학습 장치 (평가 지연은 항상 CPU에서 측정)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-runs", type=int, default=30)
+    parser.add_argument("--min-map-gain", type=float, default=0.0, help="후보 mAP50-95가 서빙 모델보다 이만큼은 높아야 함")
+    parser.add_argument("--max-latency-ratio", type=float, default=1.10, help="후보 CPU 지연 중앙값 / 서빙 모델 상한")
+    parser.add_argument("--registry", default="./models")
+    parser.add_argument("--version", default=None, help="기본값: 현재 시각 (-ft 접미사)")
+    parser.add_argument("--dry-run", action="store_true", help="평가만 하고 등록하지 않음")
+    args = parser.parse_args()
+
+    data = args.data or (PREPARED_DATA if os.path.exists(PREPARED_DATA) else RAW_DATA)
+    registry = ModelRegistry(args.registry)
+    version = args.version or time.strftime("%Y%m%d-%H%M%S") + "-ft"
+    if registry.get(version) is not None:
+        raise SystemExit(f"Model version '{version}' is already registered.")
+
+    serving_spec = serving_model(registry)
+    base_weights = base_weights_for(serving_spec, args.base_weights)
+    print(f"Fine-tuning from {base_weights} on {data} (serving: {serving_spec.version if serving_spec else 'none'})")
+    candidate_weights = fine_tune(base_weights, data, args, version)
+    candidate_spec = build_candidate(candidate_weights, version, serving_spec, args)
+
+    candidate = evaluate(candidate_spec, data, args)
+    serving = evaluate(serving_spec, data, args) if serving_spec is not None else None
+    failures = check_gates(candidate, serving, args)
+    promoted = not failures and not args.dry_run
+
+    if promoted:
+        from ultralytics import YOLO
+        target_dir = os.path.join(args.registry, version)
+        os.makedirs(target_dir, exist_ok=True)
+        shutil.copy2(candidate_weights, os.path.join(target_dir, "best.pt"))  # 다음 재학습의 시작점
+        if candidate_spec.backend == "onnx":
+            candidate_spec.path = shutil.copy2(candidate_spec.path, os.path.join(target_dir, "model.onnx"))
+        else:
+            candidate_spec.path = os.path.join(target_dir, "best.pt")
+            candidate_spec.names = dict(YOLO(candidate_spec.path).names)
+        registry.register(candidate_spec, activate=True)
+
+    report = {
+        "version": version,
+        "data": data,
+        "base_weights": base_weights,
+        "candidate": asdict(candidate),
+        "serving": asdict(serving) if serving is not None else None,
+        "gate_failures": failures,
+        "promoted": promoted,
+    }
+    report_path = os.path.join("runs", "retrain", version, "report.json")
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if failures:
+        raise SystemExit(f"Candidate '{version}' was not promoted: " + "; ".join(failures))
+    if promoted:
+        print(f"Registered '{version}' as the active model in {registry.path}; detect.py will load it in the background.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from typing import Any, Dict, List, Mapping, Tuple
+
+import numpy as np
+
+
+def empty_grid(x_divisions: int, y_divisions: int) -> Dict[str, List[Dict[str, Any]]]:
+    """모든 섹터 키("row-col")를 빈 리스트로 초기화한 격자를 만듭니다."""
+    return {f"{row}-{col}": [] for row in range(y_divisions) for col in range(x_divisions)}
+
+
+def _class_labels(class_names: Mapping[int, str]) -> Dict[int, Tuple[str, str]]:
+    # 'v3_tomato' -> ('v3', 'tomato'). 박스마다 문자열을 자르지 않도록 클래스별로 한 번만 계산
+    return {cls_id: (name[:2], name[3:]) for cls_id, name in class_names.items()}
+
+
+def assign_sectors(
+    xyxy: np.ndarray,
+    cls: np.ndarray,
+    class_names: Mapping[int, str],
+    img_width: float,
+    img_height: float,
+    x_divisions: int,
+    y_divisions: int,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    탐지 박스 전체를 한 번에 섹터 격자에 배정합니다.
+
+    박스 중심과 섹터 행/열 계산은 numpy로 벡터화하고, 결과는 박스 순서를 유지한 채
+    한 번의 순회로 `{"row-col": [{"sector_row", "sector_col", "Lv", "type"}, ...]}` 형태로 묶습니다.
+    격자 밖(음수 좌표)에 중심이 있는 박스는 버립니다.
+    """
+    grid = empty_grid(x_divisions, y_divisions)
+    if len(cls) == 0:
+        return grid
+
+    boxes = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    sector_width = img_width / x_divisions
+    sector_height = img_height / y_divisions
+    center_x = (boxes[:, 0] + boxes[:, 2]) / 2
+    center_y = (boxes[:, 1] + boxes[:, 3]) / 2
+    cols = np.minimum(np.floor_divide(center_x, sector_width), x_divisions - 1).astype(np.int64)
+    rows = np.minimum(np.floor_divide(center_y, sector_height), y_divisions - 1).astype(np.int64)
+    inside = (cols >= 0) & (rows >= 0)
+
+    labels = _class_labels(class_names)
+    keys = list(grid.keys())  # rows * x_divisions + cols 순서로 생성되어 있음
+    for row, col, cls_id in zip(rows[inside].tolist(), cols[inside].tolist(), np.asarray(cls)[inside].tolist()):
+        lv, crop_type = labels[int(cls_id)]
+        grid[keys[row * x_divisions + col]].append({
+            "sector_row": row,
+            "sector_col": col,
+            "Lv": lv,
+            "type": crop_type,
+        })
+    return grid
@@ -0,0 +1,175 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from starlette.requests import Request
+
+Event = Tuple[int, str, Optional[str]]  # (event id, data, event 이름 - None이면 기본 "message")
+
+
+class Subscriber:
+    """SSE 연결 하나. 크기가 제한된 대기열을 가지며, 넘치면 overflow 정책에 따라 오래된 이벤트를 버립니다."""
+
+    def __init__(self, user_id: str, max_queue_size: int, overflow: str):
+        self.user_id = user_id
+        self.max_queue_size = max_queue_size
+        self.overflow = overflow
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+        self._items: Deque[Event] = deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, event: Event):
+        if len(self._items) >= self.max_queue_size:
+            if self.overflow == "coalesce":
+                # 탐지 결과는 매번 전체 격자이므로 밀린 이벤트는 최신 것 하나로 합쳐도 충분함
+                self.dropped += len(self._items)
+                self._items.clear()
+            else:
+                self._items.popleft()
+                self.dropped += 1
+        self._items.append(event)
+        self._ready.set()
+
+    def close(self):
+        """연결이 끊겼음을 표시하고, 이벤트를 기다리던 `next`를 바로 깨웁니다."""
+        self.closed = True
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[Event]:
+        """다음 이벤트를 기다립니다. timeout 동안 아무것도 없거나 `close`되면 None (하트비트를 보낼 차례)."""
+        if not self._items and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._items.popleft() if self._items else None
+
+
+class SSEHub:
+    """
+    사용자별 SSE 브로드캐스트 허브.
+
+    한 사용자 ID에 여러 구독자(Unity 클라이언트)가 동시에 붙을 수 있고, `publish`는 기다리지 않고
+    모든 구독자의 대기열에 이벤트를 넣습니다. 사용자별로 최근 이벤트를 링 버퍼에 보관하여, 재연결한
+    클라이언트가 `Last-Event-ID`를 보내면 놓친 이벤트를 다시 보내 줍니다. 연결 끊김은 ASGI disconnect
+    메시지로 바로 감지하고, 이벤트가 없는 동안에는 주기적으로 하트비트 주석을 보내 프록시 연결을 유지합니다.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 16,
+        replay_size: int = 32,
+        heartbeat_interval: float = 15.0,
+        overflow: str = "drop_oldest",
+    ):
+        if overflow not in ("drop_oldest", "coalesce"):
+            raise ValueError("overflow must be 'drop_oldest' or 'coalesce'.")
+        self.max_queue_size = max_queue_size
+        self.replay_size = replay_size
+        self.heartbeat_interval = heartbeat_interval
+        self.overflow = overflow
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._history: Dict[str, Deque[Event]] = {}
+        # 서버를 재시작해도 이벤트 ID가 뒤로 가지 않도록 시작 시각(ms)을 기준값으로 사용
+        self._id_base = int(time.time() * 1000)
+        self._counters: Dict[str, int] = {}
+        self.published = 0
+
+    def subscriber_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            return len(self._subscribers.get(user_id, ()))
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def _next_event_id(self, user_id: str) -> int:
+        count = self._counters.get(user_id, 0)
+        self._counters[user_id] = count + 1
+        return self._id_base + count
+
+    def publish(self, user_id: str, data: str, event_name: Optional[str] = None) -> int:
+        event_id = self._next_event_id(user_id)
+        event = (event_id, data, event_name)
+
+        history = self._history.get(user_id)
+        if history is None:
+            history = self._history[user_id] = deque(maxlen=self.replay_size)
+        history.append(event)
+
+        for sub in self._subscribers.get(user_id, ()):
+            sub.push(event)
+        self.published += 1
+        return event_id
+
+    def send(self, sub: Subscriber, data: str, event_name: Optional[str] = None) -> int:
+        """구독자 한 명에게만 이벤트를 보냅니다 (재전송 버퍼에는 남기지 않음). 연결 직후 스냅샷 전송용."""
+        event_id = self._next_event_id(sub.user_id)
+        sub.push((event_id, data, event_name))
+        return event_id
+
+    def subscribe(self, user_id: str, last_event_id: Optional[str] = None) -> Subscriber:
+        sub = Subscriber(user_id, self.max_queue_size, self.overflow)
+        if last_event_id:
+            try:
+                last_seen = int(last_event_id)
+            except ValueError:
+                last_seen = None
+            if last_seen is not None:
+                for event in self._history.get(user_id, ()):
+                    if event[0] > last_seen:
+                        sub.push(event)
+        self._subscribers.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        subs = self._subscribers.get(sub.user_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subscribers[sub.user_id]
+
+    @staticmethod
+    async def _watch_disconnect(sub: Subscriber, request: Request):
+        """클라이언트의 http.disconnect를 받는 즉시 구독자를 닫아, 다음 하트비트까지 기다리지 않고 끝나게 합니다."""
+        try:
+            while (await request.receive())["type"] != "http.disconnect":
+                pass
+        except Exception:  # receive 채널이 닫힌 경우도 끊긴 것으로 봄
+            pass
+        sub.close()
+
+    async def event_stream(self, sub: Subscriber, request: Request) -> AsyncIterator[str]:
+        """구독자 한 명에게 보낼 SSE 프레임을 만듭니다. 연결이 끊기면 구독을 해제합니다."""
+        watcher = asyncio.ensure_future(self._watch_disconnect(sub, request))
+        try:
+            while True:
+                event = await sub.next(self.heartbeat_interval)
+                if sub.closed:
+                    break
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event_id, data, event_name = event
+                if event_name:
+                    yield f"id: {event_id}\nevent: {event_name}\ndata: {data}\n\n"
+                else:
+                    yield f"id: {event_id}\ndata: {data}\n\n"
+                sub.sent += 1
+        finally:
+            watcher.cancel()
+            self.unsubscribe(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._subscribers),
+            "subscribers": self.subscriber_count(),
+            "published": self.published,
+            "queued": sum(len(sub) for subs in self._subscribers.values() for sub in subs),
+            "dropped": sum(sub.dropped for subs in self._subscribers.values() for sub in subs),
+        }
@@ -0,0 +1,359 @@
+"""
+인증 서버(LoginServer.py)와 탐지 서버(detect.py)가 함께 쓰는 저장소 계층.
+
+- JsonDirBackend: 기존 `db/<ID>/user_data.json`, `db/<ID>/detection_results.json` 구조
+- SqliteBackend:  WAL 모드 SQLite 파일 하나 (작은 커넥션 풀 + 고정 SQL 문 재사용)
+
+STORAGE_BACKEND 환경 변수("json" | "sqlite")로 선택하며, 기존 db/ 폴더는 아래 명령으로 옮길 수 있습니다.
+    python storage.py migrate --db-dir ./Login/db
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import histogram
+
+USER_DATA_FILENAME = "user_data.json"
+DETECTION_DATA_FILENAME = "detection_results.json"
+SQLITE_FILENAME = "pop_khuton.sqlite3"
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json")  # "json" 또는 "sqlite"
+SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "4"))
+
+logger = logging.getLogger(__name__)
+# 저장소를 부르는 쪽(스레드)에서 op 라벨로 기록: save_users, save_detection_results, load_user_data ...
+STORAGE_OP_SECONDS = histogram("storage_op_seconds", "저장소 읽기/쓰기 한 번에 걸린 시간", ["op"])
+
+
+class UserAlreadyExists(Exception):
+    """이미 존재하는 ID로 사용자를 만들려고 할 때 발생합니다."""
+
+
+def write_json_atomic(file_path: str, data: Any, indent: Optional[int] = 4):
+    """임시 파일에 쓴 뒤 os.replace로 교체하여, 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 합니다."""
+    # 같은 파일을 여러 스레드가 동시에 쓸 수 있으므로 임시 파일 이름은 스레드마다 달라야 함
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, ensure_ascii=False, indent=indent))
+    os.replace(tmp_path, file_path)
+
+
+class StorageBackend:
+    """
+    저장소 인터페이스. 모든 메서드는 동기(blocking)이므로 이벤트 루프에서는
+    `asyncio.to_thread`로 호출합니다. 사용자 정보는 UserInDB.model_dump() 형태의 dict입니다.
+    """
+    name = "base"
+
+    def load_all_users(self) -> Dict[str, dict]:
+        raise NotImplementedError
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def user_exists(self, user_id: str) -> bool:
+        raise NotImplementedError
+
+    def create_user(self, user_id: str, data: dict):
+        raise NotImplementedError
+
+    def save_users(self, batch: List[Tuple[str, dict]]):
+        """여러 사용자의 정보를 한 번에 기록합니다. (user_id, data) 목록"""
+        raise NotImplementedError
+
+    def get_detection_results(self, user_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def save_detection_results(self, user_id: str, grid: dict):
+        raise NotImplementedError
+
+    def save_detection_results_batch(self, batch: List[Tuple[str, dict]]):
+        """여러 사용자의 최신 탐지 결과를 한 번에 기록합니다. (user_id, grid) 목록"""
+        for user_id, grid in batch:
+            self.save_detection_results(user_id, grid)
+
+    def detection_results_location(self, user_id: str) -> str:
+        raise NotImplementedError
+
+    def data_version(self, user_id: str) -> tuple:
+        """
+        사용자 정보와 탐지 결과의 변경 여부를 싸게 확인하기 위한 값. 어느 쪽이든 바뀌면 달라집니다.
+        (다른 프로세스가 기록한 변경을 캐시가 알아차리는 데 사용)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# --- 기존 디렉토리/JSON 파일 구조 ---
+class JsonDirBackend(StorageBackend):
+    name = "json"
+
+    def __init__(self, db_dir: str):
+        self.db_dir = db_dir
+        os.makedirs(db_dir, exist_ok=True)
+        self._known_dirs = set()  # 이미 만든 사용자 폴더 (요청마다 makedirs 하지 않도록)
+
+    def _ensure_user_dir(self, user_id: str):
+        if user_id not in self._known_dirs:
+            os.makedirs(os.path.join(self.db_dir, user_id), exist_ok=True)
+            self._known_dirs.add(user_id)
+
+    def _path(self, user_id: str, filename: str) -> str:
+        return os.path.join(self.db_dir, user_id, filename)
+
+    @staticmethod
+    def _read_json(file_path: str) -> Optional[dict]:
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load_all_users(self) -> Dict[str, dict]:
+        users = {}
+        for folder_name in os.listdir(self.db_dir):
+            try:
+                data = self._read_json(self._path(folder_name, USER_DATA_FILENAME))
+            except Exception as e:
+                logger.warning("Could not read %s in '%s': %s. Skipping.", USER_DATA_FILENAME, folder_name, e)
+                continue
+            if data is not None:
+                users[folder_name] = data
+        return users
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        return self._read_json(self._path(user_id, USER_DATA_FILENAME))
+
+    def user_exists(self, user_id: str) -> bool:
+        # 탐지 결과만 있는 폴더도 사용 중인 ID로 취급 (기존 회원가입 동작과 동일)
+        return os.path.exists(os.path.join(self.db_dir, user_id))
+
+    def create_user(self, user_id: str, data: dict):
+        user_dir = os.path.join(self.db_dir, user_id)
+        if os.path.exists(self._path(user_id, USER_DATA_FILENAME)):
+            raise UserAlreadyExists(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        try:
+            write_json_atomic(self._path(user_id, USER_DATA_FILENAME), data)
+        except Exception:
+            if not os.listdir(user_dir):
+                os.rmdir(user_dir)
+            raise
+
+    def save_users(self, batch: List[Tuple[str, dict]]):
+        for user_id, data in batch:
+            write_json_atomic(self._path(user_id, USER_DATA_FILENAME), data)
+
+    def get_detection_results(self, user_id: str) -> Optional[dict]:
+        return self._read_json(self._path(user_id, DETECTION_DATA_FILENAME))
+
+    def save_detection_results(self, user_id: str, grid: dict):
+        self._ensure_user_dir(user_id)
+        try:
+            write_json_atomic(self._path(user_id, DETECTION_DATA_FILENAME), grid, indent=None)
+        except FileNotFoundError:  # 서버 실행 중에 폴더가 지워진 경우
+            self._known_dirs.discard(user_id)
+            self._ensure_user_dir(user_id)
+            write_json_atomic(self._path(user_id, DETECTION_DATA_FILENAME), grid, indent=None)
+
+    def detection_results_location(self, user_id: str) -> str:
+        return self._path(user_id, DETECTION_DATA_FILENAME)
+
+    def data_version(self, user_id: str) -> tuple:
+        # os.replace로 교체되므로 내용이 바뀌면 mtime(나노초)이나 inode가 바뀜
+        version = []
+        for filename in (USER_DATA_FILENAME, DETECTION_DATA_FILENAME):
+            try:
+                st = os.stat(self._path(user_id, filename))
+                version.append((st.st_mtime_ns, st.st_ino, st.st_size))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+
+# --- SQLite (WAL) ---
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        nickname TEXT NOT NULL,
+        level INTEGER NOT NULL,
+        exp INTEGER NOT NULL,
+        hashed_password TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_users_level_exp ON users (level DESC, exp DESC)",
+    """CREATE TABLE IF NOT EXISTS detection_results (
+        user_id TEXT PRIMARY KEY,
+        grid TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID""",
+)
+
+_USER_COLUMNS = ("id", "nickname", "level", "exp", "hashed_password")
+_SQL_SELECT_ALL_USERS = "SELECT id, nickname, level, exp, hashed_password FROM users"
+_SQL_SELECT_USER = "SELECT id, nickname, level, exp, hashed_password FROM users WHERE id = ?"
+_SQL_USER_EXISTS = "SELECT 1 FROM users WHERE id = ? UNION ALL SELECT 1 FROM detection_results WHERE user_id = ? LIMIT 1"
+_SQL_INSERT_USER = "INSERT INTO users (id, nickname, level, exp, hashed_password, updated_at) VALUES (?, ?, ?, ?, ?, ?)"
+_SQL_UPSERT_USER = (
+    "INSERT INTO users (id, nickname, level, exp, hashed_password, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET nickname = excluded.nickname, level = excluded.level, exp = excluded.exp, "
+    "hashed_password = excluded.hashed_password, updated_at = excluded.updated_at"
+)
+_SQL_SELECT_DETECTION = "SELECT grid FROM detection_results WHERE user_id = ?"
+_SQL_DATA_VERSION = (
+    "SELECT (SELECT updated_at FROM users WHERE id = ?), (SELECT updated_at FROM detection_results WHERE user_id = ?)"
+)
+_SQL_UPSERT_DETECTION = (
+    "INSERT INTO detection_results (user_id, grid, updated_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET grid = excluded.grid, updated_at = excluded.updated_at"
+)
+
+
+class SqliteBackend(StorageBackend):
+    """
+    WAL 모드 SQLite 저장소. 여러 프로세스(인증/탐지 서버)가 같은 파일을 열어도 읽기는 쓰기를
+    막지 않습니다. SQL 문은 모듈 상수로 고정되어 있어 커넥션마다 sqlite3의 문장 캐시로 재사용됩니다.
+    """
+    name = "sqlite"
+
+    def __init__(self, db_path: str, pool_size: int = SQLITE_POOL_SIZE):
+        self.db_path = db_path
+        db_parent = os.path.dirname(db_path)
+        if db_parent:
+            os.makedirs(db_parent, exist_ok=True)
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(pool_size, 1)):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL에서는 커밋마다 fsync하지 않아도 손상되지 않음
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            with conn:  # 블록 단위로 커밋/롤백
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+    @staticmethod
+    def _user_row(user_id: str, data: dict) -> tuple:
+        return (user_id, data["nickname"], data["level"], data["exp"], data["hashed_password"], time.time())
+
+    def load_all_users(self) -> Dict[str, dict]:
+        with self._connection() as conn:
+            rows = conn.execute(_SQL_SELECT_ALL_USERS).fetchall()
+        return {row[0]: dict(zip(_USER_COLUMNS, row)) for row in rows}
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        with self._connection() as conn:
+            row = conn.execute(_SQL_SELECT_USER, (user_id,)).fetchone()
+        return dict(zip(_USER_COLUMNS, row)) if row else None
+
+    def user_exists(self, user_id: str) -> bool:
+        with self._connection() as conn:
+            return conn.execute(_SQL_USER_EXISTS, (user_id, user_id)).fetchone() is not None
+
+    def create_user(self, user_id: str, data: dict):
+        try:
+            with self._connection() as conn:
+                conn.execute(_SQL_INSERT_USER, self._user_row(user_id, data))
+        except sqlite3.IntegrityError:
+            raise UserAlreadyExists(user_id)
+
+    def save_users(self, batch: List[Tuple[str, dict]]):
+        with self._connection() as conn:
+            conn.executemany(_SQL_UPSERT_USER, [self._user_row(user_id, data) for user_id, data in batch])
+
+    def get_detection_results(self, user_id: str) -> Optional[dict]:
+        with self._connection() as conn:
+            row = conn.execute(_SQL_SELECT_DETECTION, (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_detection_results(self, user_id: str, grid: dict):
+        grid_json = json.dumps(grid, ensure_ascii=False, separators=(',', ':'))
+        with self._connection() as conn:
+            conn.execute(_SQL_UPSERT_DETECTION, (user_id, grid_json, time.time()))
+
+    def save_detection_results_batch(self, batch: List[Tuple[str, dict]]):
+        now = time.time()
+        rows = [(user_id, json.dumps(grid, ensure_ascii=False, separators=(',', ':')), now) for user_id, grid in batch]
+        with self._connection() as conn:
+            conn.executemany(_SQL_UPSERT_DETECTION, rows)
+
+    def detection_results_location(self, user_id: str) -> str:
+        return f"{self.db_path}#detection_results/{user_id}"
+
+    def data_version(self, user_id: str) -> tuple:
+        with self._connection() as conn:
+            return tuple(conn.execute(_SQL_DATA_VERSION, (user_id, user_id)).fetchone())
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def create_storage(db_dir: str, backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """설정된 저장소를 만듭니다. SQLite 파일은 db_dir 안에 두어 두 서버가 같은 파일을 보도록 합니다."""
+    if backend == "json":
+        return JsonDirBackend(db_dir)
+    if backend == "sqlite":
+        return SqliteBackend(os.environ.get("SQLITE_DB_PATH", os.path.join(db_dir, SQLITE_FILENAME)))
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'. Use 'json' or 'sqlite'.")
+
+
+# --- 마이그레이션: db/ 폴더 -> SQLite ---
+def migrate_json_dir_to_sqlite(db_dir: str, sqlite_path: str) -> Tuple[int, int]:
+    """기존 db/<ID>/*.json 을 SQLite로 옮깁니다. 여러 번 실행해도 같은 결과가 되도록 upsert 합니다."""
+    source = JsonDirBackend(db_dir)
+    target = SqliteBackend(sqlite_path)
+    try:
+        users = source.load_all_users()
+        target.save_users(list(users.items()))
+        detections = 0
+        for folder_name in os.listdir(db_dir):
+            try:
+                grid = source.get_detection_results(folder_name)
+            except Exception as e:
+                print(f"Warning: Could not read {DETECTION_DATA_FILENAME} in '{folder_name}': {e}. Skipping.")
+                continue
+            if grid is not None:
+                target.save_detection_results(folder_name, grid)
+                detections += 1
+        return len(users), detections
+    finally:
+        target.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="POP_KHUTON 저장소 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="db/ 폴더의 JSON 데이터를 SQLite로 옮깁니다.")
+    migrate.add_argument("--db-dir", default="./Login/db")
+    migrate.add_argument("--sqlite-path", default=None, help=f"기본값: <db-dir>/{SQLITE_FILENAME}")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        sqlite_path = args.sqlite_path or os.path.join(args.db_dir, SQLITE_FILENAME)
+        users, detections = migrate_json_dir_to_sqlite(args.db_dir, sqlite_path)
+        print(f"Migrated {users} users and {detections} detection results from '{args.db_dir}' to '{sqlite_path}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# processCrop의 모듈과 Login 폴더의 auth 모듈을 서버를 실행할 때처럼 최상위 이름으로 import
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Login"))
+sys.path.insert(0, ROOT)
+
+# LoginServer는 import할 때 데이터 폴더를 만들고 설정을 읽으므로, 테스트용 임시 폴더와 빠른 bcrypt를 먼저 지정
+os.environ.setdefault("AUTH_DB_DIR", tempfile.mkdtemp(prefix="auth-db-"))
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("SESSION_SECRET", "test-secret")
+
+
+@pytest.fixture(scope="session")
+def auth_client():
+    """auth 앱의 lifespan은 종료 시 bcrypt 스레드 풀을 닫으므로 세션에서 한 번만 실행합니다."""
+    from fastapi.testclient import TestClient
+    import LoginServer
+    with TestClient(LoginServer.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def detect_module(tmp_path_factory):
+    """detect.py는 import할 때 ./Login/db 기준으로 저장소를 만들므로 임시 폴더에서 import합니다."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("detect"))
+    try:
+        import detect
+        yield detect
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,41 @@
+"""실제 모델 대신 쓰는 추론 백엔드. 워커 프로세스(spawn)에도 넘기므로 모듈 최상위에 둡니다."""
+import time
+from typing import List, Sequence
+
+import numpy as np
+
+from backends import InferenceBackend, ModelSpec
+from inference import Detections
+
+
+class FakeBackend(InferenceBackend):
+    """입력마다 왼쪽 위에 박스 하나를 돌려줍니다. spec.path가 "fail"이면 predict가 실패하고, "slow"면 0.5초 걸립니다."""
+
+    def __init__(self, spec: ModelSpec):
+        self.spec = spec
+        self.names = {0: "crop"}
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[Detections]:
+        if self.spec.path == "fail":
+            raise RuntimeError("predict failed")
+        if self.spec.path == "slow":
+            time.sleep(0.5)
+        return [
+            Detections(
+                xyxy=np.array([[10, 10, 50, 50]], dtype=np.float32),
+                conf=np.array([0.9], dtype=np.float32),
+                cls=np.array([0], dtype=np.int32),
+            )
+            for _ in images
+        ]
+
+    def warm_up(self, batch_sizes: Sequence[int] = (1,)):
+        pass
+
+
+def load_fake_backend(spec: ModelSpec) -> FakeBackend:
+    return FakeBackend(spec)
+
+
+def fake_spec(path: str = "fake.pt", imgsz: int = 64) -> ModelSpec:
+    return ModelSpec(version="fake", backend="fake", path=path, imgsz=imgsz)
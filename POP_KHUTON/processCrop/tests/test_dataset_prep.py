@@ -0,0 +1,77 @@
+import json
+import os
+
+import numpy as np
+import yaml
+from PIL import Image
+
+from dataset_prep import (
+    PrepareReport, collect_samples, deduplicate, load_class_names, prepare, resized_shape, validate_label_file,
+)
+
+NAMES = ["v1_tomato", "v2_tomato"]
+
+
+def _image(path, size=(80, 40), color=(0, 128, 0)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("RGB", size, color).save(path)
+
+
+def _text(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _layout(root):
+    dataset, crops, uploads = (str(root / name) for name in ("dataset", "crops", "uploads"))
+    _image(f"{dataset}/images/val/a.png", color=(1, 2, 3))
+    _text(f"{dataset}/labels/val/a.txt", "0 0.5 0.5 0.2 0.2\n")
+    _image(f"{dataset}/images/train/b.png", color=(1, 2, 3))  # val과 같은 내용
+    _image(f"{dataset}/images/train/c.png", color=(9, 9, 9))
+    _text(f"{dataset}/labels/train/c.txt", "1 0.5 0.5 0.4 0.4\n7 0.5 0.5 0.1 0.1\n")
+    _image(f"{crops}/v2_tomato.png", color=(50, 50, 50))
+    _image(f"{crops}/weed.png", color=(60, 60, 60))
+    _image(f"{uploads}/alice/shot.png", color=(70, 70, 70))  # 라벨 없는 업로드는 제외
+    return dataset, crops, uploads
+
+
+def test_label_validation_drops_bad_rows():
+    import tempfile
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("0 0.5 0.5 0.1 0.1\n0 0.5 0.5 0.1 0.1\n2 0.5 0.5 0.1 0.1\n0 1.5 0.5 0.1 0.1\n0 0.5 0.5\nx 1 1 1 1\n\n")
+    labels, errors = validate_label_file(f.name, num_classes=2)
+    os.unlink(f.name)
+    assert labels.shape == (1, 5)
+    assert [e.split(": ", 1)[1].split(" ")[0] for e in errors] == ["duplicate", "class", "box", "expected", "non-numeric"]
+
+
+def test_collect_prefers_val_and_skips_duplicates(tmp_path):
+    report = PrepareReport()
+    samples = deduplicate(collect_samples(*_layout(tmp_path), NAMES, report), report)
+    assert [(os.path.basename(s.source), s.split, s.kind) for s in samples] == [
+        ("a.png", "val", "labeled"), ("c.png", "train", "labeled"), ("v2_tomato.png", "train", "crop"),
+    ]
+    assert report.duplicates == 1
+    assert report.unlabeled_uploads == 1
+    assert len(report.label_errors) == 2  # c.txt의 클래스 7, weed.png 이름
+
+
+def test_prepare_writes_resized_arrays_and_reuses_them(tmp_path):
+    report = PrepareReport()
+    samples = deduplicate(collect_samples(*_layout(tmp_path), NAMES, report), report)
+    output = str(tmp_path / "prepared")
+    prepare(samples, output, NAMES, imgsz=32, workers=1, report=report)
+
+    manifest = json.load(open(os.path.join(output, "manifest.json")))
+    entry = manifest["splits"]["val"][0]
+    array = np.load(os.path.join(output, "images", "val", entry["name"] + ".npy"))
+    assert array.shape == (16, 32, 3) and entry["shape"] == [16, 32]
+    assert array[0, 0].tolist() == [3, 2, 1]  # BGR
+    assert load_class_names(os.path.join(output, "data.yaml")) == NAMES
+    assert yaml.safe_load(open(os.path.join(output, "data.yaml")))["train"] == "images/train"
+
+    again = PrepareReport()
+    prepare(samples, output, NAMES, imgsz=32, workers=1, report=again)
+    assert again.reused == 3
+    assert resized_shape(80, 40, 32) == (32, 16)
@@ -0,0 +1,76 @@
+import asyncio
+
+from detection_writer import DetectionWriter
+from history_store import DetectionHistoryStore
+from storage import JsonDirBackend
+
+
+class _RecordingStorage(JsonDirBackend):
+    def __init__(self, db_dir, failures=0):
+        super().__init__(db_dir)
+        self.batches = []
+        self.failures = failures
+
+    def save_detection_results_batch(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.batches.append([user_id for user_id, _ in batch])
+        super().save_detection_results_batch(batch)
+
+
+def _grid(stage):
+    return {"0-0": [{"sector_row": 0, "sector_col": 0, "Lv": f"v{stage}", "type": "tomato"}]}
+
+
+def test_results_for_the_same_user_are_coalesced(tmp_path):
+    storage = _RecordingStorage(str(tmp_path))
+    writer = DetectionWriter(storage, flush_delay=0.05)
+
+    async def scenario():
+        await writer.start()
+        for stage in (1, 2, 3):
+            writer.submit("alice", _grid(stage))
+        writer.submit("bob", _grid(1))
+        pending = writer.pending("alice")
+        await asyncio.sleep(0.2)
+        await writer.stop()
+        return pending
+
+    assert asyncio.run(scenario()) == _grid(3)
+    assert [sorted(batch) for batch in storage.batches] == [["alice", "bob"]]
+    assert storage.get_detection_results("alice") == _grid(3)
+    assert writer.stats()["coalesced"] == 2
+    assert writer.pending("alice") is None
+
+
+def test_failed_write_is_retried_without_overwriting_newer_results(tmp_path):
+    storage = _RecordingStorage(str(tmp_path), failures=1)
+    writer = DetectionWriter(storage, flush_delay=0)
+
+    async def scenario():
+        writer.submit("alice", _grid(1))
+        await writer.flush()
+        failed_pending = writer.pending("alice")
+        writer.submit("alice", _grid(2))
+        await writer.flush()
+        return failed_pending
+
+    assert asyncio.run(scenario()) == _grid(1)
+    assert storage.get_detection_results("alice") == _grid(2)
+    assert writer.failures == 1
+
+
+def test_every_result_is_appended_to_history(tmp_path):
+    storage = _RecordingStorage(str(tmp_path))
+    history = DetectionHistoryStore(str(tmp_path))
+    writer = DetectionWriter(storage, flush_delay=0, history=history)
+
+    async def scenario():
+        for i, stage in enumerate((1, 2, 4)):
+            writer.submit("alice", _grid(stage), timestamp=1000.0 + i)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert len(storage.batches) == 1
+    assert history.summary("alice")["snapshots"] == 3
@@ -0,0 +1,86 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from frame_stream import FRAME_HEADER, FrameDiffer, FrameReader, FrameStreamError, SectorSmoother, frame_signature
+
+
+def _framed(*payloads):
+    return b"".join(FRAME_HEADER.pack(len(p)) + p for p in payloads)
+
+
+def _jpeg(gray):
+    buf = io.BytesIO()
+    Image.new("RGB", (320, 240), (gray, gray, gray)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def _grid(*objects):
+    grid = {"0-0": [], "0-1": []}
+    for key, lv in objects:
+        row, col = (int(x) for x in key.split("-"))
+        grid[key].append({"sector_row": row, "sector_col": col, "Lv": lv, "type": "tomato"})
+    return grid
+
+
+def test_reader_reassembles_frames_across_chunk_boundaries():
+    body = _framed(b"first", b"second-frame", b"x")
+    reader = FrameReader(max_frame_bytes=64)
+    frames = []
+    for i in range(0, len(body), 3):
+        frames.extend(reader.feed(body[i:i + 3]))
+    reader.close()
+    assert frames == [b"first", b"second-frame", b"x"]
+
+
+def test_reader_rejects_bad_lengths_and_truncated_streams():
+    with pytest.raises(FrameStreamError):
+        FrameReader(max_frame_bytes=4).feed(_framed(b"too long"))
+    with pytest.raises(FrameStreamError):
+        FrameReader(max_frame_bytes=4).feed(FRAME_HEADER.pack(0))
+    reader = FrameReader(max_frame_bytes=64)
+    assert reader.feed(_framed(b"whole")[:-1]) == []
+    with pytest.raises(FrameStreamError):
+        reader.close()
+
+
+def test_signature_is_small_grayscale_and_rejects_non_images():
+    signature = frame_signature(_jpeg(100))
+    assert signature.shape == (32, 32)
+    assert abs(float(signature.mean()) - 100) < 3
+    with pytest.raises(ValueError):
+        frame_signature(b"not an image")
+
+
+def test_differ_skips_similar_frames_until_limit():
+    differ = FrameDiffer(threshold=5.0, max_skipped=2)
+    base = np.full((32, 32), 100, dtype=np.int16)
+    decisions = [differ.should_infer(base + d) for d in (0, 1, 2, 3, 30)]
+    assert decisions == [True, False, False, True, True]  # 두 장 건너뛴 뒤 한 번 추론, 큰 변화는 바로 추론
+    differ.reset()
+    assert differ.should_infer(base + 30)
+
+
+def test_differ_compares_against_last_inferred_frame():
+    differ = FrameDiffer(threshold=5.0, max_skipped=100)
+    base = np.full((32, 32), 100, dtype=np.int16)
+    decisions = [differ.should_infer(base + d) for d in (0, 2, 4, 6)]
+    assert decisions == [True, False, False, True]  # 조금씩 변해도 누적 차이가 넘으면 추론
+
+
+def test_smoother_ignores_single_frame_flicker():
+    smoother = SectorSmoother(window=3)
+    steady = _grid(("0-0", "v1"))
+    assert smoother.push(steady) == steady
+    assert smoother.push(steady) == steady
+    flicker = _grid(("0-0", "v1"), ("0-1", "v2"))
+    assert smoother.push(flicker) == steady
+    assert smoother.push(_grid()) == steady  # 한 프레임에서만 사라진 객체도 유지
+    assert smoother.push(_grid()) == _grid()  # 창의 과반에서 사라지면 반영
+
+
+def test_smoother_with_window_one_passes_through():
+    grid = _grid(("0-0", "v3"), ("0-0", "v3"))
+    assert SectorSmoother(window=1).push(grid) == grid
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from model_doubles import FakeBackend, fake_spec
+
+
+@pytest.fixture
+def ws_client(detect_module, monkeypatch):
+    # lifespan(모델 로드) 없이 추론 가능한 상태로 만듦. 아래 테스트는 추론 전에 끝나는 메시지만 보냄
+    monkeypatch.setattr(detect_module, "model_state", "ready")
+    monkeypatch.setattr(detect_module, "inference_backend", FakeBackend(fake_spec()))
+    return TestClient(detect_module.app)
+
+
+def test_text_message_closes_with_unsupported_data(ws_client):
+    with ws_client.websocket_connect("/detect_ws/alice?x_divisions=2&y_divisions=2") as ws:
+        ws.send_text("hello")
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1003
+
+
+def test_undecodable_frame_is_reported_per_frame(ws_client):
+    with ws_client.websocket_connect("/detect_ws/alice?x_divisions=2&y_divisions=2") as ws:
+        ws.send_bytes(b"not an image")
+        first = ws.receive_json()
+        ws.send_bytes(b"still not an image")
+        second = ws.receive_json()
+    assert (first["frame"], first["status"]) == (1, "invalid")
+    assert (second["frame"], second["status"]) == (2, "invalid")
+
+
+def test_model_not_ready_closes_with_try_again_later(detect_module, monkeypatch):
+    monkeypatch.setattr(detect_module, "model_state", "loading")
+    client = TestClient(detect_module.app)
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/detect_ws/alice?x_divisions=2&y_divisions=2") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1013
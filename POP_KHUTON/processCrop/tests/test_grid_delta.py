@@ -0,0 +1,30 @@
+import json
+
+from grid_delta import GridDeltaTracker
+
+
+def _grid(lv):
+    return {"0-0": [{"sector_row": 0, "sector_col": 0, "Lv": lv, "type": "tomato"}], "0-1": []}
+
+
+def test_unchanged_grid_does_not_consume_a_version():
+    tracker = GridDeltaTracker()
+    published = []
+    for lv in ("Lv1", "Lv1", "Lv2", "Lv2", "Lv3"):
+        version, changed = tracker.update("user", _grid(lv), 1, 2)
+        if changed is None:
+            published.append({"version": version})
+        elif changed:
+            published.append(json.loads(GridDeltaTracker.delta_json(version, changed)))
+
+    assert [event["version"] for event in published] == [1, 2, 3]
+    for previous, event in zip(published, published[1:]):
+        assert event["base"] == previous["version"]
+
+
+def test_dimension_change_requires_snapshot():
+    tracker = GridDeltaTracker()
+    tracker.update("user", _grid("Lv1"), 1, 2)
+    version, changed = tracker.update("user", {"0-0": []}, 1, 1)
+    assert (version, changed) == (2, None)
+    assert json.loads(tracker.snapshot_json("user"))["version"] == 2
@@ -0,0 +1,72 @@
+from history_store import DetectionHistoryStore, stage_number
+
+DAY = 86400.0
+NOW = 1_700_000_000.0
+
+
+def _obj(row, col, stage, crop="tomato"):
+    return {"sector_row": row, "sector_col": col, "Lv": f"v{stage}", "type": crop}
+
+
+def _grid(*objects):
+    grid = {"0-0": [], "0-1": [], "1-0": [], "1-1": []}
+    for obj in objects:
+        grid[f"{obj['sector_row']}-{obj['sector_col']}"].append(obj)
+    return grid
+
+
+def _filled(tmp_path):
+    store = DetectionHistoryStore(str(tmp_path))
+    store.append("alice", [
+        (NOW - 10 * DAY, _grid(_obj(0, 0, 1), _obj(1, 1, 2, "pepper"))),
+        (NOW - 5 * DAY, _grid(_obj(0, 0, 2), _obj(1, 1, 3, "pepper"))),
+    ])
+    store.append("alice", [
+        (NOW - 2 * DAY, _grid(_obj(0, 0, 4), _obj(0, 1, 4))),
+        (NOW - 1 * DAY, _grid(_obj(0, 0, 4), _obj(1, 1, 4, "pepper"))),
+    ])
+    return store
+
+
+def test_stage_counts_over_a_time_range(tmp_path):
+    store = _filled(tmp_path)
+    recent = store.stage_counts("alice", days=3, now=NOW)
+    assert recent["snapshots"] == 2
+    assert recent["sectors"]["0-0"] == {"v1": 0, "v2": 0, "v3": 0, "v4": 2}
+    assert recent["sectors"]["1-1"]["v4"] == 1
+
+    everything = store.stage_counts("alice", days=30, now=NOW)
+    assert everything["snapshots"] == 4
+    assert everything["sectors"]["0-0"] == {"v1": 1, "v2": 1, "v3": 0, "v4": 2}
+
+    peppers = store.stage_counts("alice", days=30, crop="pepper", now=NOW)
+    assert list(peppers["sectors"]) == ["1-1"]
+    assert store.stage_counts("alice", days=30, crop="melon", now=NOW)["sectors"] == {}
+
+
+def test_stage_reached_uses_first_and_last_sighting(tmp_path):
+    store = _filled(tmp_path)
+    reached = store.stage_reached("alice", stage=4, now=NOW)["sectors"]
+    assert sorted(reached) == ["0-0", "0-1", "1-1"]
+    assert reached["0-0"]["first_reached"] == NOW - 2 * DAY
+    assert reached["0-0"]["last_seen"] == NOW - 1 * DAY
+    assert reached["0-0"]["seconds_since"] == 2 * DAY
+    assert list(store.stage_reached("alice", stage=4, sector="1-1", now=NOW)["sectors"]) == ["1-1"]
+
+
+def test_other_process_appends_are_picked_up(tmp_path):
+    reader = _filled(tmp_path)
+    assert reader.summary("alice")["snapshots"] == 4
+    DetectionHistoryStore(str(tmp_path)).append("alice", [(NOW, _grid(_obj(1, 0, 1, "cabbage")))])
+    summary = reader.summary("alice")
+    assert (summary["snapshots"], summary["objects"], summary["last"]) == (5, 9, NOW)
+    assert summary["crops"] == ["tomato", "pepper", "cabbage"]
+
+
+def test_timestamps_stay_monotonic_and_unknown_users_are_empty(tmp_path):
+    store = DetectionHistoryStore(str(tmp_path))
+    store.append("alice", [(NOW, _grid(_obj(0, 0, 1))), (NOW - 100, _grid(_obj(0, 0, 1)))])
+    assert store.summary("alice")["last"] == NOW
+    assert store.summary("nobody") == {"snapshots": 0, "objects": 0, "first": None, "last": None, "crops": []}
+    assert store.stage_counts("nobody", days=1, now=NOW)["snapshots"] == 0
+    assert stage_number("v3") == 3
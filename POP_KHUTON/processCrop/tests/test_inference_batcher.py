@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+import pytest
+
+from inference import Detections, InferenceBatcher, InferenceQueueFull
+
+
+def _echo_batch(calls):
+    def predict_batch(images):
+        calls.append(list(images))
+        return [Detections.empty() for _ in images]
+    return predict_batch
+
+
+def test_concurrent_requests_share_one_predict_call():
+    calls = []
+
+    async def scenario():
+        batcher = InferenceBatcher(_echo_batch(calls), max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+    assert len(results) == 5
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    calls = []
+
+    async def scenario():
+        batcher = InferenceBatcher(_echo_batch(calls), max_batch_size=3, max_wait_ms=50)
+        await batcher.start()
+        try:
+            await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+        finally:
+            await batcher.stop()
+
+    asyncio.run(scenario())
+    assert [len(c) for c in calls] == [3, 3, 1]
+    assert sum(calls, []) == list(range(7))
+
+
+def test_full_queue_rejects_immediately():
+    release = threading.Event()
+
+    def blocking(images):
+        release.wait(5)
+        return [Detections.empty() for _ in images]
+
+    async def scenario():
+        batcher = InferenceBatcher(blocking, max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+        await batcher.start()
+        try:
+            first = asyncio.ensure_future(batcher.submit("a"))
+            await asyncio.sleep(0.05)  # 첫 요청은 predict 중, 대기열은 비어 있음
+            queued = [asyncio.ensure_future(batcher.submit(x)) for x in ("b", "c")]
+            await asyncio.sleep(0)
+            with pytest.raises(InferenceQueueFull):
+                await batcher.submit("d")
+            release.set()
+            await asyncio.gather(first, *queued)
+        finally:
+            release.set()
+            await batcher.stop()
+
+    asyncio.run(scenario())
+
+
+def test_predict_error_fails_only_that_batch():
+    def flaky(images):
+        if "bad" in images:
+            raise ValueError("bad image")
+        return [Detections.empty() for _ in images]
+
+    async def scenario():
+        batcher = InferenceBatcher(flaky, max_batch_size=1, max_wait_ms=0)
+        await batcher.start()
+        try:
+            return await asyncio.gather(batcher.submit("bad"), batcher.submit("good"), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    bad, good = asyncio.run(scenario())
+    assert isinstance(bad, ValueError)
+    assert isinstance(good, Detections)
+
+
+def test_submit_before_start_is_an_error():
+    async def scenario():
+        await InferenceBatcher(_echo_batch([])).submit("a")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario())
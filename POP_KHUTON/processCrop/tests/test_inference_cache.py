@@ -0,0 +1,132 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from inference import Detections
+from inference_cache import CachedDetections, InferenceCache
+
+
+def _entry(boxes=1):
+    return CachedDetections(
+        Detections(
+            xyxy=np.zeros((boxes, 4), dtype=np.float32),
+            conf=np.ones((boxes,), dtype=np.float32),
+            cls=np.zeros((boxes,), dtype=np.int32),
+        ),
+        640,
+        480,
+    )
+
+
+class _Compute:
+    def __init__(self):
+        self.calls = 0
+        self.gate = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.gate.wait()
+        return _entry()
+
+
+def test_concurrent_misses_are_coalesced():
+    cache = InferenceCache("v1")
+
+    async def scenario():
+        compute = _Compute()
+        key = cache.key_for(b"image")
+        waiters = [asyncio.ensure_future(cache.get_or_compute(key, compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        compute.gate.set()
+        results = await asyncio.gather(*waiters)
+        again = await cache.get_or_compute(key, compute)
+        return compute.calls, results, again
+
+    calls, results, again = asyncio.run(scenario())
+    assert calls == 1
+    assert all(r is results[0] for r in results) and again is results[0]
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 4, 1)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    cache = InferenceCache("v1")
+
+    async def scenario():
+        compute = _Compute()
+        key = cache.key_for(b"image")
+        leader = asyncio.ensure_future(cache.get_or_compute(key, compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.get_or_compute(key, compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        compute.gate.set()
+        result = await follower
+        return leader.cancelled(), result, len(cache)
+
+    leader_cancelled, result, entries = asyncio.run(scenario())
+    assert leader_cancelled
+    assert len(result.detections) == 1
+    assert entries == 1
+
+
+def test_failed_compute_is_not_cached():
+    cache = InferenceCache("v1")
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise RuntimeError("model error")
+
+    async def scenario():
+        key = cache.key_for(b"image")
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.get_or_compute(key, failing)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert len(cache) == 0
+
+
+def test_keys_depend_on_model_version_and_variant():
+    a, b = InferenceCache("v1"), InferenceCache("v2")
+    assert a.key_for(b"x") != b.key_for(b"x")
+    assert a.key_for(b"x") != a.key_for(b"x", "sliced-640-0.2")
+    assert a.key_for(b"x") == a.key_for(b"x")
+
+
+def test_lru_eviction_by_bytes():
+    cache = InferenceCache("v1", max_bytes=_entry().nbytes * 2)
+
+    async def scenario():
+        async def compute():
+            return _entry()
+        for name in (b"a", b"b"):
+            await cache.get_or_compute(cache.key_for(name), compute)
+        await cache.get_or_compute(cache.key_for(b"a"), compute)  # a를 최근 사용으로
+        await cache.get_or_compute(cache.key_for(b"c"), compute)
+
+    asyncio.run(scenario())
+    assert cache.evictions == 1
+    assert cache.key_for(b"b") not in cache._entries
+    assert cache.key_for(b"a") in cache._entries
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    async def scenario(cache, compute):
+        return await cache.get_or_compute(cache.key_for(b"image"), compute)
+
+    async def compute():
+        return _entry(boxes=3)
+
+    async def must_not_run():
+        raise AssertionError("should be served from disk")
+
+    first = InferenceCache("v1", disk_dir=str(tmp_path))
+    asyncio.run(scenario(first, compute))
+    second = InferenceCache("v1", disk_dir=str(tmp_path))
+    entry = asyncio.run(scenario(second, must_not_run))
+    assert len(entry.detections) == 3
+    assert (entry.img_width, entry.img_height) == (640, 480)
+    assert second.disk_hits == 1
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import socket
+
+import pytest
+
+import invalidation
+from invalidation import InvalidationBus, encode_keys, parse_address, parse_peers
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_addresses_are_parsed_or_rejected():
+    assert parse_address(":8101") == ("127.0.0.1", 8101)
+    assert parse_peers("10.0.0.1:1, ,:2") == [("10.0.0.1", 1), ("127.0.0.1", 2)]
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+    assert InvalidationBus.from_config() is None
+
+
+def test_keys_are_split_to_fit_a_datagram(monkeypatch):
+    monkeypatch.setattr(invalidation, "MAX_DATAGRAM_BYTES", 128)
+    keys = [f"사용자{i:03d}" for i in range(40)]
+    datagrams = encode_keys(keys)
+    assert len(datagrams) > 1
+    assert all(len(d) <= 128 for d in datagrams)
+    assert [k for d in datagrams for k in json.loads(d)["keys"]] == keys
+
+
+def test_published_keys_reach_subscribers_and_bad_datagrams_are_counted():
+    address = ("127.0.0.1", _free_port())
+
+    async def scenario():
+        receiver = InvalidationBus(listen=address)
+        sender = InvalidationBus(peers=[address])
+        got = []
+        arrived = asyncio.Event()
+
+        def on_key(key):
+            got.append(key)
+            if len(got) == 2:
+                arrived.set()
+
+        receiver.subscribe(on_key)
+        await receiver.start()
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as raw:
+                raw.sendto(b"not json", address)
+            sender.publish(["alice", "bob"])
+            await asyncio.wait_for(arrived.wait(), timeout=2)
+        finally:
+            receiver.stop()
+            sender.stop()
+        return got, receiver.stats(), sender.stats()
+
+    got, received, sent = asyncio.run(scenario())
+    assert got == ["alice", "bob"]
+    assert (received["received"], received["malformed"]) == (2, 1)
+    assert sent["sent"] == 2
@@ -0,0 +1,78 @@
+import random
+
+from leaderboard import IndexableSkipList, Leaderboard
+
+
+def _expected(users):
+    ordered = sorted(users.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+    return [(rank, user_id, level, exp) for rank, (user_id, (level, exp)) in enumerate(ordered, start=1)]
+
+
+def test_rank_and_top_follow_level_exp_then_id():
+    board = Leaderboard()
+    board.rebuild([("carol", 2, 10), ("alice", 3, 0), ("bob", 2, 10), ("dave", 2, 50)])
+    assert board.top(10) == [(1, "alice", 3, 0), (2, "dave", 2, 50), (3, "bob", 2, 10), (4, "carol", 2, 10)]
+    assert board.rank("bob") == 3
+    assert board.rank("nobody") is None
+
+
+def test_top_with_offset_returns_a_range():
+    board = Leaderboard()
+    board.rebuild((f"u{i:02d}", 1, i) for i in range(20))
+    assert [entry[0] for entry in board.top(3, offset=5)] == [6, 7, 8]
+    assert [entry[1] for entry in board.top(3, offset=5)] == ["u14", "u13", "u12"]
+    assert board.top(5, offset=18) == [(19, "u01", 1, 1), (20, "u00", 1, 0)]
+    assert board.top(5, offset=20) == []
+
+
+def test_updates_move_only_the_changed_user():
+    board = Leaderboard()
+    board.rebuild([("alice", 1, 0), ("bob", 1, 5)])
+    board.update("alice", 2, 0)
+    assert board.rank("alice") == 1
+    board.update("alice", 2, 0)  # 같은 값이면 그대로
+    assert len(board) == 2
+    board.remove("alice")
+    assert board.rank("alice") is None
+    assert board.top(5) == [(1, "bob", 1, 5)]
+
+
+def test_matches_sorted_list_under_random_updates():
+    rng = random.Random(7)
+    board = Leaderboard()
+    users = {}
+    for _ in range(2000):
+        user_id = f"u{rng.randrange(200)}"
+        if users and rng.random() < 0.1:
+            users.pop(user_id, None)
+            board.remove(user_id)
+            continue
+        users[user_id] = (rng.randrange(5), rng.randrange(100))
+        board.update(user_id, *users[user_id])
+    expected = _expected(users)
+    assert board.top(len(users)) == expected
+    assert all(board.rank(user_id) == rank for rank, user_id, _, _ in expected)
+
+
+def test_skip_list_index_and_iteration():
+    skip = IndexableSkipList(seed=1)
+    for key in (5, 1, 3, 9, 7):
+        skip.insert(key)
+    assert [skip.index(k) for k in (1, 3, 5, 7, 9)] == [0, 1, 2, 3, 4]
+    assert list(skip.iter_from(2)) == [5, 7, 9]
+    assert skip.remove(3) and not skip.remove(3)
+    assert skip.index(3) is None and len(skip) == 4
+
+
+def test_endpoints_reflect_updates(auth_client):
+    user_id = f"leader-{random.randrange(10**8)}"
+    assert auth_client.post("/register/", data={"id": user_id, "password": "pw", "nickname": "n"}).status_code == 201
+    token = auth_client.post("/login/", data={"id": user_id, "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert auth_client.post("/users/update/", data={"level": 999}, headers=headers).status_code == 200
+
+    rank = auth_client.get(f"/leaderboard/rank/{user_id}").json()
+    top = auth_client.get("/leaderboard/top", params={"k": 1}).json()
+    assert (rank["rank"], rank["level"]) == (1, 999)
+    assert top[0]["id"] == user_id
+    assert auth_client.get("/leaderboard/rank/nobody-here").status_code == 404
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+from bench.load_bench import Recorder, Schedule, latency_summary, load_corpus, parse_mix
+
+
+def test_latency_summary_percentiles():
+    summary = latency_summary([i / 1000 for i in range(1, 101)])
+    assert summary["p50"] == pytest.approx(50.5)
+    assert summary["p99"] == pytest.approx(99.01)
+    assert summary["max"] == pytest.approx(100.0)
+    assert latency_summary([])["p50"] is None
+
+
+def test_recorder_counts_errors_and_statuses():
+    recorder = Recorder()
+    start = time.perf_counter()
+    recorder.record(start, 200, True)
+    recorder.record(start, 503, False)
+    recorder.record(start, None, False)
+    summary = recorder.summary()
+    assert (summary["requests"], summary["errors"]) == (3, 2)
+    assert summary["error_rate"] == pytest.approx(2 / 3)
+    assert summary["status_counts"] == {"200": 1, "503": 1, "exception": 1}
+
+
+def test_schedule_limits_requests_and_paces_open_loop():
+    async def slots(schedule, n):
+        return [await schedule.next_slot() for _ in range(n)]
+
+    closed = asyncio.run(slots(Schedule(duration=10, max_requests=2, rate=None), 3))
+    assert closed[2] is None and all(s is not None for s in closed[:2])
+
+    schedule = Schedule(duration=0.1, max_requests=None, rate=50)
+    open_loop = asyncio.run(slots(schedule, 6))
+    assert open_loop[5] is None  # 0.1초 동안 50rps면 다섯 번
+    assert [round(s - schedule.start, 3) for s in open_loop[:5]] == [0.0, 0.02, 0.04, 0.06, 0.08]
+
+
+def test_parse_mix_and_corpus(tmp_path):
+    assert parse_mix("login=1,me=10,leaderboard") == {"login": 1.0, "me": 10.0, "leaderboard": 1.0}
+    with pytest.raises(SystemExit):
+        parse_mix("login=1,delete=2")
+
+    (tmp_path / "a.jpg").write_bytes(b"jpg")
+    (tmp_path / "b.PNG").write_bytes(b"png")
+    (tmp_path / "notes.txt").write_text("skip")
+    assert load_corpus([str(tmp_path)], limit=10) == [("a.jpg", b"jpg", "image/jpeg"), ("b.PNG", b"png", "image/png")]
+    with pytest.raises(SystemExit):
+        load_corpus([str(tmp_path / "empty")], limit=10)
@@ -0,0 +1,49 @@
+import uuid
+
+
+def _register(client, password="pw"):
+    user_id = f"user-{uuid.uuid4().hex[:8]}"
+    response = client.post("/register/", data={"id": user_id, "password": password, "nickname": "n"})
+    assert response.status_code == 201
+    return user_id
+
+
+def _login(client, user_id, password="pw"):
+    response = client.post("/login/", data={"id": user_id, "password": password})
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+def test_token_with_invalid_form_id_is_400(auth_client):
+    user_id = _register(auth_client)
+    token = _login(auth_client, user_id)
+    response = auth_client.post(
+        "/users/update/", data={"id": "!!!", "level": 2}, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+
+
+def test_token_for_other_user_is_403(auth_client):
+    user_id = _register(auth_client)
+    other_id = _register(auth_client)
+    token = _login(auth_client, user_id)
+    response = auth_client.post(
+        "/users/update/", data={"id": other_id, "level": 2}, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+
+def test_token_updates_own_user(auth_client):
+    user_id = _register(auth_client)
+    token = _login(auth_client, user_id)
+    response = auth_client.post("/users/update/", data={"exp": 7}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["exp"] == 7
+
+
+def test_logout_revokes_token(auth_client):
+    user_id = _register(auth_client)
+    token = _login(auth_client, user_id)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert auth_client.post("/logout/", headers=headers).status_code == 204
+    assert auth_client.post("/users/update/", data={"exp": 1}, headers=headers).status_code == 401
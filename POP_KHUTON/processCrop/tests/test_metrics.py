@@ -0,0 +1,57 @@
+import pytest
+
+from metrics import Registry, counter, gauge, histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = histogram("stage_seconds", "stage time", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels(stage="decode").observe(value)
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP stage_seconds stage time", "# TYPE stage_seconds histogram"]
+    assert 'stage_seconds_bucket{stage="decode",le="0.1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="decode",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="decode",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{stage="decode"} 3.65' in lines
+    assert 'stage_seconds_count{stage="decode"} 4' in lines
+
+
+def test_counters_gauges_and_callback_values():
+    registry = Registry()
+    requests = counter("requests", "requests", ["result"], registry=registry)
+    requests.labels(result="ok").inc()
+    requests.labels(result="ok").inc(2)
+    depth = gauge("queue_depth", "depth", fn=lambda: 7, registry=registry)
+    gauge("broken", "not ready yet", fn=lambda: 1 / 0, registry=registry)
+    text = registry.render()
+    assert 'requests_total{result="ok"} 3' in text
+    assert "queue_depth 7" in text
+    assert "# TYPE broken gauge" in text and "\nbroken " not in text  # 읽기에 실패한 값은 생략
+    assert depth.kind == "gauge"
+
+
+def test_registering_again_returns_the_same_metric_with_new_callback():
+    registry = Registry()
+    first = gauge("subscribers", "subs", fn=lambda: 1, registry=registry)
+    second = gauge("subscribers", "subs", fn=lambda: 2, registry=registry)
+    assert second is first
+    assert "subscribers 2" in registry.render()
+    with pytest.raises(ValueError):
+        counter("subscribers", "subs", registry=registry)
+
+
+def test_labels_must_match_and_values_are_escaped():
+    registry = Registry()
+    errors = counter("errors", "errors", ["route"], registry=registry)
+    with pytest.raises(ValueError):
+        errors.labels(path="/x")
+    errors.labels(route='a"b\\c').inc()
+    assert 'errors_total{route="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_metrics_endpoint_records_route_templates(auth_client):
+    auth_client.get("/leaderboard/rank/nobody-metrics")
+    body = auth_client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/leaderboard/rank/{id}",status="404"}' in body
+    assert "nobody-metrics" not in body
@@ -0,0 +1,106 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from model_doubles import fake_spec, load_fake_backend
+from model_pool import ModelWorkerPool, PoolSaturated
+
+
+def _image():
+    return np.zeros((64, 64, 3), dtype=np.uint8)
+
+
+async def _started(path="fake.pt", **kwargs):
+    pool = ModelWorkerPool(fake_spec(path), num_workers=1, backend_loader=load_fake_backend, **kwargs)
+    await pool.start()
+    await pool.wait_ready(timeout=60)
+    return pool
+
+
+def test_submit_returns_detections_and_releases_segment():
+    async def scenario():
+        pool = await _started()
+        try:
+            detections = await pool.submit(_image())
+            return detections, dict(pool._workers[0].segments), pool.names, pool.capacity
+        finally:
+            await pool.stop()
+
+    detections, segments, names, capacity = asyncio.run(scenario())
+    assert len(detections) == 1
+    assert segments == {}
+    assert names == {0: "crop"}
+    assert capacity == 8
+
+
+def test_full_worker_queue_raises_pool_saturated():
+    async def scenario():
+        pool = await _started("slow", queue_size=1)
+        try:
+            first = asyncio.ensure_future(pool.submit(_image()))
+            await asyncio.sleep(0)
+            with pytest.raises(PoolSaturated):
+                await pool.submit(_image())
+            return await first
+        finally:
+            await pool.stop()
+
+    assert len(asyncio.run(scenario())) == 1
+
+
+def test_submit_before_workers_are_ready_is_rejected():
+    async def scenario():
+        pool = ModelWorkerPool(fake_spec(), num_workers=1, backend_loader=load_fake_backend)
+        with pytest.raises(PoolSaturated):
+            await pool.submit(_image())
+
+    asyncio.run(scenario())
+
+
+def test_predict_failure_fails_request_and_releases_segment():
+    async def scenario():
+        pool = await _started("fail")
+        try:
+            with pytest.raises(RuntimeError, match="predict failed"):
+                await pool.submit(_image())
+            return dict(pool._workers[0].segments)
+        finally:
+            await pool.stop()
+
+    assert asyncio.run(scenario()) == {}
+
+
+def test_cancelled_request_keeps_segment_until_worker_replies():
+    async def scenario():
+        pool = await _started("slow")
+        try:
+            task = asyncio.ensure_future(pool.submit(_image()))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            await asyncio.sleep(0)
+            held = len(pool._workers[0].segments)
+            for _ in range(50):
+                if not pool._workers[0].segments:
+                    break
+                await asyncio.sleep(0.05)
+            return held, len(pool._workers[0].segments)
+        finally:
+            await pool.stop()
+
+    held, remaining = asyncio.run(scenario())
+    assert held == 1
+    assert remaining == 0
+
+
+def test_load_failure_is_reported_by_wait_ready():
+    async def scenario():
+        pool = ModelWorkerPool(fake_spec("missing.pt"), num_workers=1)  # 기본 로더는 파일이 없으면 실패
+        await pool.start()
+        try:
+            with pytest.raises(RuntimeError, match="missing.pt|not found"):
+                await pool.wait_ready(timeout=60)
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
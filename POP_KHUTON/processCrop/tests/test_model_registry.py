@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backends import ModelSpec, OnnxRuntimeBackend, load_backend
+from model_registry import ModelRegistry
+
+
+def _spec(root, version, backend="onnx"):
+    path = os.path.join(root, version, "model.onnx")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return ModelSpec(version=version, backend=backend, path=path, imgsz=320, names={0: "v1_tomato"}, quantization="int8")
+
+
+def test_model_spec_round_trips_through_dict():
+    spec = ModelSpec(version="v1", backend="onnx", path="m.onnx", names={3: "v2_pepper"})
+    data = spec.to_dict()
+    assert data["names"] == {"3": "v2_pepper"}
+    assert ModelSpec.from_dict({**data, "registered_at": "ignored"}) == spec
+
+
+def test_register_activate_and_resolve_relative_paths(tmp_path):
+    root = str(tmp_path / "models")
+    registry = ModelRegistry(root)
+    assert registry.active() is None
+
+    first = _spec(root, "v1")
+    registry.register(first)
+    registry.register(_spec(root, "v2"))
+    assert registry.active_version() == "v1"  # 첫 등록만 자동 활성화
+
+    registry.set_active("v2")
+    moved = ModelRegistry(root)
+    assert moved.active().version == "v2"
+    assert moved.get("v1").path == first.path
+    assert moved.get("v1").names == {0: "v1_tomato"}
+    assert sorted(moved.list()) == ["v1", "v2"]
+    with pytest.raises(KeyError):
+        moved.set_active("v9")
+
+
+def test_load_backend_checks_file_and_backend(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_backend(ModelSpec(version="v", backend="onnx", path=str(tmp_path / "missing.onnx")))
+    spec = _spec(str(tmp_path), "v", backend="tensorrt")
+    with pytest.raises(ValueError):
+        load_backend(spec)
+
+
+def _onnx_postprocessor(imgsz=64):
+    # 세션 없이 입력 변환과 후처리만 확인 (onnxruntime이 없어도 실행 가능)
+    backend = object.__new__(OnnxRuntimeBackend)
+    backend.spec = ModelSpec(version="v", backend="onnx", path="", imgsz=imgsz)
+    backend.conf_threshold, backend.iou_threshold, backend.max_det = 0.25, 0.7, 300
+    return backend
+
+
+def test_onnx_input_is_rgb_nchw_float():
+    backend = _onnx_postprocessor()
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[..., 2] = 255  # BGR의 R 채널
+    batch = backend._to_input([image])
+    assert batch.shape == (1, 3, 64, 64) and batch.dtype == np.float32
+    assert batch[0, 0].max() == 1.0 and batch[0, 2].max() == 0.0
+    with pytest.raises(ValueError):
+        backend._to_input([np.zeros((32, 64, 3), dtype=np.uint8)])
+
+
+def test_onnx_postprocess_thresholds_and_nms():
+    backend = _onnx_postprocessor()
+    # (4 + 클래스 2, 앵커 3): cx, cy, w, h, 클래스 점수
+    output = np.array([
+        [20, 21, 50],
+        [20, 20, 50],
+        [10, 10, 10],
+        [10, 10, 10],
+        [0.9, 0.8, 0.1],
+        [0.0, 0.0, 0.2],
+    ], dtype=np.float32)
+    detections = backend._postprocess(output)
+    assert len(detections) == 1  # 두 번째 앵커는 첫 번째와 겹쳐 제거, 세 번째는 점수 미달
+    np.testing.assert_allclose(detections.xyxy[0], [15, 15, 25, 25])
+    assert detections.cls.tolist() == [0]
+
+
+def test_activate_requires_configured_admin_token(detect_module, monkeypatch):
+    client = TestClient(detect_module.app)
+    monkeypatch.setattr(detect_module, "MODEL_ADMIN_TOKEN", "")
+    assert client.post("/models/activate", data={"version": "v1"}, headers={"X-Admin-Token": ""}).status_code == 403
+
+    monkeypatch.setattr(detect_module, "MODEL_ADMIN_TOKEN", "s3cret")
+    assert client.post("/models/activate", data={"version": "v1"}, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.post("/models/activate", data={"version": "v1"}).status_code == 403
+    assert client.post("/models/activate", data={"version": "nope"}, headers={"X-Admin-Token": "s3cret"}).status_code == 404
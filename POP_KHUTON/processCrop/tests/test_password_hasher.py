@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from password_hasher import HasherBusy, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(max_workers=2, max_pending=1, rounds=4)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify_off_the_event_loop(hasher):
+    async def scenario():
+        hashed = await hasher.hash("secret")
+        return hashed, await hasher.verify("secret", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, ok, wrong = asyncio.run(scenario())
+    assert hashed.startswith("$2")
+    assert ok and not wrong
+    stats = hasher.stats()
+    assert (stats["hash"]["count"], stats["verify"]["count"], stats["in_flight"]) == (1, 2, 0)
+
+
+def test_admission_control_rejects_over_max_pending(hasher):
+    async def scenario():
+        return await asyncio.gather(hasher.hash("a"), hasher.hash("b"), return_exceptions=True)
+
+    first, second = asyncio.run(scenario())
+    assert isinstance(first, str)
+    assert isinstance(second, HasherBusy)
+    assert hasher.rejected == 1
+    assert hasher.in_flight == 0
+
+
+def test_login_with_wrong_password_is_401(auth_client):
+    assert auth_client.post("/register/", data={"id": "hasher-user", "password": "pw", "nickname": "n"}).status_code == 201
+    assert auth_client.post("/login/", data={"id": "hasher-user", "password": "nope"}).status_code == 401
+    stats = auth_client.get("/stats/password_hashing").json()
+    assert stats["verify"]["count"] >= 1
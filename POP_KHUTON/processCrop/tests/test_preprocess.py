@@ -0,0 +1,61 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inference import Detections
+from preprocess import LETTERBOX_PAD_VALUE, LetterboxPool
+
+
+def _encode(width, height, color, fmt="PNG"):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def test_wide_image_is_letterboxed_as_bgr_with_padding():
+    pool = LetterboxPool(imgsz=64)
+    frame = pool.decode(_encode(200, 100, (255, 0, 0)))
+    assert frame.image.shape == (64, 64, 3)
+    assert (frame.orig_width, frame.orig_height, frame.pad_x, frame.pad_y) == (200, 100, 0, 16)
+    assert frame.image[32, 32].tolist() == [0, 0, 255]  # RGB 빨강 -> BGR
+    assert (frame.image[:16] == LETTERBOX_PAD_VALUE).all()
+    assert (frame.image[48:] == LETTERBOX_PAD_VALUE).all()
+
+
+def test_large_jpeg_decodes_to_model_size():
+    pool = LetterboxPool(imgsz=64)
+    frame = pool.decode(_encode(2000, 1500, (0, 200, 0), fmt="JPEG"))
+    assert frame.image.shape == (64, 64, 3)
+    assert abs(frame.scale - 64 / 2000) < 1e-9
+    assert abs(int(frame.image[32, 32, 1]) - 200) <= 3
+
+
+def test_reused_buffer_has_no_leftover_pixels():
+    pool = LetterboxPool(imgsz=64, max_buffers=1)
+    first = pool.decode(_encode(64, 64, (10, 20, 30)))
+    pool.release(first)
+    second = pool.decode(_encode(64, 16, (200, 200, 200)))
+    assert second.image is first.image
+    assert pool.allocated == 1
+    assert (second.image[:24] == LETTERBOX_PAD_VALUE).all()
+
+
+def test_to_original_maps_boxes_back():
+    pool = LetterboxPool(imgsz=64)
+    frame = pool.decode(_encode(200, 100, (0, 0, 0)))
+    detections = Detections(
+        xyxy=np.array([[0, 16, 32, 32], [60, 40, 70, 70]], dtype=np.float32),
+        conf=np.ones(2, dtype=np.float32),
+        cls=np.zeros(2, dtype=np.int32),
+    )
+    boxes = frame.to_original(detections).xyxy
+    np.testing.assert_allclose(boxes[0], [0, 0, 100, 50], atol=1e-4)
+    np.testing.assert_allclose(boxes[1], [187.5, 75, 200, 100], atol=1e-4)  # 원본 크기로 잘림
+
+
+@pytest.mark.parametrize("contents", [b"", b"not an image", _encode(10, 10, (0, 0, 0))[:40]])
+def test_invalid_uploads_raise_value_error(contents):
+    with pytest.raises(ValueError):
+        LetterboxPool(imgsz=64).decode(contents)
@@ -0,0 +1,71 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backends import InferenceBackend
+from model_doubles import FakeBackend, fake_spec
+
+
+class CountingBackend(FakeBackend):
+    warm_up = InferenceBackend.warm_up  # FakeBackend는 warm-up을 건너뛰므로 실제 구현을 씀
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.batches = []
+
+    def predict_batch(self, images):
+        self.batches.append((len(images), images[0].shape, int(images[0][0, 0, 0])))
+        return super().predict_batch(images)
+
+
+def test_warm_up_runs_each_batch_size_on_padded_input():
+    backend = CountingBackend(fake_spec(imgsz=32))
+    backend.warm_up([1, 4])
+    assert backend.batches == [(1, (32, 32, 3), 114), (4, (32, 32, 3), 114)]
+
+
+def test_load_warm_backend_reports_warming_up(detect_module, monkeypatch):
+    seen = []
+
+    class StateRecordingBackend(CountingBackend):
+        def warm_up(self, batch_sizes=(1,)):
+            seen.append(detect_module.model_state)
+            super().warm_up(batch_sizes)
+
+    monkeypatch.setattr(detect_module, "model_state", "loading")
+    monkeypatch.setattr(detect_module, "MODEL_WARMUP_BATCH_SIZES", [1, 2])
+    monkeypatch.setattr(detect_module, "load_backend", StateRecordingBackend)
+    backend = detect_module.load_warm_backend(fake_spec())
+    assert seen == ["warming_up"]
+    assert [n for n, _, _ in backend.batches] == [1, 2]
+
+
+def test_readyz_is_503_until_model_is_ready(detect_module, monkeypatch):
+    client = TestClient(detect_module.app)
+    monkeypatch.setattr(detect_module, "model_state", "loading")
+    monkeypatch.setattr(detect_module, "active_model", None)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["model_state"] == "loading"
+    assert client.get("/healthz").status_code == 200
+
+    monkeypatch.setattr(detect_module, "model_state", "ready")
+    monkeypatch.setattr(detect_module, "inference_backend", FakeBackend(fake_spec()))
+    monkeypatch.setattr(detect_module, "active_model", fake_spec())
+    assert client.get("/readyz").json() == {"status": "ready", "model_state": "ready", "model_version": "fake"}
+
+
+def test_failed_load_is_reported_by_readyz(detect_module, monkeypatch):
+    def broken_spec():
+        raise FileNotFoundError("no model")
+
+    monkeypatch.setattr(detect_module, "resolve_model_spec", broken_spec)
+    monkeypatch.setattr(detect_module, "MODEL_LOAD_RETRY_SECONDS", 0)
+    monkeypatch.setattr(detect_module, "model_state", "loading")
+    monkeypatch.setattr(detect_module, "model_load_error", None)
+    asyncio.run(detect_module.load_model())
+
+    response = TestClient(detect_module.app).get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["model_state"] == "failed"
+    assert response.json()["error"] == "no model"
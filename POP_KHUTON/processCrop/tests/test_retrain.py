@@ -0,0 +1,47 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("ultralytics")  # retrain이 train.py를 통해 ultralytics를 import함
+
+import retrain
+from backends import ModelSpec
+from model_doubles import fake_spec, load_fake_backend
+from retrain import Evaluation, base_weights_for, check_gates, measure_latency, val_image_paths
+
+
+def _evaluation(map50_95, latency):
+    return Evaluation("v", "w.pt", map50_95, map50_95, latency, latency)
+
+
+def test_gates_require_map_gain_and_bounded_latency():
+    args = SimpleNamespace(min_map_gain=0.01, max_latency_ratio=1.1)
+    serving = _evaluation(0.50, 10.0)
+    assert check_gates(_evaluation(0.40, 50.0), None, args) == []
+    assert check_gates(_evaluation(0.52, 10.9), serving, args) == []
+    failures = check_gates(_evaluation(0.505, 11.5), serving, args)
+    assert [f.split(" ")[0] for f in failures] == ["mAP50-95", "CPU"]
+
+
+def test_base_weights_follow_serving_model(tmp_path):
+    onnx = ModelSpec(version="v2", backend="onnx", path=str(tmp_path / "model.onnx"))
+    assert base_weights_for(None, "default.pt") == "default.pt"
+    assert base_weights_for(ModelSpec(version="v1", backend="pytorch", path="v1.pt"), "default.pt") == "v1.pt"
+    assert base_weights_for(onnx, "default.pt") == "default.pt"
+    (tmp_path / "best.pt").write_bytes(b"")
+    assert base_weights_for(onnx, "default.pt") == str(tmp_path / "best.pt")
+
+
+def test_latency_uses_serving_decode_path(tmp_path, monkeypatch):
+    from PIL import Image
+    data = tmp_path / "data.yaml"
+    data.write_text("path: .\nval: images/val\nnames: [a]\n")
+    os.makedirs(tmp_path / "images" / "val")
+    Image.new("RGB", (32, 32)).save(tmp_path / "images" / "val" / "a.png")
+    (tmp_path / "images" / "val" / "notes.txt").write_text("")
+    paths = val_image_paths(str(data))
+    assert [os.path.basename(p) for p in paths] == ["a.png"]
+
+    monkeypatch.setattr(retrain, "load_backend", lambda spec, device: load_fake_backend(spec))
+    assert len(measure_latency(fake_spec(imgsz=32), paths, runs=4, warmup=1)) == 4
@@ -0,0 +1,39 @@
+import numpy as np
+
+from sector_grid import assign_sectors, empty_grid
+
+NAMES = {0: "v1_tomato", 1: "v3_pepper"}
+
+
+def _reference(xyxy, cls, width, height, x_div, y_div):
+    """박스마다 중심을 계산하던 이전 방식 그대로의 기준 구현."""
+    grid = empty_grid(x_div, y_div)
+    for (x1, y1, x2, y2), c in zip(xyxy, cls):
+        col = min(int(((x1 + x2) / 2) // (width / x_div)), x_div - 1)
+        row = min(int(((y1 + y2) / 2) // (height / y_div)), y_div - 1)
+        if col < 0 or row < 0:
+            continue
+        name = NAMES[int(c)]
+        grid[f"{row}-{col}"].append({"sector_row": row, "sector_col": col, "Lv": name[:2], "type": name[3:]})
+    return grid
+
+
+def test_matches_per_box_reference():
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(-20, 640, size=(200, 2))
+    wh = rng.uniform(1, 80, size=(200, 2))
+    xyxy = np.hstack([xy, xy + wh]).astype(np.float32)
+    cls = rng.integers(0, 2, size=200)
+    assert assign_sectors(xyxy, cls, NAMES, 640, 480, 4, 3) == _reference(xyxy, cls, 640, 480, 4, 3)
+
+
+def test_boxes_on_far_edge_fall_in_last_sector():
+    xyxy = np.array([[600, 400, 640, 480]], dtype=np.float32)
+    grid = assign_sectors(xyxy, np.array([1]), NAMES, 640, 480, 2, 2)
+    assert grid["1-1"] == [{"sector_row": 1, "sector_col": 1, "Lv": "v3", "type": "pepper"}]
+
+
+def test_no_detections_gives_empty_grid():
+    grid = assign_sectors(np.zeros((0, 4)), np.zeros((0,), dtype=np.int32), NAMES, 100, 100, 3, 2)
+    assert grid == empty_grid(3, 2)
+    assert list(grid) == ["0-0", "0-1", "0-2", "1-0", "1-1", "1-2"]
@@ -0,0 +1,70 @@
+import sessions
+from sessions import SessionManager
+
+
+class _Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _manager(monkeypatch, **kwargs):
+    clock = _Clock()
+    monkeypatch.setattr(sessions.time, "time", clock)
+    return SessionManager("secret", **kwargs), clock
+
+
+def test_issued_token_validates_from_cache(monkeypatch):
+    manager, _ = _manager(monkeypatch)
+    token, ttl = manager.issue("alice")
+    assert ttl == 86400
+    assert manager.validate(token) == "alice"
+    assert (manager.hits, manager.misses) == (1, 0)
+
+
+def test_token_verifies_without_cache_and_across_instances(monkeypatch):
+    manager, _ = _manager(monkeypatch, max_entries=1)
+    token, _ = manager.issue("alice")
+    manager.issue("bob")  # alice 항목은 LRU에서 밀려남
+    assert manager.validate(token) == "alice"
+    assert manager.misses == 1
+    assert SessionManager("secret").validate(token) == "alice"  # 같은 비밀키면 재시작 후에도 유효
+    assert SessionManager("other").validate(token) is None
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    manager, clock = _manager(monkeypatch, ttl_seconds=60)
+    token, _ = manager.issue("alice")
+    clock.now += 61
+    assert manager.validate(token) is None
+    assert len(manager) == 0
+    assert manager.validate(token) is None  # 캐시에 없을 때도 만료 확인
+
+
+def test_tampered_tokens_are_rejected(monkeypatch):
+    manager, _ = _manager(monkeypatch)
+    token, _ = manager.issue("alice")
+    payload, signature = token.split(".")
+    forged_payload = sessions._b64encode(b"mallory:9999999999:00")
+    for forged in (
+        f"{forged_payload}.{signature}",
+        f"{payload}.{signature[:-1]}A" if signature[-1] != "A" else f"{payload}.{signature[:-1]}B",
+        f"{payload}.{signature}é",
+        "no-dot",
+        "",
+    ):
+        assert manager.validate(forged) is None
+
+
+def test_revoked_token_stops_validating_until_it_expires(monkeypatch):
+    manager, clock = _manager(monkeypatch, ttl_seconds=60)
+    token, _ = manager.issue("alice")
+    assert manager.revoke(token)
+    assert manager.validate(token) is None
+    assert not manager.revoke("garbage")
+    assert manager.stats()["revoked"] == 1
+    clock.now += 61
+    manager.revoke("garbage")  # 다음 revoke 때 만료된 항목을 정리
+    assert manager.stats()["revoked"] == 0
@@ -0,0 +1,69 @@
+import asyncio
+import io
+
+import numpy as np
+from PIL import Image
+
+from model_doubles import fake_spec, load_fake_backend
+from model_pool import ModelWorkerPool
+
+
+def _png(width, height) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (0, 128, 0)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_sliced_inference_through_pool_is_chunked_to_capacity(detect_module):
+    async def scenario():
+        pool = ModelWorkerPool(fake_spec(), num_workers=1, queue_size=2, backend_loader=load_fake_backend)
+        await pool.start()
+        previous = detect_module.model_pool
+        try:
+            await pool.wait_ready(timeout=60)
+            detect_module.model_pool = pool
+            prepared = detect_module.sliced_inference.prepare(_png(256, 256), 64, 0.0)
+            assert len(prepared.frames) > pool.capacity
+            results = await detect_module.infer_frames(prepared.frames)
+            merged = detect_module.sliced_inference.merge(prepared, results)
+            return len(prepared.frames), results, merged, pool._workers[0].segments
+        finally:
+            detect_module.model_pool = previous
+            await pool.stop()
+
+    frames, results, merged, segments = asyncio.run(scenario())
+    assert frames == 17  # 타일 16장 + 전체 이미지 1장
+    assert len(results) == frames
+    assert all(len(r) == 1 for r in results)
+    assert len(merged) > 0
+    assert not segments
+
+
+def test_infer_frames_raises_first_error_and_releases_frames(detect_module):
+    calls = []
+
+    async def failing(image: np.ndarray):
+        calls.append(image)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        original = detect_module.run_inference
+        detect_module.run_inference = failing
+        try:
+            prepared = detect_module.sliced_inference.prepare(_png(128, 128), 64, 0.0)
+            released = []
+            release = detect_module.letterbox_pool.release
+            detect_module.letterbox_pool.release = released.append
+            try:
+                await detect_module.infer_frames(prepared.frames)
+            except RuntimeError as e:
+                return str(e), len(prepared.frames), released
+            finally:
+                detect_module.letterbox_pool.release = release
+        finally:
+            detect_module.run_inference = original
+
+    message, frames, released = asyncio.run(scenario())
+    assert message == "boom"
+    assert len(released) == frames
+    assert len(calls) == min(frames, detect_module.inference_capacity())
@@ -0,0 +1,93 @@
+import asyncio
+
+from sse_hub import SSEHub
+
+
+class _Request:
+    """ASGI receive 채널만 흉내 내는 요청. `disconnect()`하면 http.disconnect를 한 번 보냅니다."""
+
+    def __init__(self):
+        self._messages: asyncio.Queue = asyncio.Queue()
+
+    async def receive(self):
+        return await self._messages.get()
+
+    def disconnect(self):
+        self._messages.put_nowait({"type": "http.disconnect"})
+
+
+def test_replays_events_after_last_event_id():
+    hub = SSEHub(replay_size=8)
+    ids = [hub.publish("alice", f"grid-{i}") for i in range(3)]
+    hub.publish("bob", "other user")
+
+    sub = hub.subscribe("alice", last_event_id=str(ids[0]))
+
+    async def drain():
+        return [await sub.next(0.01) for _ in range(3)]
+
+    events = asyncio.run(drain())
+    assert [e[1] for e in events[:2]] == ["grid-1", "grid-2"]
+    assert events[2] is None
+
+
+def test_invalid_last_event_id_replays_nothing():
+    hub = SSEHub()
+    hub.publish("alice", "grid")
+    sub = hub.subscribe("alice", last_event_id="not-a-number")
+    assert len(sub) == 0
+
+
+def test_drop_oldest_and_coalesce_overflow():
+    oldest = SSEHub(max_queue_size=2, overflow="drop_oldest")
+    sub = oldest.subscribe("alice")
+    for i in range(4):
+        oldest.publish("alice", str(i))
+    assert [e[1] for e in sub._items] == ["2", "3"]
+    assert sub.dropped == 2
+
+    coalesce = SSEHub(max_queue_size=2, overflow="coalesce")
+    sub = coalesce.subscribe("alice")
+    for i in range(3):
+        coalesce.publish("alice", str(i))
+    assert [e[1] for e in sub._items] == ["2"]
+    assert sub.dropped == 2
+
+
+def test_stream_formats_events_and_heartbeats():
+    hub = SSEHub(heartbeat_interval=0.01)
+
+    async def scenario():
+        request = _Request()
+        sub = hub.subscribe("alice")
+        stream = hub.event_stream(sub, request)
+        event_id = hub.publish("alice", "{}", event_name="delta")
+        frames = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return event_id, frames
+
+    event_id, frames = asyncio.run(scenario())
+    assert frames == [f"id: {event_id}\nevent: delta\ndata: {{}}\n\n", ": keepalive\n\n"]
+    assert hub.subscriber_count() == 0
+
+
+def test_disconnect_ends_stream_without_waiting_for_heartbeat():
+    hub = SSEHub(heartbeat_interval=60.0)
+
+    async def scenario():
+        request = _Request()
+        sub = hub.subscribe("alice")
+        frames = []
+
+        async def consume():
+            async for frame in hub.event_stream(sub, request):
+                frames.append(frame)
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        request.disconnect()
+        await asyncio.wait_for(task, timeout=1.0)
+        return frames
+
+    assert asyncio.run(scenario()) == []
+    assert hub.subscriber_count() == 0
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from storage import JsonDirBackend, SqliteBackend, UserAlreadyExists, create_storage, migrate_json_dir_to_sqlite
+
+
+def _user(nickname="n", level=1, exp=0):
+    return {"id": "ignored", "nickname": nickname, "level": level, "exp": exp, "hashed_password": "hash"}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path):
+    backend = create_storage(str(tmp_path / "db"), request.param)
+    yield backend
+    backend.close()
+
+
+def test_create_get_and_duplicate(storage):
+    storage.create_user("alice", _user())
+    assert storage.get_user("alice")["nickname"] == "n"
+    assert storage.user_exists("alice")
+    assert not storage.user_exists("bob")
+    assert storage.get_user("bob") is None
+    with pytest.raises(UserAlreadyExists):
+        storage.create_user("alice", _user())
+
+
+def test_save_users_upserts_batch(storage):
+    storage.create_user("alice", _user())
+    storage.create_user("bob", _user())
+    storage.save_users([("alice", _user(level=3, exp=40)), ("bob", _user(nickname="b"))])
+    users = storage.load_all_users()
+    assert (users["alice"]["level"], users["alice"]["exp"]) == (3, 40)
+    assert users["bob"]["nickname"] == "b"
+
+
+def test_detection_results_round_trip_and_version(storage):
+    before = storage.data_version("alice")
+    storage.save_detection_results("alice", {"0-0": [{"Lv": "v1", "type": "tomato"}]})
+    after = storage.data_version("alice")
+    assert storage.get_detection_results("alice") == {"0-0": [{"Lv": "v1", "type": "tomato"}]}
+    assert after != before
+    assert storage.user_exists("alice")  # 탐지 결과만 있어도 사용 중인 ID
+    storage.save_detection_results_batch([("alice", {}), ("bob", {"0-0": []})])
+    assert storage.get_detection_results("alice") == {}
+    assert storage.get_detection_results("bob") == {"0-0": []}
+
+
+def test_migration_copies_users_and_results_idempotently(tmp_path):
+    db_dir = str(tmp_path / "db")
+    source = JsonDirBackend(db_dir)
+    source.create_user("alice", _user(level=2))
+    source.save_detection_results("alice", {"0-0": []})
+    source.save_detection_results("ghost", {"1-1": []})
+    sqlite_path = str(tmp_path / "out.sqlite3")
+
+    assert migrate_json_dir_to_sqlite(db_dir, sqlite_path) == (1, 2)
+    assert migrate_json_dir_to_sqlite(db_dir, sqlite_path) == (1, 2)
+
+    target = SqliteBackend(sqlite_path)
+    try:
+        assert target.get_user("alice")["level"] == 2
+        assert target.get_detection_results("ghost") == {"1-1": []}
+        assert list(target.load_all_users()) == ["alice"]
+    finally:
+        target.close()
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        create_storage(str(tmp_path), "mongo")
+    assert not os.listdir(tmp_path)
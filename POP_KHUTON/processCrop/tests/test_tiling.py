@@ -0,0 +1,59 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inference import Detections
+from preprocess import LetterboxPool
+from tiling import SlicedInference, nms, plan_tiles
+
+
+def _det(boxes, conf, cls=None):
+    return Detections(
+        xyxy=np.array(boxes, dtype=np.float32),
+        conf=np.array(conf, dtype=np.float32),
+        cls=np.array(cls if cls is not None else [0] * len(conf), dtype=np.int32),
+    )
+
+
+def test_tiles_cover_the_image_with_overlap():
+    tiles = plan_tiles(1000, 600, 400, 0.25)
+    assert tiles[0] == (0, 0, 400, 400)
+    assert tiles[-1] == (600, 200, 1000, 600)  # 마지막 타일은 이미지 끝에 맞춤
+    assert {t[0] for t in tiles} == {0, 300, 600}
+    assert all(x1 - x0 == 400 and y1 - y0 == 400 for x0, y0, x1, y1 in tiles)
+    assert plan_tiles(300, 200, 640, 0.2) == [(0, 0, 300, 200)]
+
+
+def test_nms_suppresses_contained_boxes_per_class():
+    detections = _det(
+        [[0, 0, 100, 100], [10, 10, 50, 50], [10, 10, 50, 50], [200, 200, 250, 250]],
+        [0.9, 0.8, 0.7, 0.6],
+        [0, 0, 1, 0],
+    )
+    kept = nms(detections, threshold=0.5, metric="ios")
+    assert kept.conf.tolist() == pytest.approx([0.9, 0.7, 0.6])
+    assert len(nms(detections, threshold=0.5, metric="iou")) == 4  # IoU로는 작은 박스가 남음
+
+
+def test_merge_moves_tile_boxes_to_original_and_dedups_seams():
+    pool = LetterboxPool(imgsz=64)
+    sliced = SlicedInference(pool, include_full_image=False)
+    buf = io.BytesIO()
+    Image.new("RGB", (128, 64), (0, 0, 0)).save(buf, format="PNG")
+    prepared = sliced.prepare(buf.getvalue(), 64, 0.5)
+    assert prepared.offsets == [(0, 0), (32, 0), (64, 0)]
+
+    # 원본 (40..56, 8..24)에 있는 식물이 앞의 두 타일에 함께 보이는 경우
+    results = [_det([[40, 8, 56, 24]], [0.9]), _det([[8, 8, 24, 24]], [0.8]), Detections.empty()]
+    merged = sliced.merge(prepared, results)
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged.xyxy[0], [40, 8, 56, 24])
+
+
+def test_too_many_tiles_is_rejected():
+    buf = io.BytesIO()
+    Image.new("RGB", (1000, 1000)).save(buf, format="PNG")
+    with pytest.raises(ValueError, match="tiles"):
+        SlicedInference(LetterboxPool(imgsz=64), max_tiles=4).prepare(buf.getvalue(), 100, 0.0)
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+
+import pytest
+
+from user_data_cache import UserDataCache
+
+
+class _Source:
+    """loader/version_of 역할. `gate`가 열릴 때까지 읽기를 멈춰 동시 요청 상황을 만듭니다."""
+
+    def __init__(self):
+        self.version = 1
+        self.body = b'{"level":1}'
+        self.loads = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def load(self, user_id):
+        self.loads += 1
+        body = self.body
+        self.gate.wait(5)
+        return self.version, body
+
+    def version_of(self, user_id):
+        return self.version
+
+
+def _cache(source, **kwargs):
+    return UserDataCache(source.load, source.version_of, **kwargs)
+
+
+def test_hit_serves_same_bytes_without_reloading():
+    source = _Source()
+    cache = _cache(source, validate_interval=60)
+
+    async def main():
+        first = await cache.get("u")
+        second = await cache.get("u")
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first is second
+    assert source.loads == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_version_change_is_noticed_after_validate_interval():
+    source = _Source()
+    cache = _cache(source, validate_interval=0)
+
+    async def main():
+        await cache.get("u")
+        assert await cache.get("u") == b'{"level":1}'  # 버전이 같으면 다시 읽지 않음
+        source.version, source.body = 2, b'{"level":2}'
+        return await cache.get("u")
+
+    assert asyncio.run(main()) == b'{"level":2}'
+    assert source.loads == 2
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_invalidate_drops_entry():
+    source = _Source()
+    cache = _cache(source, validate_interval=60)
+
+    async def main():
+        await cache.get("u")
+        source.body = b'{"level":2}'
+        cache.invalidate("u")
+        return await cache.get("u")
+
+    assert asyncio.run(main()) == b'{"level":2}'
+    assert source.loads == 2
+
+
+def test_concurrent_misses_share_one_load():
+    source = _Source()
+    source.gate.clear()
+    cache = _cache(source)
+
+    async def main():
+        tasks = [asyncio.create_task(cache.get("u")) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        source.gate.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(main()) == [b'{"level":1}'] * 5
+    assert source.loads == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_cancelling_leader_does_not_cancel_coalesced_waiters():
+    source = _Source()
+    source.gate.clear()
+    cache = _cache(source)
+
+    async def main():
+        leader = asyncio.create_task(cache.get("u"))
+        await asyncio.sleep(0.02)
+        follower = asyncio.create_task(cache.get("u"))
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        source.gate.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == b'{"level":1}'
+    assert len(cache) == 1  # 먼저 온 요청이 끊겨도 결과는 캐시에 채워짐
+
+
+def test_result_read_before_invalidate_is_not_cached():
+    source = _Source()
+    source.gate.clear()
+    cache = _cache(source, validate_interval=60)
+
+    async def main():
+        stale = asyncio.create_task(cache.get("u"))
+        await asyncio.sleep(0.02)
+        cache.invalidate("u")  # 읽는 도중 변경됨
+        source.body = b'{"level":2}'
+        fresh = asyncio.create_task(cache.get("u"))  # 무효화 이전의 읽기에 합류하지 않음
+        await asyncio.sleep(0.02)
+        source.gate.set()
+        return await stale, await fresh, await cache.get("u")
+
+    stale, fresh, cached = asyncio.run(main())
+    assert stale == b'{"level":1}'
+    assert fresh == cached == b'{"level":2}'
+    assert source.loads == 2
+
+
+def test_no_per_user_state_left_after_invalidations():
+    source = _Source()
+    cache = _cache(source, max_entries=2)
+
+    async def main():
+        for i in range(100):
+            cache.invalidate(f"user{i}")
+            await cache.get(f"user{i}")
+
+    asyncio.run(main())
+    assert len(cache) == 2
+    assert not cache._in_flight
+
+
+def test_missing_user_is_not_cached():
+    source = _Source()
+    source.body = None
+    cache = _cache(source)
+
+    async def main():
+        return await cache.get("nobody"), await cache.get("nobody")
+
+    assert asyncio.run(main()) == (None, None)
+    assert source.loads == 2
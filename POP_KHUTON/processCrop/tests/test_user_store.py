@@ -0,0 +1,109 @@
+import asyncio
+
+from pydantic import BaseModel
+
+from storage import JsonDirBackend
+from user_store import UserStore
+
+
+class _User(BaseModel):
+    id: str
+    password: str = "hash"
+    level: int = 1
+
+
+class _FailingOnce(JsonDirBackend):
+    def __init__(self, db_dir):
+        super().__init__(db_dir)
+        self.fail_next = True
+
+    def save_users(self, batch):
+        if self.fail_next:
+            self.fail_next = False
+            raise OSError("disk full")
+        super().save_users(batch)
+
+
+def _store(storage, **kwargs):
+    store = UserStore(storage, _User, public_fields=["id", "level"], **kwargs)
+    store.load()
+    return store
+
+
+def test_changes_are_written_behind_and_batched(tmp_path):
+    storage = JsonDirBackend(str(tmp_path))
+    changed, persisted = [], []
+
+    async def scenario():
+        store = _store(storage)
+        store.on_change(changed.append)
+        store.on_persisted(persisted.append)
+        await store.create("alice", _User(id="alice"))
+        await store.create("bob", _User(id="bob"))
+        for key in ("alice", "bob", "alice"):
+            store.get(key).level += 1
+            store.mark_dirty(key)
+        assert store.pending_writes == 2
+        assert storage.get_user("alice")["level"] == 1  # 아직 기록 전
+        await store.flush()
+        return store.pending_writes
+
+    assert asyncio.run(scenario()) == 0
+    assert storage.get_user("alice")["level"] == 3
+    assert storage.get_user("bob")["level"] == 2
+    assert changed == ["alice", "bob", "alice", "bob", "alice"]
+    assert persisted[:2] == [["alice"], ["bob"]]
+    assert sorted(persisted[2]) == ["alice", "bob"]
+
+
+def test_failed_flush_keeps_users_dirty(tmp_path):
+    storage = _FailingOnce(str(tmp_path))
+
+    async def scenario():
+        store = _store(storage)
+        await store.create("alice", _User(id="alice"))
+        store.get("alice").level = 5
+        store.mark_dirty("alice")
+        await store.flush()
+        pending = store.pending_writes
+        await store.flush()
+        return pending, store.pending_writes
+
+    assert asyncio.run(scenario()) == (1, 0)
+    assert storage.get_user("alice")["level"] == 5
+
+
+def test_stop_flushes_remaining_changes(tmp_path):
+    storage = JsonDirBackend(str(tmp_path))
+
+    async def scenario():
+        store = _store(storage, flush_interval=60)
+        await store.start()
+        await store.create("alice", _User(id="alice"))
+        store.get("alice").level = 9
+        store.mark_dirty("alice")
+        await store.stop()
+
+    asyncio.run(scenario())
+    assert _store(storage).get("alice").level == 9
+
+
+
+def test_page_and_public_json(tmp_path):
+    async def scenario():
+        store = _store(JsonDirBackend(str(tmp_path)))
+        for key in ("carol", "alice", "bob"):
+            await store.create(key, _User(id=key))
+        first = store.page(limit=2)
+        rest = store.page(after=first[1], limit=2)
+        cached = store.public_json("alice")
+        same = store.public_json("alice") is cached
+        store.get("alice").level = 4
+        store.mark_dirty("alice")
+        return first, rest, same, store.public_json("alice")
+
+    first, rest, same, refreshed = asyncio.run(scenario())
+    assert first == (["alice", "bob"], "bob")
+    assert rest == (["carol"], None)
+    assert same
+    assert refreshed == b'{"id": "alice", "level": 4}'
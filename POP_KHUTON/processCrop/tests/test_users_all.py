@@ -0,0 +1,43 @@
+import json
+import uuid
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def prefix(auth_client):
+    """이 모듈에서 만든 사용자만 보이도록, 다른 테스트의 ID보다 앞에 정렬되는 접두어로 세 명을 만듭니다."""
+    prefix = f"page-{uuid.uuid4().hex[:8]}-"
+    for suffix, nickname in (("a", "first"), ("b", "second"), ("c", "third")):
+        response = auth_client.post("/register/", data={"id": prefix + suffix, "password": "pw", "nickname": nickname})
+        assert response.status_code == 201
+    return prefix
+
+
+def test_cursor_pagination(auth_client, prefix):
+    first = auth_client.get("/users/all/", params={"cursor": prefix, "limit": 2})
+    assert first.status_code == 200
+    assert [u["id"] for u in first.json()] == [prefix + "a", prefix + "b"]
+    assert first.headers["X-Next-Cursor"] == prefix + "b"
+    assert int(first.headers["X-Total-Count"]) >= 3
+
+    second = auth_client.get("/users/all/", params={"cursor": first.headers["X-Next-Cursor"], "limit": 1})
+    assert [u["id"] for u in second.json()] == [prefix + "c"]
+
+
+def test_field_selection_and_ndjson(auth_client, prefix):
+    response = auth_client.get(
+        "/users/all/", params={"cursor": prefix, "limit": 2, "fields": "id,nickname", "format": "ndjson"}
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [{"id": prefix + "a", "nickname": "first"}, {"id": prefix + "b", "nickname": "second"}]
+
+
+def test_passwords_are_never_listed(auth_client, prefix):
+    response = auth_client.get("/users/all/", params={"cursor": prefix, "limit": 3})
+    assert all("hashed_password" not in row for row in response.json())
+
+
+def test_unknown_field_is_400(auth_client):
+    assert auth_client.get("/users/all/", params={"fields": "id,hashed_password"}).status_code == 400
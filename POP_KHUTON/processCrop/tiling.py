@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from inference import Detections
+from preprocess import LetterboxedImage, LetterboxPool, open_image
+
+Tile = Tuple[int, int, int, int]  # 원본 이미지 좌표 (x0, y0, x1, y1)
+
+
+def _tile_starts(length: int, tile_size: int, step: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)  # 마지막 타일은 이미지 끝에 맞춰 잘리는 부분이 없도록
+    return sorted(set(starts))
+
+
+def plan_tiles(width: int, height: int, tile_size: int, overlap: float) -> List[Tile]:
+    """이미지를 `tile_size` 정사각형 타일로 나눕니다. 이웃 타일은 `overlap` 비율만큼 겹칩니다."""
+    step = max(1, int(tile_size * (1.0 - overlap)))
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in _tile_starts(height, tile_size, step)
+        for x0 in _tile_starts(width, tile_size, step)
+    ]
+
+
+def box_overlap(box: np.ndarray, others: np.ndarray, metric: str) -> np.ndarray:
+    """box 하나와 others (N, 4) 사이의 IoU 또는 IoS(작은 박스 기준 교집합 비율)."""
+    ix1 = np.maximum(box[0], others[:, 0])
+    iy1 = np.maximum(box[1], others[:, 1])
+    ix2 = np.minimum(box[2], others[:, 2])
+    iy2 = np.minimum(box[3], others[:, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    other_areas = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+    if metric == "ios":
+        denom = np.minimum(area, other_areas)
+    else:
+        denom = area + other_areas - inter
+    return inter / np.maximum(denom, 1e-9)
+
+
+def nms(detections: Detections, threshold: float = 0.5, metric: str = "ios") -> Detections:
+    """
+    클래스별 greedy NMS. 타일 경계에서 잘린 식물은 온전한 박스에 대부분 포함되므로 기본값은
+    IoU 대신 IoS를 씁니다.
+    """
+    if len(detections) <= 1:
+        return detections
+    order = np.argsort(-detections.conf, kind="stable")
+    xyxy = detections.xyxy[order]
+    cls = detections.cls[order]
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        rest = np.nonzero(~suppressed[i + 1:] & (cls[i + 1:] == cls[i]))[0] + i + 1
+        if rest.size:
+            suppressed[rest[box_overlap(xyxy[i], xyxy[rest], metric) > threshold]] = True
+    kept = order[keep]
+    return Detections(xyxy=detections.xyxy[kept], conf=detections.conf[kept], cls=detections.cls[kept])
+
+
+@dataclass
+class SlicedFrames:
+    """한 업로드에서 만든 타일(및 전체 이미지) letterbox 입력들과 각 타일의 원본 좌표 오프셋."""
+    frames: List[LetterboxedImage]
+    offsets: List[Tuple[int, int]]
+    orig_width: int
+    orig_height: int
+
+
+class SlicedInference:
+    """
+    큰 이미지를 겹치는 타일로 잘라 각 타일을 모델 입력 크기로 추론한 뒤, 박스를 원본 좌표로 모아
+    타일 경계의 중복을 NMS로 합칩니다. 640px로 줄이면 사라지는 작은/먼 식물을 찾기 위한 모드이며,
+    `include_full_image`이면 큰 식물을 놓치지 않도록 전체 이미지 한 장도 함께 추론합니다.
+    """
+
+    def __init__(
+        self,
+        letterbox_pool: LetterboxPool,
+        tile_size: int = 640,
+        overlap: float = 0.2,
+        include_full_image: bool = True,
+        nms_threshold: float = 0.5,
+        nms_metric: str = "ios",
+        max_tiles: int = 64,
+    ):
+        if nms_metric not in ("iou", "ios"):
+            raise ValueError("nms_metric must be 'iou' or 'ios'.")
+        self.letterbox_pool = letterbox_pool
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.include_full_image = include_full_image
+        self.nms_threshold = nms_threshold
+        self.nms_metric = nms_metric
+        self.max_tiles = max_tiles
+
+    def prepare(self, contents: bytes, tile_size: int, overlap: float) -> SlicedFrames:
+        """업로드를 전체 해상도로 디코딩해 타일별 letterbox 배열을 만듭니다. 잘못된 입력은 ValueError."""
+        img = open_image(contents)
+        width, height = img.size
+        tiles = plan_tiles(width, height, tile_size, overlap)
+        if len(tiles) > self.max_tiles:
+            raise ValueError(
+                f"Image {width}x{height} needs {len(tiles)} tiles of {tile_size}px "
+                f"(limit {self.max_tiles}); use a larger tile_size."
+            )
+        try:
+            img = img.convert("RGB")  # 타일은 원본 해상도에서 잘라야 하므로 draft 축소 없이 디코딩
+        except Exception as e:
+            raise ValueError(f"could not decode image: {e}") from e
+
+        frames: List[LetterboxedImage] = []
+        offsets: List[Tuple[int, int]] = []
+        if self.include_full_image and len(tiles) > 1:
+            frames.append(self.letterbox_pool.letterbox(img))
+            offsets.append((0, 0))
+        for x0, y0, x1, y1 in tiles:
+            frames.append(self.letterbox_pool.letterbox(img.crop((x0, y0, x1, y1))))
+            offsets.append((x0, y0))
+        return SlicedFrames(frames, offsets, width, height)
+
+    def release(self, sliced: SlicedFrames):
+        for frame in sliced.frames:
+            self.letterbox_pool.release(frame)
+
+    def merge(self, sliced: SlicedFrames, results: Sequence[Detections]) -> Detections:
+        """타일별 결과를 원본 좌표로 옮겨 합친 뒤 NMS로 중복을 제거합니다."""
+        parts = []
+        for frame, (x0, y0), detections in zip(sliced.frames, sliced.offsets, results):
+            local = frame.to_original(detections)
+            if len(local) == 0:
+                continue
+            xyxy = local.xyxy.copy()
+            xyxy[:, [0, 2]] += x0
+            xyxy[:, [1, 3]] += y0
+            parts.append(Detections(xyxy=xyxy, conf=local.conf, cls=local.cls))
+        if not parts:
+            return Detections.empty()
+        merged = Detections(
+            xyxy=np.concatenate([p.xyxy for p in parts]),
+            conf=np.concatenate([p.conf for p in parts]),
+            cls=np.concatenate([p.cls for p in parts]),
+        )
+        return nms(merged, self.nms_threshold, self.nms_metric)
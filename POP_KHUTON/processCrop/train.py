@@ -1,7 +1,51 @@
+"""
+YOLO 모델 학습.
+
+processCrop 폴더에서 실행:
+    python dataset_prep.py && python train.py               # 전처리된 데이터셋(box_detection/prepared)으로 학습
+    python train.py --data ./box_detection/data.yaml        # 원본 폴더로 학습 (매 에폭 이미지를 다시 디코딩)
+
+dataset_prep.py 결과에는 이미지마다 긴 변을 imgsz로 줄인 .npy가 있어, DataLoader 작업 프로세스들은
+디코딩/리사이즈 없이 배열을 읽고 증강만 합니다. 같은 seed면 같은 결과가 나오도록 deterministic으로 학습합니다.
+"""
+import argparse
+import os
+
 from ultralytics import YOLO
 
-model = YOLO('yolo11s.pt') 
+PREPARED_DATA = "./box_detection/prepared/data.yaml"
+RAW_DATA = "./box_detection/data.yaml"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="yolo11s.pt", help="시작 가중치")
+    parser.add_argument("--data", default=None, help=f"기본값: {PREPARED_DATA}가 있으면 그것, 없으면 {RAW_DATA}")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--device", default=None, help="예: cpu, 0")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="증강을 병렬로 수행할 DataLoader 작업 프로세스 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = args.data or (PREPARED_DATA if os.path.exists(PREPARED_DATA) else RAW_DATA)
+    model = YOLO(args.model)
+
+    # 모델 학습
+    results = model.train(
+        data=data,
+        epochs=args.epochs,
+        imgsz=args.imgsz,
+        batch=args.batch,
+        device=args.device,
+        workers=args.workers,
+        seed=args.seed,
+        deterministic=True,
+        cache="disk",  # prepared 데이터셋은 .npy가 이미 있으므로 새로 만들지 않고 그대로 읽음
+    )
+    return results
 
-# 모델 학습
-results = model.train(data='./box_detection/data.yaml', epochs=50, imgsz=640)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# loader가 돌려주는 값: (data_version, 직렬화된 응답 본문). 본문이 None이면 데이터가 없는 사용자
+Loaded = Tuple[Any, Optional[bytes]]
+
+
+@dataclass
+class _Entry:
+    body: bytes
+    version: Any
+    checked_at: float
+
+
+@dataclass
+class _Load:
+    task: Optional[asyncio.Future] = None
+    stale: bool = False  # 읽는 도중 invalidate되면 True (결과를 돌려주기는 하지만 보관하지 않음)
+
+
+class UserDataCache:
+    """
+    /user_data/ 응답 본문(JSON bytes)을 사용자별로 보관하는 read-through 캐시.
+
+    적중하면 저장소를 읽지 않고 같은 bytes를 그대로 돌려줍니다. 이 서버가 쓴 변경(/detect/)은 `invalidate`로
+    바로 반영하고, 다른 프로세스(auth 서버)가 쓴 변경은 항목을 마지막으로 확인한 지 `validate_interval`초가
+    지난 뒤의 요청에서 `version_of`(파일 mtime / updated_at) 값을 비교해 알아차립니다. auth 서버가 무효화 이벤트를
+    보내 주는 구성(invalidation.py, gateway.py)에서는 그 이벤트로도 `invalidate`가 호출됩니다.
+    loader와 version_of는 blocking 함수이며 스레드에서 실행됩니다.
+
+    같은 사용자의 동시 미스는 요청과 분리된 읽기 태스크 하나를 함께 기다리므로, 먼저 온 요청이 취소되어도
+    나머지 요청은 결과를 받습니다. 무효화는 진행 중인 읽기를 stale로 표시하고 목록에서 떼어 내므로, 이후
+    요청은 새로 읽고 무효화 이전의 결과는 보관되지 않습니다. 사용자별 상태는 항목과 진행 중인 읽기뿐입니다.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Loaded],
+        version_of: Callable[[str], Any],
+        max_entries: int = 4096,
+        validate_interval: float = 1.0,
+    ):
+        self.loader = loader
+        self.version_of = version_of
+        self.max_entries = max_entries
+        self.validate_interval = validate_interval
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._in_flight: Dict[str, _Load] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, user_id: str):
+        load = self._in_flight.pop(user_id, None)
+        if load is not None:
+            load.stale = True
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def _put(self, user_id: str, body: bytes, version: Any):
+        self._entries[user_id] = _Entry(body, version, time.monotonic())
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, user_id: str) -> Optional[bytes]:
+        """직렬화된 응답 본문. 데이터가 없는 사용자는 None (캐시하지 않음)."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if time.monotonic() - entry.checked_at < self.validate_interval:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry.body
+            version = await asyncio.to_thread(self.version_of, user_id)
+            # 확인하는 사이 invalidate되었거나 다시 읽혔으면 항목이 바뀌어 있음
+            if self._entries.get(user_id) is entry and version == entry.version:
+                entry.checked_at = time.monotonic()
+                self._entries.move_to_end(user_id)
+                self.revalidated += 1
+                return entry.body
+
+        load = self._in_flight.get(user_id)
+        if load is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            load = _Load()
+            load.task = asyncio.ensure_future(self._load(user_id, load))
+            self._in_flight[user_id] = load
+            load.task.add_done_callback(lambda task: self._on_load_done(user_id, load))
+        return await asyncio.shield(load.task)
+
+    async def _load(self, user_id: str, load: _Load) -> Optional[bytes]:
+        version, body = await asyncio.to_thread(self.loader, user_id)
+        if body is not None and not load.stale:
+            self._put(user_id, body, version)
+        return body
+
+    def _on_load_done(self, user_id: str, load: _Load):
+        if self._in_flight.get(user_id) is load:
+            del self._in_flight[user_id]
+        if not load.task.cancelled():
+            load.task.exception()  # 기다리던 요청이 모두 취소됐어도 "never retrieved" 경고가 나지 않도록
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.revalidated + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits + self.revalidated + self.coalesced) / lookups if lookups else 0.0,
+        }